@@ -6,6 +6,7 @@ A desktop application to automate SSH key setup for GitHub
 Main application entry point with improved error handling and modular design
 """
 
+import argparse
 import tkinter as tk
 import sys
 import traceback
@@ -46,8 +47,24 @@ def setup_global_exception_handler():
     sys.excepthook = handle_exception
 
 
-def main():
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="SSH GitHub Configurator")
+    parser.add_argument("--profile-operations", type=int, metavar="N",
+                        help="profile the first N background operations (reports go next to the logs)")
+    parser.add_argument("--profile-seconds", type=float, metavar="S",
+                        help="profile the first S seconds after startup")
+    args = parser.parse_args(argv)
+    if args.profile_operations is not None and args.profile_operations <= 0:
+        parser.error("--profile-operations must be positive")
+    if args.profile_seconds is not None and args.profile_seconds <= 0:
+        parser.error("--profile-seconds must be positive")
+    return args
+
+
+def main(argv=None):
     """Main function to run the application with comprehensive error handling"""
+    args = parse_args(argv)
     try:
         # Setup global exception handling
         setup_global_exception_handler()
@@ -56,11 +73,17 @@ def main():
         
         # Create main window with error handling
         root = tk.Tk()
+        app = None
         
         # Handle window close event
         def on_closing():
             try:
                 app_logger.info("Application closing")
+                if app is not None:
+                    app.stop_profile_capture(notify=False)
+                    app.scheduler.shutdown()
+                    app.ssh_manager.close_connections()
+                    app.ssh_manager.events.close(timeout=1.0)
                 root.quit()
                 root.destroy()
             except Exception as e:
@@ -72,6 +95,8 @@ def main():
         # Create application instance
         try:
             app = SSHGitHubConfiguratorUI(root)
+            if args.profile_operations or args.profile_seconds:
+                app.start_profile_capture(operations=args.profile_operations, duration=args.profile_seconds)
             app._display_found_ssh_keys()
             app_logger.info("Application UI initialized successfully")
         except Exception as e:
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Askpass module for SSH GitHub Configurator
+Supplies passphrases to ssh-keygen and ssh-add without a terminal, via an SSH_ASKPASS helper
+"""
+
+import atexit
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+from logger import app_logger
+
+
+# Environment variable the helper reads the passphrase from
+PASSPHRASE_ENV_VAR = "SSH_GITHUB_CONFIGURATOR_PASSPHRASE"
+
+# Answer for prompts asking for the old passphrase (ssh-keygen -p), if set
+OLD_PASSPHRASE_ENV_VAR = "SSH_GITHUB_CONFIGURATOR_OLD_PASSPHRASE"
+
+PassphraseSource = Union[str, Callable[[], str]]
+
+_helper_lock = threading.Lock()
+_helper_path: Optional[Path] = None
+
+
+def resolve_passphrase(source: Optional[PassphraseSource]) -> Optional[str]:
+    """
+    Turn a passphrase source into a passphrase
+
+    Args:
+        source: A passphrase string, a callable returning one (e.g. a secret store
+            lookup), or None
+
+    Returns:
+        The passphrase, or None if no source was given
+    """
+    if source is None:
+        return None
+    if callable(source):
+        return source()
+    return source
+
+
+def stdin_passphrase() -> str:
+    """Passphrase source reading one line from standard input (for piped batch use)"""
+    line = sys.stdin.readline()
+    return line.rstrip("\r\n")
+
+
+def get_askpass_helper() -> Path:
+    """Create (once per process) a private helper script that prints the passphrase"""
+    global _helper_path
+    with _helper_lock:
+        if _helper_path is not None and _helper_path.exists():
+            return _helper_path
+
+        helper_dir = Path(tempfile.mkdtemp(prefix="ssh_github_askpass_"))
+        atexit.register(shutil.rmtree, helper_dir, ignore_errors=True)
+        if platform.system() == "Windows":
+            # Values are read with delayed expansion (!VAR!), which cmd never re-parses, so
+            # passphrases containing & | < > ^ % ! are printed unchanged; "echo(" prints
+            # an empty passphrase as an empty line. The prompt is matched by substitution
+            # (case-insensitive) because !VAR! is not expanded on either side of a pipe.
+            helper = helper_dir / "askpass.cmd"
+            # newline="" keeps the explicit CRLFs from becoming CR CR LF on Windows
+            with open(helper, "w", newline="") as f:
+                f.write(f"@echo off\r\n"
+                        f"setlocal DisableDelayedExpansion\r\n"
+                        f"set \"SSH_GC_PROMPT=%~1\"\r\n"
+                        f"setlocal EnableDelayedExpansion\r\n"
+                        f"if not defined {OLD_PASSPHRASE_ENV_VAR} goto current\r\n"
+                        f"if \"!SSH_GC_PROMPT:old=!\"==\"!SSH_GC_PROMPT!\" goto current\r\n"
+                        f"echo(!{OLD_PASSPHRASE_ENV_VAR}!\r\n"
+                        f"exit /b 0\r\n"
+                        f":current\r\n"
+                        f"echo(!{PASSPHRASE_ENV_VAR}!\r\n")
+        else:
+            # The prompt is passed as $1; "Enter old passphrase" gets the old one when set
+            helper = helper_dir / "askpass.sh"
+            helper.write_text(f'#!/bin/sh\n'
+                              f'case "$1" in\n'
+                              f'    *[Oo]ld*) printf \'%s\\n\' "${{{OLD_PASSPHRASE_ENV_VAR}-${PASSPHRASE_ENV_VAR}}}" ;;\n'
+                              f'    *) printf \'%s\\n\' "${PASSPHRASE_ENV_VAR}" ;;\n'
+                              f'esac\n')
+            helper.chmod(0o700)
+
+        app_logger.debug(f"Created askpass helper: {helper}")
+        _helper_path = helper
+        return helper
+
+
+def askpass_env(passphrase: str, base_env: Optional[Dict[str, str]] = None,
+                old_passphrase: Optional[str] = None) -> Dict[str, str]:
+    """
+    Build an environment that makes OpenSSH tools read the passphrase from the helper
+
+    The passphrase travels in the child's environment (readable only by the same
+    user) rather than on the command line, where any user could see it.
+    old_passphrase answers "Enter old passphrase" prompts when changing a passphrase.
+    """
+    env = dict(os.environ if base_env is None else base_env)
+    env["SSH_ASKPASS"] = str(get_askpass_helper())
+    # OpenSSH 8.4+ honours this even when a terminal is available
+    env["SSH_ASKPASS_REQUIRE"] = "force"
+    # Older OpenSSH only uses SSH_ASKPASS when DISPLAY is set
+    env.setdefault("DISPLAY", ":0")
+    env[PASSPHRASE_ENV_VAR] = passphrase
+    if old_passphrase is not None:
+        env[OLD_PASSPHRASE_ENV_VAR] = old_passphrase
+    else:
+        env.pop(OLD_PASSPHRASE_ENV_VAR, None)
+    return env
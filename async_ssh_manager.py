@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Async SSH manager module for SSH GitHub Configurator
+Coroutine versions of the SSHManager inventory, generation, deletion, agent and connection-test operations
+"""
+
+import asyncio
+import functools
+import os
+import platform
+import shutil
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from logger import app_logger
+from askpass import resolve_passphrase, PassphraseSource
+from key_record import KeyRecord
+from process_runner import ProcessRunner, AGENT_TIMEOUT, KEYGEN_TIMEOUT, CONNECT_TIMEOUT
+from ssh_diagnostics import classify, describe, summarize
+from ssh_manager import SSHManager, SSHKeyError
+from key_events import AGENT_LOADED
+
+
+# External commands (ssh-keygen, ssh-add, ssh) running at once across all coroutines
+DEFAULT_MAX_PROCESSES = 32
+
+# Threads for blocking file system work (inventory scans, key file moves and deletes)
+DEFAULT_MAX_FILE_IO = 8
+
+
+class AsyncSSHManager:
+    """
+    asyncio facade over an SSHManager
+
+    External commands run through ProcessRunner.run_async on a dedicated
+    runner. An asyncio.Semaphore of the same size sits in front of it, so any
+    number of awaiting coroutines queue on the event loop without polling
+    for a process slot. File system work that has no non-blocking form in the
+    standard library (directory scans, unlink, chmod, the key pool's renames)
+    runs on a small thread pool. Both limits are shared by every operation of
+    one instance. Generation and deletion of the same key path are
+    serialised; everything else runs fully concurrently.
+
+    Results, errors (SSHKeyError with the same codes) and key lifecycle
+    events are the same as with the synchronous SSHManager.
+    """
+
+    def __init__(self, manager: Optional[SSHManager] = None, max_processes: int = DEFAULT_MAX_PROCESSES,
+                 max_file_io: int = DEFAULT_MAX_FILE_IO):
+        self.manager = manager or SSHManager()
+        self.max_processes = max_processes
+        self.runner = ProcessRunner(max_concurrent=max_processes)
+        self._file_io = ThreadPoolExecutor(max_workers=max_file_io, thread_name_prefix="async-file-io")
+        # asyncio primitives belong to one event loop; keep one semaphore per loop
+        self._slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = \
+            weakref.WeakKeyDictionary()
+        self._path_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    async def __aenter__(self) -> "AsyncSSHManager":
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Stop the file I/O threads (running commands are not affected)"""
+        self._file_io.shutdown(wait=False)
+
+    async def _in_thread(self, func, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self._file_io, functools.partial(func, *args, **kwargs))
+
+    async def _run(self, cmd: List[str], timeout: Optional[float], **kwargs):
+        loop = asyncio.get_running_loop()
+        slots = self._slots.get(loop)
+        if slots is None:
+            slots = self._slots[loop] = asyncio.Semaphore(self.max_processes)
+        async with slots:
+            return await self.runner.run_async(cmd, timeout=timeout, on_stdout=self.manager.output_callback,
+                                               on_stderr=self.manager.output_callback, **kwargs)
+
+    def _path_lock(self, path: Path) -> asyncio.Lock:
+        key = str(path)
+        lock = self._path_locks.get(key)
+        if lock is None:
+            lock = self._path_locks[key] = asyncio.Lock()
+        return lock
+
+    # Inventory
+
+    async def find_all_ssh_keys(self) -> List[KeyRecord]:
+        """All key pairs across the manager's key roots"""
+        return await self._in_thread(self.manager.find_all_ssh_keys)
+
+    async def check_existing_keys(self) -> Optional[KeyRecord]:
+        """The default key (id_ed25519, then id_rsa), or None"""
+        return await self._in_thread(self.manager.check_existing_keys)
+
+    async def load_public_key(self, pubkey_path: Path) -> str:
+        """Content of a public key file"""
+        return await self._in_thread(self.manager.load_public_key, Path(pubkey_path))
+
+    # Generation and deletion
+
+    async def generate_ssh_key(self, email: Optional[str] = None, passphrase: Optional[str] = "",
+                               overwrite: bool = False, key_name: Optional[str] = None,
+                               passphrase_source: Optional[PassphraseSource] = None,
+                               key_type: Optional[str] = None) -> Dict[str, any]:
+        """
+        Generate a key pair without any terminal interaction
+
+        Args:
+            email: Key comment; defaults to user@host
+            passphrase: Passphrase, or "" for an unprotected key. None uses passphrase_source.
+            overwrite: Replace an existing key of the same name
+            key_name: Key file name; defaults to id_ed25519 / id_rsa
+            passphrase_source: Passphrase string or callable used when passphrase is None
+            key_type: 'ed25519' or 'rsa'; None tries ed25519 and falls back to RSA like SSHManager
+
+        Returns:
+            The same result dict as SSHManager.generate_ssh_key
+        """
+        if passphrase is None:
+            passphrase = resolve_passphrase(passphrase_source) or ""
+        email = email or self.manager._default_email()
+        if shutil.which("ssh-keygen") is None:
+            raise SSHKeyError("ssh-keygen command not found. Please install OpenSSH.")
+
+        if key_type is not None:
+            return await self._generate_key_type(key_type, email, passphrase, overwrite, key_name)
+        try:
+            return await self._generate_key_type("ed25519", email, passphrase, overwrite, key_name)
+        except SSHKeyError as e:
+            # Only fall back to RSA if ed25519 is not supported, not if keys exist
+            if e.code in ("key_exists", "cancelled"):
+                raise
+            app_logger.warning(f"ed25519 generation failed: {e}; falling back to RSA key generation")
+            try:
+                return await self._generate_key_type("rsa", email, passphrase, overwrite, key_name)
+            except SSHKeyError as rsa_error:
+                raise SSHKeyError(f"Failed to generate both ed25519 and RSA keys: {rsa_error}", rsa_error.code)
+
+    async def _generate_key_type(self, key_type: str, email: str, passphrase: str, overwrite: bool,
+                                 key_name: Optional[str]) -> Dict[str, any]:
+        manager = self.manager
+        try:
+            private_path, public_path = manager._key_paths(key_type, key_name)
+            cmd, run_kwargs = manager._keygen_command(key_type, email, private_path, passphrase)
+            async with self._path_lock(private_path):
+                replaced = await self._in_thread(manager._prepare_key_destination, private_path, public_path,
+                                                 overwrite)
+                pooled = await self._in_thread(manager._claim_pooled_key, key_type, private_path, email,
+                                               passphrase, overwrite)
+                if not pooled:
+                    await self._run(cmd, timeout=KEYGEN_TIMEOUT, check=True, **run_kwargs)
+                await self._in_thread(manager._finalize_key_files, private_path, public_path)
+                await self._add_key_to_agent(private_path, key_type, passphrase)
+                return await self._in_thread(manager._generated_key_result, key_type, email, private_path,
+                                             public_path, replaced)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            raise manager._keygen_failure(e, key_type)
+
+    async def generate_ssh_keys(self, requests: List[Dict[str, any]]) -> List[Dict[str, any]]:
+        """
+        Generate many keys concurrently (one dict of generate_ssh_key arguments per key)
+
+        Returns:
+            One result per request, in order; failures have 'success' False, 'error' and 'code'
+        """
+        results = await asyncio.gather(*(self.generate_ssh_key(**request) for request in requests),
+                                       return_exceptions=True)
+        for index, result in enumerate(results):
+            if isinstance(result, SSHKeyError):
+                results[index] = {"success": False, "key_name": requests[index].get("key_name"),
+                                  "error": str(result), "code": result.code}
+            elif isinstance(result, BaseException):
+                raise result
+        failed = [result for result in results if not result.get("success")]
+        app_logger.info(f"Async key generation finished: {len(results) - len(failed)}/{len(results)} succeeded")
+        if failed:
+            app_logger.warning(f"Async key generation failures by cause: "
+                               f"{summarize(result.get('code') or 'unknown_error' for result in failed)}")
+        return results
+
+    async def delete_ssh_key(self, private_key_path: Path, public_key_path: Path):
+        """Delete a key pair (taking a backup first when backups are enabled)"""
+        private_key_path = Path(private_key_path)
+        async with self._path_lock(private_key_path):
+            await self._in_thread(self.manager.delete_ssh_key, private_key_path, Path(public_key_path))
+
+    # Agent
+
+    async def add_key_to_agent(self, private_key_path: Path,
+                               passphrase_source: Optional[PassphraseSource] = None) -> bool:
+        """Load an existing private key into ssh-agent. Returns True if the key was added."""
+        return await self._add_key_to_agent(Path(private_key_path), "SSH", resolve_passphrase(passphrase_source))
+
+    async def _add_key_to_agent(self, private_key_path: Path, key_type: str, passphrase: Optional[str]) -> bool:
+        manager = self.manager
+        if platform.system() == "Windows":
+            # Managing the Windows agent service goes through PowerShell; reuse the blocking path
+            return await self._in_thread(manager._add_key_to_agent, private_key_path, key_type, passphrase)
+        try:
+            if not os.environ.get("SSH_AUTH_SOCK"):
+                def ensure_agent() -> bool:
+                    with manager._agent_lock:
+                        return manager._ensure_unix_agent()
+                if not await self._in_thread(ensure_agent):
+                    return False
+
+            cmd, run_kwargs = manager._agent_add_command(private_key_path, passphrase)
+            result = await self._run(cmd, timeout=AGENT_TIMEOUT, **run_kwargs)
+            if result.returncode != 0:
+                diagnosis = classify(result.stderr + result.stdout, "ssh-add", result.returncode)
+                app_logger.warning(f"Could not add key to ssh-agent: {describe(diagnosis)}")
+                return False
+
+            app_logger.info(f"Successfully added {key_type} key to ssh-agent")
+            manager.events.publish(AGENT_LOADED, private_path=str(private_key_path), key_type=key_type)
+            if platform.system() == "Darwin":
+                keychain_result = await self._run(["ssh-add", "--apple-use-keychain", str(private_key_path)],
+                                                  timeout=AGENT_TIMEOUT, **run_kwargs)
+                if keychain_result.returncode != 0:
+                    app_logger.info("Could not add key to macOS keychain (normal if no passphrase)")
+            return True
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            app_logger.warning(f"Could not add key to ssh-agent: {e}")
+            return False
+
+    # Connection tests
+
+    async def test_github_connection(self, host: str = "git@github.com",
+                                     reuse_connection: bool = True) -> Dict[str, any]:
+        """Test SSH authentication against host; same result dict as SSHManager.test_github_connection"""
+        manager = self.manager
+        try:
+            # Starting a ControlMaster waits for the handshake, so it runs off the event loop
+            cmd = await self._in_thread(manager._connection_test_command, host, reuse_connection)
+            completed = await self._run(cmd, timeout=CONNECT_TIMEOUT)
+            result = manager._classify_connection_output(completed.returncode,
+                                                          completed.stderr or completed.stdout or "")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            result = manager._connection_test_failure(e)
+        manager._publish_test_result(host, result)
+        return result
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Diagnostics benchmark for SSH GitHub Configurator
+Checks and times the OpenSSH output classifier against a corpus of recorded tool output
+
+Usage:
+    python benchmarks/bench_diagnostics.py [--rounds 2000] [--repeat 5] [--corpus ssh_output_corpus.json]
+
+Every corpus entry is classified once and compared with its expected code and
+fields before timing; any mismatch is reported and the script exits with 1.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CORPUS = Path(__file__).resolve().parent / "ssh_output_corpus.json"
+
+sys.path.insert(0, str(PROJECT_DIR))
+
+from ssh_diagnostics import classify, summarize  # noqa: E402
+
+
+def load_corpus(path: Path) -> list:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def check_corpus(corpus: list) -> list:
+    """Return (entry, diagnosis) for entries whose classification differs from the recording"""
+    mismatches = []
+    for entry in corpus:
+        diagnosis = classify(entry["output"], entry["tool"], entry["returncode"])
+        expected_fields = entry.get("fields", {})
+        fields = {name: diagnosis.fields.get(name) for name in expected_fields}
+        missing_codes = set(entry.get("codes", ())) - set(diagnosis.codes)
+        if diagnosis.code != entry["code"] or fields != expected_fields or missing_codes:
+            mismatches.append((entry, diagnosis))
+    return mismatches
+
+
+def measure(func, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"median": statistics.median(timings), "min": min(timings), "max": max(timings)}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check and benchmark the OpenSSH output classifier")
+    parser.add_argument("--corpus", type=Path, default=DEFAULT_CORPUS, help="Recorded outputs JSON")
+    parser.add_argument("--rounds", type=int, default=2000, help="Passes over the corpus per run")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs")
+    args = parser.parse_args(argv)
+
+    corpus = load_corpus(args.corpus)
+    mismatches = check_corpus(corpus)
+    if mismatches:
+        print(f"{len(mismatches)} corpus entr(ies) misclassified:")
+        for entry, diagnosis in mismatches:
+            print(f"  [{entry['tool']}] expected {entry['code']} {entry.get('fields', {})}, "
+                  f"got {diagnosis.code} {diagnosis.fields}: {entry['output'][:80]!r}")
+        return 1
+    print(f"Corpus OK: {len(corpus)} recorded outputs, codes {summarize(entry['code'] for entry in corpus)}")
+
+    samples = [(entry["output"], entry["tool"], entry["returncode"]) for entry in corpus]
+    total = len(samples) * args.rounds
+    result = measure(lambda: [classify(output, tool, returncode)
+                              for _ in range(args.rounds) for output, tool, returncode in samples], args.repeat)
+    print(f"  classify[x{total}]: {result['median'] * 1000:.2f} ms "
+          f"({result['median'] / total * 1e6:.2f} us per output)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for SSH GitHub Configurator
+Times SSHManager operations against synthetic key stores and stub OpenSSH tools
+
+Usage:
+    python benchmarks/bench_ssh_manager.py [--sizes 10,1000,100000] [--output results.json]
+                                           [--baseline baseline.json] [--save-baseline baseline.json]
+
+HOME is pointed at a temporary directory and stub ssh-keygen/ssh-add/ssh/ssh-agent
+binaries are put first on PATH, so the real key store is never touched.
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+DEFAULT_SIZES = [10, 1000, 100000]
+DEFAULT_THRESHOLD = 0.25
+
+# Seconds a refill command holds the key pool's runner during the claim check
+REFILL_BLOCK_SECONDS = 0.5
+
+# Slowest acceptable key pool claim while a refill is running (it must not queue behind the refill)
+CLAIM_DURING_REFILL_BUDGET = 0.25
+
+STUB_KEYGEN = """#!/bin/sh
+out=""
+comment=""
+while [ $# -gt 0 ]; do
+    case "$1" in
+        -f) out="$2"; shift ;;
+        -C) comment="$2"; shift ;;
+    esac
+    shift
+done
+printf 'stub private key\\n' > "$out"
+printf 'ssh-ed25519 AAAAC3NzaC1lZDI1NTE5AAAAIStubKeyStubKeyStubKeyStubKeyStubKeyStubKey %s\\n' "$comment" > "$out.pub"
+echo "Your identification has been saved in $out"
+"""
+
+STUB_SSH_ADD = """#!/bin/sh
+echo "Identity added: $1" >&2
+"""
+
+STUB_SSH = """#!/bin/sh
+echo "Hi benchmark! You've successfully authenticated, but GitHub does not provide shell access." >&2
+exit 1
+"""
+
+STUB_SSH_AGENT = """#!/bin/sh
+echo "SSH_AUTH_SOCK=/tmp/stub-agent.sock; export SSH_AUTH_SOCK;"
+echo "SSH_AGENT_PID=1; export SSH_AGENT_PID;"
+"""
+
+# Recorded 'ssh -T' outputs used for the classification benchmark
+CONNECTION_CORPUS = [
+    (1, "Hi octocat! You've successfully authenticated, but GitHub does not provide shell access."),
+    (255, "git@github.com: Permission denied (publickey)."),
+    (255, "ssh: Could not resolve hostname github.com: Name or service not known"),
+    (255, "ssh: connect to host github.com port 22: Connection timed out"),
+    (255, "ssh: connect to host github.com port 22: Connection refused"),
+    (255, "Warning: Identity file /home/user/.ssh/missing not accessible: No such file or directory."),
+    (255, "sign_and_send_pubkey: signing failed: agent refused operation\nAgent admitted failure to sign using the key."),
+    (255, "kex_exchange_identification: read: Connection reset by peer"),
+    (0, ""),
+]
+
+
+def setup_environment(workdir: Path) -> Path:
+    """Create a temporary HOME and stub binaries, and point the environment at them"""
+    home = workdir / "home"
+    bin_dir = workdir / "bin"
+    (home / ".ssh").mkdir(parents=True, mode=0o700)
+    bin_dir.mkdir()
+
+    for name, content in [("ssh-keygen", STUB_KEYGEN), ("ssh-add", STUB_SSH_ADD),
+                          ("ssh", STUB_SSH), ("ssh-agent", STUB_SSH_AGENT)]:
+        stub = bin_dir / name
+        stub.write_text(content)
+        stub.chmod(0o755)
+
+    os.environ["HOME"] = str(home)
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}"
+    os.environ["SSH_AUTH_SOCK"] = str(workdir / "agent.sock")
+    return home
+
+
+def populate_key_store(ssh_dir: Path, count: int):
+    """Write count synthetic key pairs into ssh_dir, replacing previous contents"""
+    for entry in ssh_dir.iterdir():
+        if entry.is_dir():
+            shutil.rmtree(entry)
+        else:
+            entry.unlink()
+
+    key_types = ["ssh-ed25519", "ssh-rsa", "ecdsa-sha2-nistp256"]
+    for i in range(count):
+        name = f"bench_key_{i:06d}"
+        (ssh_dir / name).write_text("stub private key\n")
+        (ssh_dir / f"{name}.pub").write_text(f"{key_types[i % 3]} AAAAB3NzaC1yc2EAAAADAQABAAAB{i:08d} bench{i}@example.com\n")
+    (ssh_dir / "known_hosts").write_text("")
+    (ssh_dir / "config").write_text("")
+
+
+def measure(func, repeat: int, setup=None) -> dict:
+    """Run func repeat times (calling setup before each run) and summarise the timings"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return {
+        "runs": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+def run_benchmarks(sizes, repeat: int) -> dict:
+    """Run the full suite and return the results dictionary"""
+    # Imported late so the logger and SSHManager pick up the temporary HOME
+    sys.path.insert(0, str(PROJECT_DIR))
+    import logging
+    import threading
+    from logger import app_logger
+    from ssh_manager import SSHManager
+    from key_pool import KeyPool
+
+    for handler in app_logger.logger.handlers:
+        if isinstance(handler, logging.StreamHandler) and not isinstance(handler, logging.FileHandler):
+            handler.setLevel(logging.CRITICAL)
+
+    manager = SSHManager()
+    results = {}
+
+    for size in sizes:
+        populate_key_store(manager.ssh_dir, size)
+        runs = repeat if size < 10000 else max(1, repeat // 5)
+        # Cold scans drop the inventory cache first; warm scans reuse it
+        results[f"find_all_ssh_keys_cold[{size}]"] = measure(manager.find_all_ssh_keys, runs,
+                                                             setup=manager.inventory.invalidate)
+        results[f"find_all_ssh_keys_warm[{size}]"] = measure(manager.find_all_ssh_keys, runs)
+        for name in (f"find_all_ssh_keys_cold[{size}]", f"find_all_ssh_keys_warm[{size}]"):
+            print(f"  {name}: {results[name]['median'] * 1000:.2f} ms")
+
+    populate_key_store(manager.ssh_dir, 10)
+
+    results["generate_ssh_key"] = measure(
+        lambda: manager.generate_ssh_key(email="bench@example.com", passphrase="", overwrite=True, key_name="bench_generated"),
+        repeat
+    )
+
+    delete_private = manager.ssh_dir / "bench_delete"
+    delete_public = manager.ssh_dir / "bench_delete.pub"
+
+    def create_pair():
+        delete_private.write_text("stub private key\n")
+        delete_public.write_text("ssh-ed25519 AAAA bench@example.com\n")
+
+    results["delete_ssh_key"] = measure(lambda: manager.delete_ssh_key(delete_private, delete_public), repeat, setup=create_pair)
+
+    results["add_key_to_agent"] = measure(
+        lambda: manager._add_key_to_agent(manager.ssh_dir / "bench_generated", "ed25519"), repeat
+    )
+
+    results["test_github_connection"] = measure(manager.test_github_connection, repeat)
+
+    # A claim must not wait for a refill that is holding the pool's own runner
+    pool = KeyPool(manager.ssh_dir.parent / ".bench_pool", sizes={"ed25519": 1})
+    refills = []
+
+    def start_refill():
+        deadline = time.monotonic() + 10
+        while not pool.available("ed25519") and time.monotonic() < deadline:
+            time.sleep(0.01)
+        refill = threading.Thread(target=pool.runner.run, args=(["sleep", str(REFILL_BLOCK_SECONDS)],))
+        refill.start()
+        refills.append(refill)
+        time.sleep(0.05)
+
+    pool.refill()
+    results["key_pool_claim_during_refill"] = measure(
+        lambda: pool.claim("ed25519", manager.ssh_dir / "bench_pooled", "bench@example.com", overwrite=True),
+        max(1, repeat // 2), setup=start_refill
+    )
+    for refill in refills:
+        refill.join()
+    pool.close()
+
+    classify_rounds = 1000
+    results[f"classify_connection_output[x{classify_rounds * len(CONNECTION_CORPUS)}]"] = measure(
+        lambda: [manager._classify_connection_output(code, output)
+                 for _ in range(classify_rounds) for code, output in CONNECTION_CORPUS],
+        max(1, repeat // 2)
+    )
+
+    for name, result in results.items():
+        if not name.startswith("find_all_ssh_keys"):
+            print(f"  {name}: {result['median'] * 1000:.2f} ms")
+
+    return results
+
+
+def compare_with_baseline(results: dict, baseline: dict, threshold: float) -> list:
+    """Return (name, baseline median, current median, ratio) for benchmarks slower than threshold allows"""
+    regressions = []
+    for name, base in baseline.get("results", {}).items():
+        current = results.get(name)
+        if not current or base["median"] <= 0:
+            continue
+        ratio = current["median"] / base["median"]
+        if ratio > 1 + threshold:
+            regressions.append((name, base["median"], current["median"], ratio))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark SSHManager operations")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated key store sizes to scan")
+    parser.add_argument("--repeat", type=int, default=10, help="Runs per benchmark")
+    parser.add_argument("--output", type=Path, help="Write results JSON to this file")
+    parser.add_argument("--baseline", type=Path, help="Compare against a stored results JSON")
+    parser.add_argument("--save-baseline", type=Path, help="Store these results as a new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown versus baseline before failing (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+
+    with tempfile.TemporaryDirectory(prefix="ssh_bench_") as workdir:
+        setup_environment(Path(workdir))
+        print(f"Running SSHManager benchmarks (sizes: {sizes}, repeat: {args.repeat})")
+        results = run_benchmarks(sizes, args.repeat)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "sizes": sizes,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            path.write_text(json.dumps(report, indent=2))
+            print(f"Results written to {path}")
+
+    claim = results["key_pool_claim_during_refill"]
+    if claim["max"] > CLAIM_DURING_REFILL_BUDGET:
+        print(f"Key pool claim took {claim['max'] * 1000:.2f} ms during a refill "
+              f"(budget {CLAIM_DURING_REFILL_BUDGET * 1000:.0f} ms)")
+        return 1
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text())
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print(f"Regressions against {args.baseline}:")
+            for name, base, current, ratio in regressions:
+                print(f"  {name}: {base * 1000:.2f} ms -> {current * 1000:.2f} ms ({ratio:.2f}x)")
+            return 1
+        print(f"No regressions against {args.baseline}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Daemon module for SSH GitHub Configurator
+Optional background service that keeps the key inventory, tool probes and connection results warm
+
+Usage:
+    python daemon.py start            # run in the foreground until stopped
+    python daemon.py status | stop
+    python daemon.py call METHOD [JSON_PARAMS]
+"""
+
+import argparse
+import inspect
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from logger import app_logger
+from key_record import KeyRecord
+
+
+# JSON-RPC 2.0 error codes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+# Seconds connection test results are served from cache
+CONNECTION_CACHE_TTL = 60
+
+# Seconds between watcher passes that keep the inventory cache warm
+WATCH_INTERVAL = 2.0
+
+# How long a client waits for the daemon before falling back to in-process mode
+CONNECT_TIMEOUT = 0.2
+
+SUPPORTED = hasattr(socket, "AF_UNIX") and hasattr(socketserver, "ThreadingUnixStreamServer")
+
+
+def default_socket_path() -> Path:
+    """Per-user socket location in a private directory"""
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base and os.path.isdir(base):
+        directory = Path(base) / "ssh-github-configurator"
+    else:
+        directory = Path.home() / ".ssh_github_configurator_run"
+    return directory / "daemon.sock"
+
+
+def _jsonable(value):
+    if isinstance(value, KeyRecord):
+        return value.to_dict()
+    if isinstance(value, Path):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    return value
+
+
+class ConfiguratorService:
+    """
+    The operations offered to clients, with their caches
+
+    Used directly in-process, or served over the daemon socket. Both paths
+    return the same JSON-compatible results.
+    """
+
+    def __init__(self, ssh_manager=None):
+        if ssh_manager is None:
+            from ssh_manager import SSHManager
+            ssh_manager = SSHManager()
+        self.ssh_manager = ssh_manager
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._tool_cache: Dict[str, bool] = {}
+        self._connection_cache: Dict[str, tuple] = {}
+        self.methods: Dict[str, Callable] = {
+            "ping": self.ping,
+            "list_keys": self.list_keys,
+            "invalidate": self.invalidate,
+            "check_command": self.check_command,
+            "test_connection": self.test_connection,
+            "verify_keys": self.verify_keys,
+        }
+
+    def call(self, method: str, **params):
+        handler = self.methods.get(method)
+        if handler is None:
+            raise KeyError(method)
+        return _jsonable(handler(**params))
+
+    def ping(self) -> Dict[str, any]:
+        return {'pid': os.getpid(), 'uptime': time.time() - self.started}
+
+    def list_keys(self):
+        return self.ssh_manager.find_all_ssh_keys()
+
+    def invalidate(self, path: Optional[str] = None) -> bool:
+        self.ssh_manager.inventory.invalidate(Path(path) if path else None)
+        with self._lock:
+            self._connection_cache.clear()
+        # Key changes made by the client never reach this process's event bus, so masters
+        # authenticated with the old key must be dropped here
+        self.ssh_manager.close_connections()
+        return True
+
+    def check_command(self, command: str) -> bool:
+        with self._lock:
+            if command in self._tool_cache:
+                return self._tool_cache[command]
+        available = self.ssh_manager.check_command_availability(command)
+        with self._lock:
+            self._tool_cache[command] = available
+        return available
+
+    def test_connection(self, host: str = "git@github.com", refresh: bool = False) -> Dict[str, any]:
+        with self._lock:
+            cached = self._connection_cache.get(host)
+        if cached and not refresh and time.monotonic() - cached[0] < CONNECTION_CACHE_TTL:
+            return dict(cached[1], cached=True)
+        result = self.ssh_manager.test_github_connection(host)
+        with self._lock:
+            self._connection_cache[host] = (time.monotonic(), result)
+        return dict(result, cached=False)
+
+    def verify_keys(self):
+        return self.ssh_manager.verify_key_pairs()
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Newline-delimited JSON-RPC 2.0; a client may send many requests per connection"""
+
+    def handle(self):
+        for raw in self.rfile:
+            if not raw.strip():
+                continue
+            response = self.server.daemon.dispatch(raw)
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class ConfiguratorDaemon:
+    """Serves a ConfiguratorService on a Unix domain socket"""
+
+    def __init__(self, service: Optional[ConfiguratorService] = None, socket_path: Optional[Path] = None):
+        if not SUPPORTED:
+            raise OSError("Unix domain sockets are not available on this platform")
+        self.service = service or ConfiguratorService()
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.service.methods["shutdown"] = self._request_shutdown
+        self._server = None
+        self._stop = threading.Event()
+
+    def dispatch(self, raw: bytes) -> Dict[str, any]:
+        try:
+            request = json.loads(raw)
+        except ValueError:
+            return {'jsonrpc': "2.0", 'id': None, 'error': {'code': PARSE_ERROR, 'message': "Parse error"}}
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return {'jsonrpc': "2.0", 'id': None, 'error': {'code': INVALID_REQUEST, 'message': "Invalid request"}}
+
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params")
+        if params is None:
+            params = {}
+        handler = self.service.methods.get(method)
+        if handler is None:
+            error = {'code': METHOD_NOT_FOUND, 'message': f"Unknown method: {method}"}
+        elif not isinstance(params, dict):
+            # Handlers only take keyword arguments
+            error = {'code': INVALID_PARAMS, 'message': "Invalid params: expected an object"}
+        else:
+            try:
+                # Check the arguments first so a TypeError inside the handler stays an internal error
+                inspect.signature(handler).bind(**params)
+            except TypeError as e:
+                error = {'code': INVALID_PARAMS, 'message': f"Invalid params: {e}"}
+            else:
+                try:
+                    result = self.service.call(method, **params)
+                    return {'jsonrpc': "2.0", 'id': request_id, 'result': result}
+                except Exception as e:
+                    app_logger.error(f"Daemon request {method} failed: {e}", exc_info=True)
+                    error = {'code': INTERNAL_ERROR, 'message': str(e)}
+        return {'jsonrpc': "2.0", 'id': request_id, 'error': error}
+
+    def _watch(self):
+        """Keep the inventory cache warm so list_keys answers from memory"""
+        ssh_manager = self.service.ssh_manager
+        while not self._stop.wait(WATCH_INTERVAL):
+            try:
+                # Straight to the inventory: unchanged roots are served from its cache without logging
+                for _ in ssh_manager.inventory.iter_keys(timeout=ssh_manager.scan_timeout):
+                    pass
+            except Exception as e:
+                app_logger.debug(f"Daemon watcher pass failed: {e}")
+
+    def _request_shutdown(self) -> bool:
+        threading.Thread(target=self.shutdown, daemon=True).start()
+        return True
+
+    def serve_forever(self):
+        self.socket_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.chmod(self.socket_path.parent, 0o700)
+        if self.socket_path.exists():
+            if DaemonClient(self.socket_path).is_running():
+                raise OSError(f"A daemon is already listening on {self.socket_path}")
+            self.socket_path.unlink()
+
+        self._server = socketserver.ThreadingUnixStreamServer(str(self.socket_path), _RequestHandler)
+        self._server.daemon_threads = True
+        self._server.daemon = self
+        os.chmod(self.socket_path, 0o600)
+
+        self.service.ssh_manager.find_all_ssh_keys()
+        threading.Thread(target=self._watch, name="daemon-watch", daemon=True).start()
+        app_logger.info(f"Daemon listening on {self.socket_path}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._stop.set()
+            self._server.server_close()
+            try:
+                self.socket_path.unlink()
+            except FileNotFoundError:
+                pass
+            app_logger.info("Daemon stopped")
+
+    def shutdown(self):
+        self._stop.set()
+        if self._server is not None:
+            self._server.shutdown()
+
+
+class DaemonError(Exception):
+    """Raised when the daemon returns a JSON-RPC error"""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+class DaemonClient:
+    """Client for a running daemon, reusing one socket connection"""
+
+    def __init__(self, socket_path: Optional[Path] = None, timeout: float = 120.0):
+        self.socket_path = Path(socket_path) if socket_path else default_socket_path()
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._file = None
+        self._next_id = 0
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(self.socket_path))
+        except OSError:
+            sock.close()
+            raise
+        sock.settimeout(self.timeout)
+        self._sock = sock
+        self._file = sock.makefile("rwb")
+
+    def is_running(self) -> bool:
+        if not SUPPORTED or not self.socket_path.exists():
+            return False
+        try:
+            self.call("ping")
+            return True
+        except (OSError, ValueError, DaemonError):
+            self.close()
+            return False
+
+    def call(self, method: str, **params):
+        with self._lock:
+            if self._sock is None:
+                self._connect()
+            self._next_id += 1
+            request = {'jsonrpc': "2.0", 'id': self._next_id, 'method': method, 'params': params}
+            try:
+                self._file.write(json.dumps(request).encode("utf-8") + b"\n")
+                self._file.flush()
+                line = self._file.readline()
+            except OSError:
+                self._close_locked()
+                raise
+            if not line:
+                self._close_locked()
+                raise ConnectionError("Daemon closed the connection")
+        response = json.loads(line)
+        if "error" in response:
+            raise DaemonError(response['error']['code'], response['error']['message'])
+        return response['result']
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self):
+        if self._file is not None:
+            self._file.close()
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._file = None
+
+
+def connect_service(ssh_manager=None, socket_path: Optional[Path] = None):
+    """
+    Return a client for the running daemon, or an in-process service if none is running
+
+    Both expose call(method, **params) with identical results.
+    """
+    client = DaemonClient(socket_path)
+    if client.is_running():
+        app_logger.info(f"Using daemon at {client.socket_path}")
+        return client
+    return ConfiguratorService(ssh_manager)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="SSH GitHub Configurator background service")
+    parser.add_argument("command", choices=["start", "stop", "status", "call"])
+    parser.add_argument("method", nargs="?", help="Method for 'call'")
+    parser.add_argument("params", nargs="?", default="{}", help="JSON object of parameters for 'call'")
+    parser.add_argument("--socket", type=Path, help="Socket path")
+    args = parser.parse_args(argv)
+
+    if args.command == "start":
+        ConfiguratorDaemon(socket_path=args.socket).serve_forever()
+        return 0
+
+    client = DaemonClient(args.socket)
+    if args.command == "status":
+        running = client.is_running()
+        print(json.dumps(client.call("ping") if running else {'running': False}))
+        return 0 if running else 1
+    if args.command == "stop":
+        if not client.is_running():
+            print("Daemon is not running")
+            return 1
+        client.call("shutdown")
+        return 0
+
+    try:
+        params = json.loads(args.params)
+        if not isinstance(params, dict):
+            raise ValueError("Parameters must be a JSON object")
+        service = connect_service(socket_path=args.socket)
+        result = service.call(args.method, **params)
+    except KeyError as e:
+        message = f"Unknown method: {args.method}" if e.args == (args.method,) else f"Missing key {e}"
+        print(f"Error: {message}", file=sys.stderr)
+        return 1
+    except (DaemonError, ValueError, TypeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
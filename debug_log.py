@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Debug log module for SSH GitHub Configurator
+Bounded, thread-safe message buffer backing the UI debug panel
+"""
+
+import logging
+import threading
+from collections import deque
+from typing import List, Tuple
+
+
+# Level names offered by the debug panel filter, in increasing severity
+LEVEL_NAMES = ["DEBUG", "INFO", "WARNING", "ERROR"]
+
+
+def level_value(level) -> int:
+    """Convert a level name (or number) into a logging level number"""
+    if isinstance(level, int):
+        return level
+    name = str(level).upper()
+    return logging.getLevelName(name) if name in LEVEL_NAMES else logging.INFO
+
+
+class DebugLogBuffer:
+    """
+    Ring buffer of debug messages with a line cap
+
+    Messages are appended from any thread. New entries are also collected in a
+    pending list so the UI can render them in a single batched insert.
+    """
+
+    def __init__(self, max_lines: int = 2000):
+        self.max_lines = max_lines
+        self._lines = deque(maxlen=max_lines)
+        self._pending: List[Tuple[int, str]] = []
+        self._lock = threading.Lock()
+
+    def append(self, message: str, level="INFO") -> bool:
+        """
+        Add a message to the buffer
+
+        Returns:
+            True if this is the first pending message since the last drain,
+            meaning the caller should schedule a flush
+        """
+        entry = (level_value(level), message)
+        with self._lock:
+            self._lines.append(entry)
+            self._pending.append(entry)
+            # Pending entries beyond the cap would be trimmed on render anyway
+            if len(self._pending) > self.max_lines:
+                del self._pending[:-self.max_lines]
+            return len(self._pending) == 1
+
+    def drain_pending(self, min_level: int = logging.DEBUG) -> List[str]:
+        """Return and clear messages added since the last drain, filtered by level"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        return [message for level, message in pending if level >= min_level]
+
+    def lines(self, min_level: int = logging.DEBUG) -> List[str]:
+        """Return all buffered messages at or above the given level"""
+        with self._lock:
+            return [message for level, message in self._lines if level >= min_level]
+
+    def clear(self):
+        with self._lock:
+            self._lines.clear()
+            self._pending.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._lines)
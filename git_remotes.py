@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+"""
+Git remotes module for SSH GitHub Configurator
+Scans a workspace for git repositories and switches their HTTPS remotes to SSH
+
+Usage:
+    python git_remotes.py WORKSPACE [--rewrite] [--dry-run] [--alias HOST_ALIAS] [--workers N]
+"""
+
+import argparse
+import errno
+import fnmatch
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from logger import app_logger
+
+
+# Hosts whose HTTPS remotes are rewritten by default
+DEFAULT_HOSTS = ("github.com",)
+
+# Directories never descended into while looking for repositories
+SKIP_DIRS = {"node_modules", "__pycache__", ".venv", "venv", ".tox", ".cache"}
+
+SECTION_RE = re.compile(r'^\s*\[\s*([A-Za-z0-9.-]+)(?:\s+"((?:[^"\\]|\\.)*)")?\s*\]')
+HTTPS_URL_RE = re.compile(r"^https?://(?:[^@/]+@)?([^/:]+)(?::\d+)?/(.+?)/?$")
+SCP_URL_RE = re.compile(r"^(?:([^@/:]+)@)?([^/:]+):(?!//)(.+)$")
+SSH_URL_RE = re.compile(r"^ssh://(?:([^@/]+)@)?([^/:]+)(?::\d+)?/(.+)$")
+USERINFO_RE = re.compile(r"^([A-Za-z][A-Za-z0-9+.-]*://)([^@/]+)@")
+
+
+def _find_git_config(repo: Path) -> Optional[Path]:
+    """Locate the config file for a work tree, following .git files of worktrees and submodules"""
+    git_path = repo / ".git"
+    if git_path.is_dir():
+        return git_path / "config"
+    try:
+        with open(git_path, "r", encoding="utf-8") as f:
+            line = f.readline().strip()
+    except OSError:
+        return None
+    if not line.startswith("gitdir:"):
+        return None
+    git_dir = Path(line[len("gitdir:"):].strip())
+    if not git_dir.is_absolute():
+        git_dir = (repo / git_dir).resolve()
+    commondir = git_dir / "commondir"
+    if commondir.is_file():
+        git_dir = (git_dir / commondir.read_text(encoding="utf-8").strip()).resolve()
+    return git_dir / "config"
+
+
+def _scan_directory(directory: str, follow_nested: bool) -> Tuple[Optional[str], List[str]]:
+    """Return (directory if it is a work tree, subdirectories to scan next)"""
+    subdirs = []
+    is_repo = False
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name == ".git":
+                    is_repo = True
+                elif entry.is_dir(follow_symlinks=False) and not entry.name.startswith(".") \
+                        and entry.name not in SKIP_DIRS:
+                    subdirs.append(entry.path)
+    except OSError as e:
+        app_logger.debug(f"Cannot scan {directory}: {e}")
+    if is_repo and not follow_nested:
+        subdirs = []
+    return (directory if is_repo else None), subdirs
+
+
+def find_repositories(workspace: Path, max_workers: int = 8, follow_nested: bool = False) -> Iterator[Path]:
+    """
+    Walk a workspace breadth-first in parallel, yielding git work trees
+
+    Args:
+        workspace: Root directory to search
+        max_workers: Threads listing directories concurrently
+        follow_nested: Also look for repositories inside repositories
+    """
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="repo-scan") as executor:
+        level = [str(workspace)]
+        while level:
+            next_level = []
+            for repo, subdirs in executor.map(lambda d: _scan_directory(d, follow_nested), level):
+                if repo:
+                    yield Path(repo)
+                next_level.extend(subdirs)
+            level = next_level
+
+
+def _strip_value(value: str) -> str:
+    """Remove an inline comment and surrounding quotes from a git config value"""
+    out = []
+    in_quotes = False
+    escaped = False
+    for char in value:
+        if escaped:
+            out.append(char)
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            in_quotes = not in_quotes
+        elif char in "#;" and not in_quotes:
+            break
+        else:
+            out.append(char)
+    return "".join(out).strip()
+
+
+def parse_remotes(config_path: Path) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Read the [remote "..."] sections of a git config file without running git
+
+    Returns:
+        {remote name: {'url': [...], 'pushurl': [...]}}
+    """
+    remotes: Dict[str, Dict[str, List[str]]] = {}
+    current = None
+    with open(config_path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            section = SECTION_RE.match(line)
+            if section:
+                current = section.group(2) if section.group(1).lower() == "remote" else None
+                if current is not None:
+                    remotes.setdefault(current, {'url': [], 'pushurl': []})
+                continue
+            if current is None or "=" not in line:
+                continue
+            key, value = line.split("=", 1)
+            key = key.strip().lower()
+            if key in ("url", "pushurl"):
+                remotes[current][key].append(_strip_value(value))
+    return remotes
+
+
+def load_ssh_config(path: Optional[Path] = None) -> List[Tuple[List[str], Dict[str, str]]]:
+    """Parse Host blocks of an ssh_config file into (patterns, lower-cased options)"""
+    path = Path(path) if path else Path.home() / ".ssh" / "config"
+    blocks: List[Tuple[List[str], Dict[str, str]]] = []
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                parts = re.split(r"\s*=\s*|\s+", line, maxsplit=1)
+                if len(parts) != 2:
+                    continue
+                key, value = parts[0].lower(), parts[1].strip().strip('"')
+                if key == "host":
+                    blocks.append((value.split(), {}))
+                elif key == "match":
+                    blocks.append(([], {}))
+                elif blocks:
+                    blocks[-1][1].setdefault(key, value)
+                else:
+                    blocks.append((["*"], {key: value}))
+    except OSError:
+        pass
+    return blocks
+
+
+def resolve_ssh_host(alias: str, ssh_config: List[Tuple[List[str], Dict[str, str]]]) -> Dict[str, str]:
+    """Effective ssh options for a host alias (first value wins, as in ssh)"""
+    options: Dict[str, str] = {}
+    for patterns, block in ssh_config:
+        positive = [p for p in patterns if not p.startswith("!")]
+        negated = [p[1:] for p in patterns if p.startswith("!")]
+        if any(fnmatch.fnmatch(alias, p) for p in negated):
+            continue
+        if any(fnmatch.fnmatch(alias, p) for p in positive):
+            for key, value in block.items():
+                options.setdefault(key, value)
+    return options
+
+
+def classify_url(url: str) -> Dict[str, Optional[str]]:
+    """Split a remote URL into protocol, host and repository path"""
+    match = HTTPS_URL_RE.match(url)
+    if match:
+        return {'protocol': "https", 'user': None, 'host': match.group(1), 'path': match.group(2)}
+    match = SSH_URL_RE.match(url) or (SCP_URL_RE.match(url) if "://" not in url else None)
+    if match:
+        return {'protocol': "ssh", 'user': match.group(1), 'host': match.group(2), 'path': match.group(3)}
+    protocol = url.split("://", 1)[0] if "://" in url else "local"
+    return {'protocol': protocol, 'user': None, 'host': None, 'path': None}
+
+
+def redact_url(url: str) -> str:
+    """URL with credentials in its userinfo (e.g. an HTTPS access token) masked, for reports and logs"""
+    match = USERINFO_RE.match(url)
+    # A bare ssh:// user name such as 'git' is not a secret
+    if match is None or (match.group(1).lower() == "ssh://" and ":" not in match.group(2)):
+        return url
+    return f"{match.group(1)}***@{url[match.end():]}"
+
+
+def https_to_ssh(url: str, hosts: Sequence[str] = DEFAULT_HOSTS, alias: Optional[str] = None) -> Optional[str]:
+    """
+    SSH form of an HTTPS remote URL, or None if it should not be rewritten
+
+    Args:
+        hosts: Hosts whose HTTPS remotes are rewritten
+        alias: ssh_config Host alias to use instead of the real host name
+    """
+    info = classify_url(url)
+    if info['protocol'] != "https" or info['host'] not in hosts:
+        return None
+    path = info['path']
+    if not path.endswith(".git"):
+        path += ".git"
+    return f"git@{alias or info['host']}:{path}"
+
+
+def scan_repository(repo: Path, ssh_config: List[Tuple[List[str], Dict[str, str]]]) -> List[Dict]:
+    """Report every remote URL of one repository"""
+    config_path = _find_git_config(repo)
+    if config_path is None or not config_path.is_file():
+        return []
+    try:
+        remotes = parse_remotes(config_path)
+    except OSError as e:
+        app_logger.warning(f"Cannot read {config_path}: {e}")
+        return []
+
+    records = []
+    for name, urls in remotes.items():
+        for kind in ("url", "pushurl"):
+            for url in urls[kind]:
+                info = classify_url(url)
+                record = {'repo': str(repo), 'config': str(config_path), 'remote': name, 'kind': kind,
+                          'url': url, 'protocol': info['protocol'], 'host': info['host'],
+                          'hostname': None, 'identity_file': None}
+                if info['protocol'] == "ssh" and info['host']:
+                    options = resolve_ssh_host(info['host'], ssh_config)
+                    record['hostname'] = options.get("hostname", info['host'])
+                    record['identity_file'] = options.get("identityfile")
+                records.append(record)
+    return records
+
+
+def scan_workspace(workspace: Path, max_workers: int = 8, ssh_config_path: Optional[Path] = None) -> List[Dict]:
+    """
+    Find repositories under workspace and report their remotes, parsing configs in parallel
+
+    Records keep each 'url' verbatim for rewrite_remotes(); pass it through redact_url() before display.
+    """
+    ssh_config = load_ssh_config(ssh_config_path)
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="remote-scan") as executor:
+        futures = [executor.submit(scan_repository, repo, ssh_config)
+                   for repo in find_repositories(Path(workspace), max_workers)]
+        records = [record for future in futures for record in future.result()]
+    app_logger.info(f"Scanned {len(futures)} repositories under {workspace}: {len(records)} remote URL(s)")
+    return records
+
+
+def _value_span(line: str, start: int) -> Tuple[int, int]:
+    """Start and end of the value after '=' in a config line, excluding whitespace and inline comments"""
+    end = len(line.rstrip("\r\n"))
+    while start < end and line[start] in " \t":
+        start += 1
+    in_quotes = escaped = False
+    last = start
+    for index in range(start, end):
+        char = line[index]
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            in_quotes = not in_quotes
+        elif char in "#;" and not in_quotes:
+            break
+        if char not in " \t":
+            last = index + 1
+    return start, last
+
+
+def _quote_value(value: str, quoted: bool) -> str:
+    """Format a config value, quoting it when the original was quoted or it needs quotes"""
+    if not quoted and not any(char in value for char in '#;"\\') and value == value.strip():
+        return value
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _rewrite_config(config_path: Path, changes: Dict[Tuple[str, str, str], str]):
+    """
+    Replace specific (remote, key, old url) values in a git config file
+
+    Follows git's own locking: the new contents are written to config.lock,
+    created exclusively, and renamed over config, so concurrent git commands
+    either wait for us or fail instead of losing writes. Only the value part of
+    each changed line is replaced, keeping indentation, quoting and comments.
+    """
+    lock_path = config_path.with_name(config_path.name + ".lock")
+    mode = os.stat(config_path).st_mode & 0o777
+    try:
+        fd = os.open(lock_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, mode)
+    except FileExistsError:
+        raise OSError(errno.EEXIST, "Another git process is changing this config", str(lock_path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            with open(config_path, "r", encoding="utf-8", errors="replace", newline="") as source:
+                lines = source.readlines()
+
+            current = None
+            for index, line in enumerate(lines):
+                section = SECTION_RE.match(line)
+                if section:
+                    current = section.group(2) if section.group(1).lower() == "remote" else None
+                    continue
+                if current is None or "=" not in line:
+                    continue
+                key, value = line.split("=", 1)
+                new_url = changes.get((current, key.strip().lower(), _strip_value(value)))
+                if new_url is not None:
+                    start, end = _value_span(line, len(key) + 1)
+                    quoted = line[start:end].startswith('"')
+                    lines[index] = line[:start] + _quote_value(new_url, quoted) + line[end:]
+
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(lock_path, config_path)
+    except BaseException:
+        try:
+            os.unlink(lock_path)
+        except OSError:
+            pass
+        raise
+
+
+def rewrite_remotes(records: Sequence[Dict], dry_run: bool = True, hosts: Sequence[str] = DEFAULT_HOSTS,
+                    alias: Optional[str] = None) -> List[Dict]:
+    """
+    Rewrite HTTPS remotes from scan_workspace() to SSH
+
+    Args:
+        records: Remote records from scan_workspace()
+        dry_run: Only report the planned changes
+        hosts: Hosts whose HTTPS remotes are rewritten
+        alias: ssh_config Host alias to put in the new URLs (e.g. 'github-work')
+
+    Returns:
+        One dict per rewritten URL with 'repo', 'remote', 'kind', 'old_url',
+        'new_url' and 'status' (planned/rewritten/failed)
+    """
+    by_config: Dict[str, List[Tuple[Dict, str]]] = {}
+    seen = set()
+    for record in records:
+        new_url = https_to_ssh(record['url'], hosts, alias)
+        # Worktrees share their main repository's config, so the same URL can be reported twice
+        identity = (record['config'], record['remote'], record['kind'], record['url'])
+        if new_url and identity not in seen:
+            seen.add(identity)
+            by_config.setdefault(record['config'], []).append((record, new_url))
+
+    results = []
+    for config, items in by_config.items():
+        status, error = "planned", None
+        if not dry_run:
+            try:
+                _rewrite_config(Path(config), {(r['remote'], r['kind'], r['url']): new for r, new in items})
+                status = "rewritten"
+            except OSError as e:
+                status, error = "failed", str(e)
+                app_logger.error(f"Failed to rewrite remotes in {config}: {e}")
+        for record, new_url in items:
+            results.append({'repo': record['repo'], 'remote': record['remote'], 'kind': record['kind'],
+                            'old_url': redact_url(record['url']), 'new_url': new_url, 'status': status,
+                            'error': error})
+
+    app_logger.info(f"{'Planned' if dry_run else 'Applied'} {len(results)} remote rewrite(s)")
+    return results
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Report git remotes in a workspace and switch HTTPS remotes to SSH")
+    parser.add_argument("workspace", type=Path, help="Directory containing git repositories")
+    parser.add_argument("--rewrite", action="store_true", help="Rewrite HTTPS remotes to SSH")
+    parser.add_argument("--dry-run", action="store_true", help="With --rewrite, only show what would change")
+    parser.add_argument("--host", action="append", dest="hosts", help="Host to rewrite (default: github.com)")
+    parser.add_argument("--alias", help="ssh_config Host alias to use in rewritten URLs")
+    parser.add_argument("--workers", type=int, default=8, help="Number of scanner threads")
+    args = parser.parse_args(argv)
+
+    records = scan_workspace(args.workspace, args.workers)
+    if args.rewrite:
+        results = rewrite_remotes(records, dry_run=args.dry_run, hosts=args.hosts or DEFAULT_HOSTS, alias=args.alias)
+        for result in results:
+            print(json.dumps(result))
+        return 1 if any(result['status'] == "failed" for result in results) else 0
+
+    for record in records:
+        print(json.dumps({**record, 'url': redact_url(record['url'])}))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
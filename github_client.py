@@ -0,0 +1,403 @@
+#!/usr/bin/env python3
+"""
+GitHub client module for SSH GitHub Configurator
+Uploads public keys to GitHub (/user/keys and repository deploy keys) over pooled connections
+"""
+
+import atexit
+import email.utils
+import http.client
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from logger import app_logger
+from key_export import iter_public_keys, github_payload
+from key_record import KeyRecord
+
+
+DEFAULT_API_URL = "https://api.github.com"
+# Environment variables for the token and an alternative API URL (e.g. the github_stub server)
+TOKEN_ENV_VAR = "GITHUB_TOKEN"
+API_URL_ENV_VAR = "GITHUB_API_URL"
+API_VERSION = "2022-11-28"
+REQUEST_TIMEOUT = 30
+MAX_RETRIES = 3
+# Longest rate-limit pause (seconds) waited out before giving up with a rate_limited result
+MAX_RATE_LIMIT_WAIT = 60
+
+
+class GitHubAPIError(Exception):
+    """Raised when the GitHub API returns an error"""
+
+    def __init__(self, message: str, status: Optional[int] = None, body=None):
+        super().__init__(message)
+        self.status = status
+        self.body = body
+
+
+class GitHubRateLimitError(GitHubAPIError):
+    """Raised when the rate limit would need a longer wait than MAX_RATE_LIMIT_WAIT"""
+
+    def __init__(self, message: str, reset: float, status: Optional[int] = None):
+        super().__init__(message, status)
+        self.reset = reset
+
+
+class GitHubCancelledError(Exception):
+    """Raised when a request is cancelled while waiting out a rate limit"""
+    pass
+
+
+class ConnectionPool:
+    """A fixed-size pool of keep-alive HTTP(S) connections to one host"""
+
+    def __init__(self, base_url: str, size: int = 4, timeout: float = REQUEST_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme
+        self.host = parts.hostname
+        self.port = parts.port
+        self.base_path = parts.path.rstrip("/")
+        self.timeout = timeout
+        self._connections = queue.LifoQueue()
+        for _ in range(size):
+            self._connections.put(None)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        if self.scheme == "https":
+            return http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout)
+        return http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+
+    def request(self, method: str, path: str, body: Optional[bytes] = None,
+                headers: Optional[Dict[str, str]] = None) -> Tuple[int, Dict[str, str], bytes]:
+        """Send a request on a pooled connection, reconnecting once if it went stale"""
+        connection = self._connections.get()
+        try:
+            for attempt in range(2):
+                if connection is None:
+                    connection = self._connect()
+                try:
+                    connection.request(method, self.base_path + path, body=body, headers=headers or {})
+                    response = connection.getresponse()
+                    data = response.read()
+                    response_headers = {name.lower(): value for name, value in response.getheaders()}
+                    if response_headers.get("connection", "").lower() == "close":
+                        connection.close()
+                        connection = None
+                    return response.status, response_headers, data
+                except (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+                        BrokenPipeError, ConnectionResetError):
+                    connection.close()
+                    connection = None
+                    if attempt:
+                        raise
+        except Exception:
+            if connection is not None:
+                connection.close()
+                connection = None
+            raise
+        finally:
+            self._connections.put(connection)
+
+    def close(self):
+        """Close idle connections; their slots stay in the pool and reconnect on next use"""
+        drained = 0
+        while True:
+            try:
+                connection = self._connections.get_nowait()
+            except queue.Empty:
+                break
+            drained += 1
+            if connection is not None:
+                connection.close()
+        for _ in range(drained):
+            self._connections.put(None)
+
+
+class GitHubClient:
+    """Client for GitHub's SSH key endpoints with ETag caching and rate-limit handling"""
+
+    def __init__(self, token: str, base_url: str = DEFAULT_API_URL, max_connections: int = 4):
+        self.token = token
+        self.max_connections = max_connections
+        self.pool = ConnectionPool(base_url, size=max_connections)
+        self._etag_cache: Dict[str, Tuple[str, List[Dict]]] = {}
+        self._rate_lock = threading.Lock()
+        self._rate_remaining: Optional[int] = None
+        self._rate_reset: float = 0.0
+
+    def close(self):
+        self.pool.close()
+
+    def _headers(self) -> Dict[str, str]:
+        return {
+            "Authorization": f"Bearer {self.token}",
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": API_VERSION,
+            "User-Agent": "ssh-github-configurator",
+        }
+
+    def _wait_for_rate_limit(self, cancel_event: Optional[threading.Event] = None):
+        """Pause while the remaining request budget is too low for the current concurrency"""
+        with self._rate_lock:
+            remaining, reset = self._rate_remaining, self._rate_reset
+        if remaining is not None and remaining < self.max_connections:
+            delay = reset - time.time()
+            if delay > 0:
+                app_logger.warning(f"GitHub rate limit nearly exhausted; resets in {delay:.0f}s")
+                self._pause(delay, cancel_event)
+
+    @staticmethod
+    def _pause(delay: float, cancel_event: Optional[threading.Event] = None):
+        """Sleep for a rate limit, unless it is too long or the caller cancels"""
+        if delay > MAX_RATE_LIMIT_WAIT:
+            raise GitHubRateLimitError(f"GitHub rate limit resets in {delay:.0f}s", time.time() + delay)
+        if (cancel_event or threading.Event()).wait(delay):
+            raise GitHubCancelledError("GitHub request cancelled")
+
+    def _update_rate_limit(self, headers: Dict[str, str]):
+        try:
+            remaining = int(headers["x-ratelimit-remaining"])
+            reset = float(headers.get("x-ratelimit-reset", 0))
+        except (KeyError, ValueError):
+            return
+        with self._rate_lock:
+            self._rate_remaining = remaining
+            self._rate_reset = reset
+
+    def request(self, method: str, path: str, payload=None,
+                extra_headers: Optional[Dict[str, str]] = None,
+                cancel_event: Optional[threading.Event] = None) -> Tuple[int, Dict[str, str], object]:
+        """
+        Send an API request, retrying on secondary rate limits
+
+        Returns:
+            (status, lower-cased headers, decoded JSON body or None)
+
+        Raises:
+            GitHubRateLimitError: If the limit resets later than MAX_RATE_LIMIT_WAIT from now
+            GitHubCancelledError: If cancel_event is set while waiting for the limit
+        """
+        headers = self._headers()
+        if extra_headers:
+            headers.update(extra_headers)
+        body = None
+        if payload is not None:
+            body = json.dumps(payload).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+
+        for attempt in range(MAX_RETRIES + 1):
+            self._wait_for_rate_limit(cancel_event)
+            status, response_headers, data = self.pool.request(method, path, body, headers)
+            self._update_rate_limit(response_headers)
+
+            limited = status == 429 or (status == 403 and (
+                response_headers.get("x-ratelimit-remaining") == "0" or "retry-after" in response_headers))
+            if limited and attempt < MAX_RETRIES:
+                delay = _retry_delay(response_headers)
+                app_logger.warning(f"GitHub rate limited {method} {path}; retrying in {delay:.0f}s")
+                self._pause(delay, cancel_event)
+                continue
+
+            return status, response_headers, _decode_body(data)
+
+        raise GitHubAPIError(f"GitHub request {method} {path} kept being rate limited", status)
+
+    def _list(self, path: str, cancel_event: Optional[threading.Event] = None) -> List[Dict]:
+        """GET a paginated list, using a cached ETag to skip unchanged first pages"""
+        items: List[Dict] = []
+        page = 1
+        while True:
+            page_path = f"{path}?per_page=100&page={page}"
+            cached = self._etag_cache.get(page_path)
+            extra = {"If-None-Match": cached[0]} if cached else None
+            status, headers, body = self.request("GET", page_path, extra_headers=extra, cancel_event=cancel_event)
+
+            if status == 304 and cached:
+                page_items = cached[1]
+            elif status == 200 and isinstance(body, (list, type(None))):
+                page_items = body or []
+                if headers.get("etag"):
+                    self._etag_cache[page_path] = (headers["etag"], page_items)
+            else:
+                raise GitHubAPIError(f"Failed to list {path}: HTTP {status}", status, body)
+
+            items.extend(page_items)
+            if len(page_items) < 100 or 'rel="next"' not in headers.get("link", ""):
+                return items
+            page += 1
+
+    def list_user_keys(self, cancel_event: Optional[threading.Event] = None) -> List[Dict]:
+        """List the authenticated user's SSH keys"""
+        return self._list("/user/keys", cancel_event)
+
+    def list_deploy_keys(self, owner: str, repo: str, cancel_event: Optional[threading.Event] = None) -> List[Dict]:
+        """List a repository's deploy keys"""
+        return self._list(f"/repos/{owner}/{repo}/keys", cancel_event)
+
+    def add_user_key(self, title: str, key: str, cancel_event: Optional[threading.Event] = None) -> Dict:
+        """Register a public key on the authenticated user's account"""
+        return self._create("/user/keys", {"title": title, "key": key}, cancel_event)
+
+    def add_deploy_key(self, owner: str, repo: str, title: str, key: str, read_only: bool = True,
+                       cancel_event: Optional[threading.Event] = None) -> Dict:
+        """Register a public key as a repository deploy key"""
+        return self._create(f"/repos/{owner}/{repo}/keys", {"title": title, "key": key, "read_only": read_only},
+                            cancel_event)
+
+    def _create(self, path: str, payload: Dict, cancel_event: Optional[threading.Event] = None) -> Dict:
+        status, _, body = self.request("POST", path, payload, cancel_event=cancel_event)
+        if status == 201:
+            return body
+        message = body.get("message", "") if isinstance(body, dict) else ""
+        raise GitHubAPIError(f"Failed to add key '{payload['title']}': HTTP {status} {message}".strip(), status, body)
+
+    def upload_keys(self, keys: Iterable[Dict], repo: Optional[str] = None, read_only: bool = True,
+                    cancel_event: Optional[threading.Event] = None) -> List[Dict]:
+        """
+        Upload many public keys concurrently, skipping keys GitHub already has
+
+        Args:
+            keys: Dicts with 'title' and 'key' (e.g. key_export 'github' payloads)
+            repo: 'owner/name' to upload deploy keys instead of user keys
+            read_only: Deploy key access level
+            cancel_event: Stops the upload, including any wait for the rate limit, when set
+
+        Returns:
+            One result per key with 'title', 'status' (uploaded/exists/failed/rate_limited/cancelled)
+            and 'error'
+
+        Raises:
+            GitHubRateLimitError, GitHubCancelledError: While listing the registered keys
+        """
+        owner, name = repo.split("/", 1) if repo else (None, None)
+        existing = self.list_deploy_keys(owner, name, cancel_event) if repo else self.list_user_keys(cancel_event)
+        registered = {_key_blob(item.get("key", "")) for item in existing}
+
+        results: List[Dict] = []
+        to_upload: List[Tuple[int, Dict]] = []
+        for key in keys:
+            blob = _key_blob(key["key"])
+            if blob in registered:
+                results.append({'title': key['title'], 'status': 'exists', 'error': None})
+            else:
+                registered.add(blob)
+                results.append(None)
+                to_upload.append((len(results) - 1, key))
+
+        def upload(item: Tuple[int, Dict]) -> Tuple[int, Dict]:
+            index, key = item
+            try:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise GitHubCancelledError("GitHub request cancelled")
+                if repo:
+                    self.add_deploy_key(owner, name, key["title"], key["key"], read_only, cancel_event)
+                else:
+                    self.add_user_key(key["title"], key["key"], cancel_event)
+                return index, {'title': key['title'], 'status': 'uploaded', 'error': None}
+            except GitHubRateLimitError as e:
+                return index, {'title': key['title'], 'status': 'rate_limited', 'error': str(e)}
+            except GitHubCancelledError as e:
+                return index, {'title': key['title'], 'status': 'cancelled', 'error': str(e)}
+            except GitHubAPIError as e:
+                if e.status == 422 and "already" in str(e.body).lower():
+                    return index, {'title': key['title'], 'status': 'exists', 'error': None}
+                return index, {'title': key['title'], 'status': 'failed', 'error': str(e)}
+            except (OSError, ValueError, http.client.HTTPException) as e:
+                # Network failures, truncated responses and malformed headers only fail this key
+                return index, {'title': key['title'], 'status': 'failed', 'error': str(e) or type(e).__name__}
+
+        with ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="github-upload") as executor:
+            for index, result in executor.map(upload, to_upload):
+                results[index] = result
+
+        uploaded = sum(1 for result in results if result['status'] == 'uploaded')
+        app_logger.info(f"GitHub upload finished: {uploaded} uploaded, {len(results) - uploaded} skipped or failed")
+        return results
+
+
+# One client per (token, API URL), so connections and cached ETags outlive a single upload
+_clients: Dict[Tuple[str, str], GitHubClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(token: str, base_url: Optional[str] = None) -> GitHubClient:
+    """Shared GitHubClient for a token and API URL (default: $GITHUB_API_URL or api.github.com)"""
+    base_url = base_url or os.environ.get(API_URL_ENV_VAR, DEFAULT_API_URL)
+    with _clients_lock:
+        client = _clients.get((token, base_url))
+        if client is None:
+            client = _clients[(token, base_url)] = GitHubClient(token, base_url)
+        return client
+
+
+def close_clients():
+    """Close the pooled connections of every shared client"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+atexit.register(close_clients)
+
+
+def upload_public_keys(key_records: Iterable[KeyRecord], token: str, repo: Optional[str] = None,
+                       base_url: Optional[str] = None, read_only: bool = True,
+                       cancel_event: Optional[threading.Event] = None) -> List[Dict]:
+    """
+    Upload the public keys of inventory entries to GitHub
+
+    Args:
+        key_records: Inventory records whose public keys are uploaded
+        token: GitHub token with the admin:public_key (or repo) scope
+        repo: 'owner/name' to register deploy keys instead of account keys
+        base_url: API URL; defaults to $GITHUB_API_URL or api.github.com
+        cancel_event: Stops the upload when set
+
+    Returns:
+        Per-key results from GitHubClient.upload_keys
+    """
+    client = get_client(token, base_url)
+    payloads = [github_payload(record) for record in iter_public_keys(key_records)]
+    return client.upload_keys(payloads, repo=repo, read_only=read_only, cancel_event=cancel_event)
+
+
+def _retry_delay(headers: Dict[str, str]) -> float:
+    """Seconds to wait after a rate-limited response (Retry-After may be seconds or an HTTP date)"""
+    retry_after = headers.get("retry-after")
+    if retry_after is not None:
+        try:
+            return max(0.0, float(retry_after))
+        except ValueError:
+            pass
+        try:
+            return max(0.0, email.utils.parsedate_to_datetime(retry_after).timestamp() - time.time())
+        except (TypeError, ValueError):
+            pass
+    try:
+        reset = float(headers.get("x-ratelimit-reset", time.time() + 1))
+    except ValueError:
+        reset = time.time() + 1
+    return max(1.0, reset - time.time())
+
+
+def _decode_body(data: bytes):
+    """JSON body, or the raw text when it is not JSON (e.g. an HTML error page from a proxy)"""
+    if not data:
+        return None
+    try:
+        return json.loads(data)
+    except ValueError:
+        return data.decode("utf-8", errors="replace")
+
+
+def _key_blob(key: str) -> str:
+    parts = key.split()
+    return parts[1] if len(parts) > 1 else key
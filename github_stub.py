@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+GitHub API stand-in module for SSH GitHub Configurator
+Local HTTP server implementing the SSH key endpoints, for exercising GitHubClient offline
+
+Usage:
+    python github_stub.py [--port 8765] [--token TOKEN] [--rate-limit N]
+"""
+
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+
+USER_KEYS_PATH = re.compile(r"^/user/keys$")
+DEPLOY_KEYS_PATH = re.compile(r"^/repos/([^/]+)/([^/]+)/keys$")
+
+
+class GitHubStubState:
+    """In-memory key store shared by all request handlers"""
+
+    def __init__(self, token: Optional[str] = None, rate_limit: int = 5000, rate_window: float = 3600.0):
+        self.token = token
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.lock = threading.Lock()
+        self.collections: Dict[str, List[Dict]] = {}
+        self.next_id = 1
+        self.requests = 0
+        self.connections = 0
+        self._window_start = time.time()
+        self._window_used = 0
+
+    def consume_rate_limit(self) -> Tuple[int, int]:
+        """Count one request against the window, returning (remaining, reset epoch)"""
+        with self.lock:
+            now = time.time()
+            if now - self._window_start >= self.rate_window:
+                self._window_start = now
+                self._window_used = 0
+            self._window_used += 1
+            self.requests += 1
+            remaining = self.rate_limit - self._window_used
+            return remaining, int(self._window_start + self.rate_window)
+
+    def list_keys(self, collection: str) -> List[Dict]:
+        with self.lock:
+            return list(self.collections.get(collection, []))
+
+    def add_key(self, collection: str, title: str, key: str, read_only: Optional[bool]) -> Tuple[int, Dict]:
+        blob = key.split()[1] if len(key.split()) > 1 else None
+        if not title or not blob or not key.startswith(("ssh-", "ecdsa-", "sk-")):
+            return 422, {"message": "Validation Failed", "errors": [{"field": "key", "code": "custom",
+                                                                      "message": "key is invalid"}]}
+        with self.lock:
+            keys = self.collections.setdefault(collection, [])
+            if any(item["key"].split()[1] == blob for item in keys):
+                return 422, {"message": "Validation Failed", "errors": [{"field": "key", "code": "custom",
+                                                                          "message": "key is already in use"}]}
+            item = {"id": self.next_id, "key": " ".join(key.split()[:2]), "title": title,
+                    "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "verified": True}
+            if read_only is not None:
+                item["read_only"] = read_only
+            self.next_id += 1
+            keys.append(item)
+            return 201, item
+
+
+class GitHubStubHandler(BaseHTTPRequestHandler):
+    """Handles GET/POST on /user/keys and /repos/{owner}/{repo}/keys"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "GitHubStub/1.0"
+
+    def setup(self):
+        super().setup()
+        with self.server.state.lock:
+            self.server.state.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, body=None, headers: Optional[Dict[str, str]] = None):
+        data = json.dumps(body).encode("utf-8") if body is not None else b""
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if data:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _route(self) -> Optional[Tuple[str, bool]]:
+        """Return (collection name, is deploy keys) for the request path"""
+        path = urlsplit(self.path).path
+        if USER_KEYS_PATH.match(path):
+            return "user", False
+        match = DEPLOY_KEYS_PATH.match(path)
+        if match:
+            return f"repo:{match.group(1)}/{match.group(2)}", True
+        return None
+
+    def _preamble(self) -> Optional[Dict[str, str]]:
+        """Authenticate and apply rate limiting; returns headers, or None once an error was sent"""
+        state = self.server.state
+        remaining, reset = state.consume_rate_limit()
+        headers = {
+            "X-RateLimit-Limit": str(state.rate_limit),
+            "X-RateLimit-Remaining": str(max(remaining, 0)),
+            "X-RateLimit-Reset": str(reset),
+        }
+        if state.token and self.headers.get("Authorization") not in (f"Bearer {state.token}", f"token {state.token}"):
+            self._send_json(401, {"message": "Bad credentials"}, headers)
+            return None
+        if remaining < 0:
+            self._send_json(403, {"message": "API rate limit exceeded"}, headers)
+            return None
+        return headers
+
+    def do_GET(self):
+        headers = self._preamble()
+        if headers is None:
+            return
+        route = self._route()
+        if route is None:
+            self._send_json(404, {"message": "Not Found"}, headers)
+            return
+
+        query = parse_qs(urlsplit(self.path).query)
+        per_page = min(int(query.get("per_page", ["30"])[0]), 100)
+        page = max(int(query.get("page", ["1"])[0]), 1)
+        keys = self.server.state.list_keys(route[0])
+        body = keys[(page - 1) * per_page:page * per_page]
+
+        if page * per_page < len(keys):
+            base = urlsplit(self.path).path
+            headers["Link"] = f'<{base}?per_page={per_page}&page={page + 1}>; rel="next"'
+        etag = '"' + hashlib.sha1(json.dumps(body, sort_keys=True).encode("utf-8")).hexdigest() + '"'
+        headers["ETag"] = etag
+        if self.headers.get("If-None-Match") == etag:
+            self._send_json(304, None, headers)
+        else:
+            self._send_json(200, body, headers)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        headers = self._preamble()
+        if headers is None:
+            return
+        route = self._route()
+        if route is None:
+            self._send_json(404, {"message": "Not Found"}, headers)
+            return
+        try:
+            payload = json.loads(raw or b"{}")
+        except ValueError:
+            self._send_json(400, {"message": "Problems parsing JSON"}, headers)
+            return
+
+        collection, deploy = route
+        read_only = bool(payload.get("read_only", False)) if deploy else None
+        status, body = self.server.state.add_key(collection, payload.get("title", ""),
+                                                 payload.get("key", ""), read_only)
+        self._send_json(status, body, headers)
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, token: Optional[str] = None,
+                      rate_limit: int = 5000) -> Tuple[ThreadingHTTPServer, str]:
+    """
+    Start the stand-in server on a background thread
+
+    Returns:
+        (server, base URL to pass to GitHubClient); call server.shutdown() when done
+    """
+    server = ThreadingHTTPServer((host, port), GitHubStubHandler)
+    server.daemon_threads = True
+    server.state = GitHubStubState(token=token, rate_limit=rate_limit)
+    thread = threading.Thread(target=server.serve_forever, name="github-stub", daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run a local stand-in for GitHub's SSH key API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--token", help="Require this bearer token")
+    parser.add_argument("--rate-limit", type=int, default=5000, help="Requests allowed per hour")
+    args = parser.parse_args(argv)
+
+    server = ThreadingHTTPServer((args.host, args.port), GitHubStubHandler)
+    server.state = GitHubStubState(token=args.token, rate_limit=args.rate_limit)
+    print(f"GitHub stand-in listening on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Key audit module for SSH GitHub Configurator
+Inventories and lints the SSH keys of every user on a host using a process pool
+
+Usage:
+    python key_audit.py [--base /home] [--homes DIR ...] [--output report.jsonl] [--workers N]
+"""
+
+import argparse
+import base64
+import binascii
+import errno
+import json
+import os
+import stat
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+
+from key_inventory import KeyRoot, scan_key_root
+
+
+# Minimum acceptable RSA modulus size
+MIN_RSA_BITS = 2048
+
+# Public key algorithms considered weak
+WEAK_ALGORITHMS = {"ssh-dss"}
+
+SEVERITY_ORDER = {"info": 0, "warning": 1, "error": 2}
+
+# Files in users' homes are opened without following symlinks or blocking on FIFOs
+SAFE_OPEN_FLAGS = os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_NONBLOCK", 0)
+
+
+def key_bits(algorithm: str, blob: str) -> Optional[int]:
+    """
+    Return the key size in bits from a public key blob, or None if unknown
+
+    Args:
+        algorithm: Key algorithm from the public key line (e.g. 'ssh-rsa')
+        blob: Base64 key blob from the public key line
+    """
+    if algorithm in ("ssh-ed25519", "sk-ssh-ed25519@openssh.com"):
+        return 256
+    if algorithm.startswith("ecdsa-sha2-nistp"):
+        try:
+            return int(algorithm.rsplit("nistp", 1)[1])
+        except ValueError:
+            return None
+    if algorithm in ("ssh-rsa", "ssh-dss"):
+        try:
+            data = base64.b64decode(blob, validate=True)
+            offset = 0
+            fields = []
+            # ssh-rsa: string name, mpint e, mpint n / ssh-dss: string name, mpint p, ...
+            for _ in range(3):
+                (length,) = struct.unpack(">I", data[offset:offset + 4])
+                offset += 4
+                fields.append(data[offset:offset + length])
+                offset += length
+            modulus = fields[2] if algorithm == "ssh-rsa" else fields[1]
+            return int.from_bytes(modulus, "big").bit_length()
+        except (binascii.Error, struct.error, ValueError):
+            return None
+    return None
+
+
+def parse_public_key_line(line: str) -> Optional[Dict]:
+    """
+    Parse a public key or authorized_keys line into options, algorithm, blob and comment
+
+    Returns:
+        Dict with the parsed fields, or None for blank, comment and malformed lines
+    """
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+
+    # authorized_keys lines may start with options before the key algorithm
+    options = ""
+    rest = line
+    if not line.startswith(("ssh-", "ecdsa-", "sk-")):
+        options, rest = _split_options(line)
+
+    tokens = rest.split(None, 2)
+    if len(tokens) < 2:
+        return None
+    return {
+        'options': options,
+        'algorithm': tokens[0],
+        'blob': tokens[1],
+        'comment': tokens[2] if len(tokens) > 2 else "",
+    }
+
+
+def _split_options(line: str):
+    """Split leading authorized_keys options (which may contain quoted spaces) from the key"""
+    in_quotes = False
+    for index, char in enumerate(line):
+        if char == '"':
+            in_quotes = not in_quotes
+        elif char in " \t" and not in_quotes:
+            return line[:index], line[index:].strip()
+    return line, ""
+
+
+def _finding(severity: str, code: str, path, message: str) -> Dict:
+    return {'severity': severity, 'code': code, 'path': str(path), 'message': message}
+
+
+def _symlink_finding(path) -> Dict:
+    return _finding("warning", "symlink", path, "Symbolic link; not followed by the audit")
+
+
+def _check_mode(path: Path, forbidden: int, code: str, message: str, findings: List[Dict]) -> Optional[os.stat_result]:
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return None
+    if stat.S_ISLNK(st.st_mode):
+        findings.append(_symlink_finding(path))
+        return None
+    if st.st_mode & forbidden:
+        findings.append(_finding("error", code, path, f"{message} (mode {stat.S_IMODE(st.st_mode):o})"))
+    return st
+
+
+def _open_user_file(path: Path, findings: List[Dict]) -> Optional[TextIO]:
+    """
+    Open a file owned by the audited user, or return None with a finding
+
+    Symlinks could point the audit (running as root) at other users' files and
+    FIFOs would block the worker, so only regular files are read.
+    """
+    try:
+        fd = os.open(path, SAFE_OPEN_FLAGS)
+    except OSError as e:
+        if e.errno == errno.ELOOP:
+            findings.append(_symlink_finding(path))
+            return None
+        raise
+    try:
+        if not stat.S_ISREG(os.fstat(fd).st_mode):
+            findings.append(_finding("warning", "not_regular_file", path, "Not a regular file; skipped"))
+            os.close(fd)
+            return None
+        return os.fdopen(fd, "r", encoding="utf-8", errors="replace")
+    except Exception:
+        os.close(fd)
+        raise
+
+
+def audit_authorized_keys(path: Path, findings: List[Dict]) -> Dict:
+    """Lint an authorized_keys file, appending findings and returning a summary"""
+    summary = {'path': str(path), 'entries': 0, 'with_options': 0, 'algorithms': {}}
+    seen_blobs = set()
+    try:
+        f = _open_user_file(path, findings)
+        if f is None:
+            return summary
+        _check_mode(path, stat.S_IWGRP | stat.S_IWOTH, "authorized_keys_writable",
+                    "authorized_keys is writable by group or others", findings)
+        with f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip() or line.lstrip().startswith("#"):
+                    continue
+                entry = parse_public_key_line(line)
+                if entry is None:
+                    findings.append(_finding("warning", "authorized_keys_malformed", path,
+                                             f"Line {line_number} could not be parsed"))
+                    continue
+
+                summary['entries'] += 1
+                if entry['options']:
+                    summary['with_options'] += 1
+                algorithm = entry['algorithm']
+                summary['algorithms'][algorithm] = summary['algorithms'].get(algorithm, 0) + 1
+
+                if entry['blob'] in seen_blobs:
+                    findings.append(_finding("warning", "authorized_keys_duplicate", path,
+                                             f"Line {line_number} duplicates an earlier key"))
+                seen_blobs.add(entry['blob'])
+                _lint_key(algorithm, entry['blob'], f"{path}:{line_number}", findings)
+    except OSError as e:
+        findings.append(_finding("warning", "authorized_keys_unreadable", path, str(e)))
+    return summary
+
+
+def _lint_key(algorithm: str, blob: str, location: str, findings: List[Dict]):
+    if algorithm in WEAK_ALGORITHMS:
+        findings.append(_finding("error", "weak_algorithm", location, f"{algorithm} keys are deprecated"))
+    elif algorithm == "ssh-rsa":
+        bits = key_bits(algorithm, blob)
+        if bits is not None and bits < MIN_RSA_BITS:
+            findings.append(_finding("error", "weak_rsa_key", location, f"RSA key is only {bits} bits"))
+
+
+def audit_home(home: str) -> Dict:
+    """
+    Audit one user's home directory: key inventory, permissions and authorized_keys
+
+    Runs in a worker process, so it takes and returns plain picklable values.
+    """
+    started = time.perf_counter()
+    home_path = Path(home)
+    ssh_dir = home_path / ".ssh"
+    findings: List[Dict] = []
+    keys: List[Dict] = []
+    authorized = None
+
+    try:
+        ssh_dir_mode = os.lstat(ssh_dir).st_mode
+    except OSError:
+        ssh_dir_mode = 0
+    if stat.S_ISLNK(ssh_dir_mode):
+        findings.append(_symlink_finding(ssh_dir))
+    elif stat.S_ISDIR(ssh_dir_mode):
+        _check_mode(ssh_dir, stat.S_IRWXG | stat.S_IRWXO, "ssh_dir_permissions",
+                    ".ssh directory is accessible by group or others", findings)
+
+        try:
+            entries = scan_key_root(KeyRoot(ssh_dir))
+        except OSError as e:
+            entries = []
+            findings.append(_finding("warning", "ssh_dir_unreadable", ssh_dir, str(e)))
+
+        for entry in entries:
+            private_path = entry.private_path
+            public_path = entry.public_path
+            _check_mode(private_path, stat.S_IRWXG | stat.S_IRWXO, "private_key_permissions",
+                        "Private key is accessible by group or others", findings)
+            record = {'name': entry.name, 'type': entry.type, 'bits': None, 'comment': ""}
+            try:
+                f = _open_user_file(public_path, findings)
+                if f is None:
+                    # The inventory scan followed the link; do not report what it pointed at
+                    record['type'] = "unknown"
+                    keys.append(record)
+                    continue
+                with f:
+                    parsed = parse_public_key_line(f.readline())
+                if parsed:
+                    record['bits'] = key_bits(parsed['algorithm'], parsed['blob'])
+                    record['comment'] = parsed['comment']
+                    _lint_key(parsed['algorithm'], parsed['blob'], public_path, findings)
+            except OSError as e:
+                findings.append(_finding("warning", "public_key_unreadable", public_path, str(e)))
+            keys.append(record)
+
+        authorized_keys = ssh_dir / "authorized_keys"
+        if os.path.lexists(authorized_keys):
+            authorized = audit_authorized_keys(authorized_keys, findings)
+
+    return {
+        'user': home_path.name,
+        'home': str(home_path),
+        'has_ssh_dir': stat.S_ISDIR(ssh_dir_mode),
+        'keys': keys,
+        'authorized_keys': authorized,
+        'findings': findings,
+        'duration': time.perf_counter() - started,
+    }
+
+
+def enumerate_homes(base: str = "/home") -> List[str]:
+    """List the home directories directly under base"""
+    try:
+        with os.scandir(base) as it:
+            return sorted(entry.path for entry in it
+                          if entry.is_dir(follow_symlinks=False) and not entry.name.startswith("."))
+    except OSError:
+        return []
+
+
+def iter_audit(homes: Iterable[str], max_workers: Optional[int] = None) -> Iterator[Dict]:
+    """Audit homes in a process pool, yielding each report as soon as it is ready"""
+    homes = list(homes)
+    if not homes:
+        return
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(audit_home, home): home for home in homes}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                home = futures[future]
+                yield {
+                    'user': Path(home).name,
+                    'home': home,
+                    'has_ssh_dir': None,
+                    'keys': [],
+                    'authorized_keys': None,
+                    'findings': [_finding("error", "audit_failed", home, str(e))],
+                    'duration': 0.0,
+                }
+
+
+def run_audit(homes: Iterable[str], output: TextIO, max_workers: Optional[int] = None) -> Dict:
+    """
+    Audit homes and stream one JSON line per user to output, followed by a summary line
+
+    Returns:
+        The summary dictionary
+    """
+    started = time.perf_counter()
+    summary = {'record': 'summary', 'users': 0, 'keys': 0, 'authorized_keys_entries': 0,
+               'findings': {severity: 0 for severity in SEVERITY_ORDER}}
+
+    for report in iter_audit(homes, max_workers):
+        summary['users'] += 1
+        summary['keys'] += len(report['keys'])
+        if report['authorized_keys']:
+            summary['authorized_keys_entries'] += report['authorized_keys']['entries']
+        for finding in report['findings']:
+            summary['findings'][finding['severity']] += 1
+        output.write(json.dumps(dict(report, record='user')) + "\n")
+        output.flush()
+
+    summary['duration'] = time.perf_counter() - started
+    output.write(json.dumps(summary) + "\n")
+    output.flush()
+    return summary
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Audit SSH keys of all users on this host")
+    parser.add_argument("--base", default="/home", help="Directory containing user home directories")
+    parser.add_argument("--homes", nargs="*", help="Explicit home directories to audit (overrides --base)")
+    parser.add_argument("--output", type=Path, help="Write the JSON-lines report here instead of stdout")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    args = parser.parse_args(argv)
+
+    homes = args.homes if args.homes else enumerate_homes(args.base)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output:
+            summary = run_audit(homes, output, args.workers)
+    else:
+        summary = run_audit(homes, sys.stdout, args.workers)
+
+    return 1 if summary['findings']['error'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,554 @@
+#!/usr/bin/env python3
+"""
+Key backup module for SSH GitHub Configurator
+Incremental, content-addressed, encrypted snapshots of the key directories with point-in-time restore
+
+Usage:
+    python key_backup.py init [--archive DIR]
+    python key_backup.py backup [--archive DIR] [--label TEXT] [ROOT ...]
+    python key_backup.py list [--archive DIR]
+    python key_backup.py restore [--archive DIR] [--snapshot ID | --at 2026-10-18T21:00] [--key NAME ...] [--to DIR]
+    python key_backup.py prune [--archive DIR] --keep N
+
+The archive passphrase is always read from stdin.
+"""
+
+import argparse
+import base64
+import calendar
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from logger import app_logger
+from askpass import resolve_passphrase, stdin_passphrase, PassphraseSource
+from key_inventory import KeyRoot, iter_root_directories, CERT_SUFFIX
+from process_runner import ProcessRunner, CommandCancelledError, PROBE_TIMEOUT
+from ssh_diagnostics import summarize
+
+
+# Archive format version written to archive.json
+ARCHIVE_VERSION = 1
+
+# openssl enc cipher for every stored file
+CIPHER = "aes-256-cbc"
+
+# PBKDF2 iterations protecting the archive key with the user's passphrase (run once per unlock)
+WRAP_KDF_ITERATIONS = 600000
+
+# Environment variable carrying key material to openssl (never argv)
+KEY_ENV_VAR = "SSHGC_BACKUP_KEY"
+
+# Files changed this recently are re-hashed on the next backup instead of trusting their stat entry
+RACY_WINDOW_NS = 2 * 10**9
+
+# Restore statuses
+STATUS_RESTORED = "restored"
+STATUS_UNCHANGED = "unchanged"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+ARCHIVE_FILE = "archive.json"
+STAT_CACHE_FILE = "statcache.bin"
+SNAPSHOT_SUFFIX = ".snap"
+_TAG_SIZE = hashlib.sha256().digest_size
+
+
+def default_archive_dir() -> Path:
+    """Archive location used when none is given, outside the key directory it protects"""
+    return Path.home() / ".ssh_github_configurator_backups"
+
+
+class BackupError(Exception):
+    """Raised when the archive cannot be opened, written or read"""
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+
+
+def _snapshot_time(snapshot_id: str) -> float:
+    """Creation time encoded in a snapshot id (YYYYmmddTHHMMSS.mmmZ-xxxxxx)"""
+    stamp = snapshot_id.split("-", 1)[0]
+    seconds, millis = stamp.rstrip("Z").split(".")
+    return calendar.timegm(time.strptime(seconds, "%Y%m%dT%H%M%S")) + int(millis) / 1000
+
+
+class KeyBackup:
+    """
+    Encrypted, deduplicating archive of key files
+
+    Layout: <archive>/archive.json (the random archive key, wrapped with the
+    passphrase), objects/<ab>/<id> (one encrypted file per distinct content;
+    the id is an HMAC of the content, so equal files are stored once and the
+    names reveal nothing), snapshots/<id>.snap (encrypted manifest listing
+    every file of the snapshot) and statcache.bin (encrypted stat cache).
+
+    A backup stats every file in the key roots and only reads and hashes the
+    ones whose size, mtime, ctime or inode differ from the stat cache; only
+    content not already in the archive is encrypted and written. Every
+    manifest is complete, so restoring any point in time reads one manifest
+    and the objects it needs. Encryption runs 'openssl enc' on a dedicated
+    process runner with the key passed in the environment; every file carries
+    an HMAC that is checked after decryption.
+    """
+
+    def __init__(self, archive_dir: Optional[Path] = None, passphrase_source: Optional[PassphraseSource] = None,
+                 max_workers: Optional[int] = None):
+        self.archive_dir = Path(archive_dir or default_archive_dir())
+        self.passphrase_source = passphrase_source
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.runner = ProcessRunner(max_concurrent=self.max_workers)
+        self._lock = threading.RLock()
+        self._data_key: Optional[bytes] = None
+        self._mac_key: Optional[bytes] = None
+        self._stat_cache: Optional[Dict[str, list]] = None
+        self._last_files: Optional[Dict[str, Dict[str, any]]] = None
+
+    @classmethod
+    def create(cls, archive_dir: Optional[Path] = None, passphrase: Optional[str] = None,
+               max_workers: Optional[int] = None) -> "KeyBackup":
+        """Initialise a new archive (refusing to reuse an existing one)"""
+        if not passphrase:
+            raise BackupError("A passphrase is required to create a backup archive", "passphrase_required")
+        backup = cls(archive_dir, passphrase, max_workers)
+        if (backup.archive_dir / ARCHIVE_FILE).exists():
+            raise BackupError(f"Backup archive already exists: {backup.archive_dir}", "archive_exists")
+        for directory in (backup.archive_dir, backup.archive_dir / "objects", backup.archive_dir / "snapshots"):
+            directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+
+        data_key = secrets.token_bytes(32)
+        backup._set_key(data_key)
+        wrapped = backup._openssl(["-iter", str(WRAP_KDF_ITERATIONS)], base64.b64encode(data_key).decode(),
+                                  passphrase)
+        header = {'version': ARCHIVE_VERSION, 'cipher': CIPHER, 'kdf_iterations': WRAP_KDF_ITERATIONS,
+                  'wrapped_key': wrapped, 'key_check': backup._mac(b"key-check").hex()}
+        backup._write_atomic(backup.archive_dir / ARCHIVE_FILE, json.dumps(header, indent=2).encode())
+        app_logger.info(f"Created key backup archive {backup.archive_dir}")
+        return backup
+
+    @property
+    def exists(self) -> bool:
+        return (self.archive_dir / ARCHIVE_FILE).is_file()
+
+    def unlock(self):
+        """Unwrap the archive key with the passphrase (once per instance)"""
+        with self._lock:
+            if self._data_key is not None:
+                return
+            try:
+                header = json.loads((self.archive_dir / ARCHIVE_FILE).read_text(encoding="utf-8"))
+            except FileNotFoundError:
+                raise BackupError(f"No backup archive at {self.archive_dir}", "archive_not_found")
+            if header.get('version') != ARCHIVE_VERSION or header.get('cipher') != CIPHER:
+                raise BackupError(f"Unsupported backup archive format in {self.archive_dir}", "archive_format")
+            passphrase = resolve_passphrase(self.passphrase_source)
+            if not passphrase:
+                raise BackupError("The backup archive passphrase is required", "passphrase_required")
+
+            try:
+                data_key = base64.b64decode(self._openssl(["-d", "-iter", str(header['kdf_iterations'])],
+                                                          header['wrapped_key'], passphrase))
+            except (BackupError, ValueError):
+                data_key = b""
+            self._set_key(data_key)
+            if len(data_key) != 32 or not hmac.compare_digest(self._mac(b"key-check").hex(), header['key_check']):
+                self._data_key = self._mac_key = None
+                raise BackupError("Wrong passphrase for the backup archive", "bad_passphrase")
+
+    def _set_key(self, data_key: bytes):
+        self._data_key = data_key
+        self._mac_key = hmac.new(data_key, b"sshgc-backup-mac", hashlib.sha256).digest()
+
+    def _mac(self, data: bytes) -> bytes:
+        return hmac.new(self._mac_key, data, hashlib.sha256).digest()
+
+    def _openssl(self, extra_args: List[str], input_text: str, key: str, cancel_event=None) -> str:
+        """Run 'openssl enc' over base64 text in both directions, returning its base64 output"""
+        if shutil.which("openssl") is None:
+            raise BackupError("openssl was not found; it is needed to encrypt backups", "openssl_unavailable")
+        cmd = ["openssl", "enc", "-" + CIPHER, "-pbkdf2", "-md", "sha256", "-a", "-A",
+               "-pass", f"env:{KEY_ENV_VAR}"] + extra_args
+        completed = self.runner.run(cmd, timeout=PROBE_TIMEOUT, input_text=input_text,
+                                    env=dict(os.environ, **{KEY_ENV_VAR: key}), cancel_event=cancel_event)
+        if completed.returncode != 0:
+            raise BackupError(f"openssl failed: {completed.stderr.strip()}", "decrypt_failed" if "-d" in extra_args
+                              else "encrypt_failed")
+        return completed.stdout.strip()
+
+    def _seal(self, data: bytes, cancel_event=None) -> bytes:
+        """Encrypt data with an HMAC tag in front"""
+        plain = base64.b64encode(self._mac(data) + data).decode()
+        # The archive key is random, so a single PBKDF2 round only derives the per-file key and IV from the salt
+        return self._openssl(["-iter", "1"], plain, self._data_key.hex(), cancel_event).encode()
+
+    def _unseal(self, sealed: bytes, cancel_event=None) -> bytes:
+        try:
+            plain = base64.b64decode(self._openssl(["-d", "-iter", "1"], sealed.decode().strip(),
+                                                   self._data_key.hex(), cancel_event))
+        except ValueError:
+            raise BackupError("Corrupt archive file", "corrupt")
+        tag, data = plain[:_TAG_SIZE], plain[_TAG_SIZE:]
+        if not hmac.compare_digest(tag, self._mac(data)):
+            raise BackupError("Archive file failed its integrity check", "corrupt")
+        return data
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes, mode: int = 0o600):
+        tmp_path = path.with_name(f".{path.name}.tmp-{uuid.uuid4().hex[:8]}")
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.chmod(tmp_path, mode)
+            os.replace(tmp_path, path)
+        finally:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+
+    def _object_path(self, object_id: str) -> Path:
+        return self.archive_dir / "objects" / object_id[:2] / object_id
+
+    def _read_object(self, object_id: str, cancel_event=None) -> bytes:
+        data = self._unseal(self._object_path(object_id).read_bytes(), cancel_event)
+        if self._mac(data).hex() != object_id:
+            raise BackupError(f"Archive object {object_id[:12]} does not match its id", "corrupt")
+        return data
+
+    def _store_object(self, object_id: str, data: bytes, cancel_event=None) -> int:
+        path = self._object_path(object_id)
+        if path.exists():
+            return 0
+        sealed = self._seal(data, cancel_event)
+        path.parent.mkdir(mode=0o700, exist_ok=True)
+        self._write_atomic(path, sealed)
+        return len(sealed)
+
+    def _load_stat_cache(self) -> Dict[str, list]:
+        if self._stat_cache is None:
+            try:
+                self._stat_cache = json.loads(self._unseal((self.archive_dir / STAT_CACHE_FILE).read_bytes()))
+            except FileNotFoundError:
+                self._stat_cache = {}
+            except BackupError as e:
+                app_logger.warning(f"Discarding unreadable backup stat cache: {e}")
+                self._stat_cache = {}
+        return self._stat_cache
+
+    def list_snapshots(self) -> List[Dict[str, any]]:
+        """Snapshots oldest first, as dicts with 'snapshot' and 'created' (no decryption needed)"""
+        try:
+            names = sorted(entry.name[:-len(SNAPSHOT_SUFFIX)] for entry in os.scandir(self.archive_dir / "snapshots")
+                           if entry.name.endswith(SNAPSHOT_SUFFIX))
+        except FileNotFoundError:
+            return []
+        return [{'snapshot': name, 'created': _snapshot_time(name)} for name in names]
+
+    def load_manifest(self, snapshot_id: str, cancel_event=None) -> Dict[str, any]:
+        """Decrypt one snapshot manifest"""
+        self.unlock()
+        path = self.archive_dir / "snapshots" / f"{snapshot_id}{SNAPSHOT_SUFFIX}"
+        try:
+            return json.loads(self._unseal(path.read_bytes(), cancel_event))
+        except FileNotFoundError:
+            raise BackupError(f"No snapshot {snapshot_id}", "snapshot_not_found")
+
+    def _collect(self, roots: Sequence[KeyRoot]) -> List[Tuple[KeyRoot, str, os.stat_result]]:
+        files = []
+        for root in roots:
+            for directory in iter_root_directories(root):
+                try:
+                    with os.scandir(directory) as it:
+                        for entry in it:
+                            # Dot files are temporary copies (re-encryption, atomic writes) or internal state
+                            if entry.name.startswith(".") or not entry.is_file(follow_symlinks=False):
+                                continue
+                            files.append((root, entry.path, entry.stat(follow_symlinks=False)))
+                except FileNotFoundError:
+                    continue
+                except PermissionError as e:
+                    app_logger.warning(f"Cannot read key directory {directory} for backup: {e}")
+        return files
+
+    def snapshot(self, roots: Iterable, label: str = "",
+                 cancel_event: Optional[threading.Event] = None) -> Dict[str, any]:
+        """
+        Back up every file in the key roots
+
+        Args:
+            roots: KeyRoot objects or directory paths
+            label: Free text stored in the manifest (e.g. why the snapshot was taken)
+
+        Returns:
+            Dict with 'snapshot' (id), 'files', 'new_objects', 'bytes_stored',
+            'unchanged' (True when nothing changed since the latest snapshot,
+            which is then reused) and 'duration'
+        """
+        started = time.perf_counter()
+        self.unlock()
+        roots = [KeyRoot.coerce(root) for root in roots]
+        with self._lock:
+            stat_cache = self._load_stat_cache()
+            snapshots = self.list_snapshots()
+            if self._last_files is None:
+                self._last_files = self.load_manifest(snapshots[-1]['snapshot'])['files'] if snapshots else {}
+
+            now_ns = time.time_ns()
+            files: Dict[str, Dict[str, any]] = {}
+            pending: Dict[str, bytes] = {}
+            cache_changed = False
+            for root, path, st in self._collect(roots):
+                signature = [st.st_size, st.st_mtime_ns, st.st_ctime_ns, st.st_ino]
+                cached = stat_cache.get(path)
+                if cached and cached[:4] == signature:
+                    object_id = cached[4]
+                else:
+                    try:
+                        with open(path, "rb") as f:
+                            data = f.read()
+                    except OSError as e:
+                        app_logger.warning(f"Cannot read {path} for backup: {e}")
+                        continue
+                    object_id = self._mac(data).hex()
+                    if not self._object_path(object_id).exists():
+                        pending[object_id] = data
+                    if now_ns - max(st.st_mtime_ns, st.st_ctime_ns) > RACY_WINDOW_NS:
+                        stat_cache[path] = signature + [object_id]
+                        cache_changed = True
+                files[path] = {'object': object_id, 'root': str(root.path), 'size': st.st_size,
+                               'mode': st.st_mode & 0o7777, 'mtime_ns': st.st_mtime_ns}
+
+            for path in [path for path in stat_cache if path not in files]:
+                del stat_cache[path]
+                cache_changed = True
+
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="backup") as executor:
+                stored = list(executor.map(lambda item: self._store_object(item[0], item[1], cancel_event),
+                                           pending.items()))
+
+            result = {'snapshot': snapshots[-1]['snapshot'] if snapshots else None, 'files': len(files),
+                      'new_objects': len(pending), 'bytes_stored': sum(stored), 'unchanged': True}
+            if files != self._last_files or not snapshots:
+                stamp = time.time()
+                snapshot_id = (time.strftime("%Y%m%dT%H%M%S", time.gmtime(stamp)) +
+                               f".{int(stamp * 1000) % 1000:03d}Z-{uuid.uuid4().hex[:6]}")
+                manifest = {'snapshot': snapshot_id, 'created': stamp, 'label': label,
+                            'roots': [str(root.path) for root in roots], 'files': files}
+                self._write_atomic(self.archive_dir / "snapshots" / f"{snapshot_id}{SNAPSHOT_SUFFIX}",
+                                   self._seal(json.dumps(manifest).encode(), cancel_event))
+                self._last_files = files
+                result.update(snapshot=snapshot_id, unchanged=False)
+            if cache_changed:
+                self._write_atomic(self.archive_dir / STAT_CACHE_FILE,
+                                   self._seal(json.dumps(stat_cache).encode(), cancel_event))
+
+        result['duration'] = time.perf_counter() - started
+        app_logger.info(f"Key backup {result['snapshot']}: {result['files']} file(s), "
+                        f"{result['new_objects']} new object(s)"
+                        f"{' (unchanged)' if result['unchanged'] else ''} in {result['duration']:.3f}s")
+        return result
+
+    def find_snapshot(self, snapshot_id: Optional[str] = None, at: Optional[float] = None) -> str:
+        """The given snapshot, the latest one taken at or before 'at' (epoch seconds), or the latest"""
+        snapshots = self.list_snapshots()
+        if snapshot_id is not None:
+            if not any(entry['snapshot'] == snapshot_id for entry in snapshots):
+                raise BackupError(f"No snapshot {snapshot_id}", "snapshot_not_found")
+            return snapshot_id
+        if at is not None:
+            snapshots = [entry for entry in snapshots if entry['created'] <= at]
+        if not snapshots:
+            raise BackupError("No snapshot to restore from", "snapshot_not_found")
+        return snapshots[-1]['snapshot']
+
+    def restore(self, snapshot_id: Optional[str] = None, at: Optional[float] = None,
+                keys: Optional[Sequence[str]] = None, target_dir: Optional[Path] = None, overwrite: bool = True,
+                cancel_event: Optional[threading.Event] = None) -> List[Dict[str, any]]:
+        """
+        Restore files from a snapshot
+
+        Args:
+            snapshot_id: Snapshot to restore; None picks by 'at' or the latest (for 'keys', the
+                newest snapshot that contains each file)
+            at: Point in time (epoch seconds); the latest snapshot taken at or before it is used
+            keys: Key names (e.g. 'id_ed25519') or private key paths to restore with their .pub and
+                certificate; None restores every file of the snapshot
+            target_dir: Write into this directory (keeping paths relative to each key root)
+                instead of the original locations
+            overwrite: Replace existing files whose content differs
+
+        Returns:
+            One dict per file with 'path', 'status' (restored/unchanged/skipped/failed),
+            'replaced' (a different file was overwritten), 'error' and 'code'
+        """
+        self.unlock()
+        if keys is None:
+            snapshot_id = self.find_snapshot(snapshot_id, at)
+            files = self.load_manifest(snapshot_id, cancel_event)['files']
+        else:
+            wanted, private_names = set(), []
+            for key in keys:
+                key_path = Path(key)
+                names = [str(key_path.with_name(name)) if key_path.is_absolute() else name
+                         for name in (key_path.name, f"{key_path.name}.pub", f"{key_path.name}{CERT_SUFFIX}")]
+                wanted.update(names)
+                private_names.append(names[0])
+            # Without an explicit snapshot, each file comes from the newest snapshot that still has it,
+            # so a deleted private key is found even when later snapshots kept its .pub
+            candidates = [self.find_snapshot(snapshot_id, at)] if snapshot_id else \
+                [entry['snapshot'] for entry in reversed(self.list_snapshots())
+                 if at is None or entry['created'] <= at]
+            files, found, used = {}, set(), []
+            for candidate in candidates:
+                for path, entry in self.load_manifest(candidate, cancel_event)['files'].items():
+                    name = path if path in wanted else os.path.basename(path)
+                    if name in wanted and path not in files:
+                        files[path] = entry
+                        found.add(name)
+                        if candidate not in used:
+                            used.append(candidate)
+                if found == wanted:
+                    break
+            missing = [key for key, name in zip(keys, private_names) if name not in found]
+            if missing:
+                raise BackupError(f"No snapshot holds the private key of: {', '.join(missing)}", "key_not_found")
+            snapshot_id = ", ".join(used)
+
+        def restore_one(item) -> Dict[str, any]:
+            path, entry = item
+            destination = Path(target_dir, os.path.relpath(path, entry['root'])) if target_dir else Path(path)
+            result = {'path': str(destination), 'status': STATUS_FAILED, 'replaced': False, 'error': None, 'code': None}
+            try:
+                try:
+                    current = destination.read_bytes()
+                except FileNotFoundError:
+                    current = None
+                if current is not None and self._mac(current).hex() == entry['object']:
+                    result['status'] = STATUS_UNCHANGED
+                elif current is not None and not overwrite:
+                    result['status'], result['error'] = STATUS_SKIPPED, "File exists with different content"
+                else:
+                    data = self._read_object(entry['object'], cancel_event)
+                    destination.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+                    self._write_atomic(destination, data, entry['mode'])
+                    os.utime(destination, ns=(entry['mtime_ns'], entry['mtime_ns']))
+                    result['status'], result['replaced'] = STATUS_RESTORED, current is not None
+            except BackupError as e:
+                result['error'], result['code'] = str(e), e.code
+            except CommandCancelledError as e:
+                result['error'], result['code'] = str(e), "cancelled"
+            except subprocess.TimeoutExpired as e:
+                result['error'], result['code'] = str(e), "timeout"
+            except OSError as e:
+                result['error'], result['code'] = str(e), "os_error"
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="restore") as executor:
+            results = list(executor.map(restore_one, sorted(files.items())))
+
+        restored = sum(1 for result in results if result['status'] == STATUS_RESTORED)
+        app_logger.info(f"Restored {restored}/{len(results)} file(s) from backup {snapshot_id}")
+        failed = [result for result in results if result['status'] == STATUS_FAILED]
+        if failed:
+            app_logger.warning(f"Key restore failures by cause: {summarize(r['code'] for r in failed)}")
+        return results
+
+    def prune(self, keep: int) -> Dict[str, int]:
+        """Delete all but the newest 'keep' snapshots and the objects only they referenced"""
+        if keep < 1:
+            raise ValueError("At least one snapshot must be kept")
+        self.unlock()
+        with self._lock:
+            snapshots = [entry['snapshot'] for entry in self.list_snapshots()]
+            removed = snapshots[:-keep]
+            referenced = set()
+            for snapshot_id in snapshots[-keep:]:
+                referenced.update(entry['object'] for entry in self.load_manifest(snapshot_id)['files'].values())
+            for snapshot_id in removed:
+                (self.archive_dir / "snapshots" / f"{snapshot_id}{SNAPSHOT_SUFFIX}").unlink()
+
+            objects_removed = 0
+            for bucket in (self.archive_dir / "objects").iterdir():
+                for entry in bucket.iterdir():
+                    if entry.name not in referenced and not entry.name.startswith("."):
+                        entry.unlink()
+                        objects_removed += 1
+            # Stat cache entries may name objects that are gone now
+            stat_cache = self._load_stat_cache()
+            for path in [path for path, cached in stat_cache.items() if cached[4] not in referenced]:
+                del stat_cache[path]
+            self._write_atomic(self.archive_dir / STAT_CACHE_FILE, self._seal(json.dumps(stat_cache).encode()))
+
+        app_logger.info(f"Pruned key backups: {len(removed)} snapshot(s), {objects_removed} object(s) removed")
+        return {'snapshots_removed': len(removed), 'objects_removed': objects_removed}
+
+
+def _parse_time(value: str) -> float:
+    """Local time as YYYY-mm-dd[THH:MM[:SS]] to epoch seconds"""
+    for pattern in ("%Y-%m-%dT%H:%M:%S", "%Y-%m-%dT%H:%M", "%Y-%m-%d"):
+        try:
+            return time.mktime(time.strptime(value, pattern))
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError(f"Invalid time: {value}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Encrypted incremental backups of SSH keys")
+    parser.add_argument("command", choices=["init", "backup", "list", "restore", "prune"])
+    parser.add_argument("roots", nargs="*", help="Key roots to back up (default ~/.ssh)")
+    parser.add_argument("--archive", type=Path, help=f"Archive directory (default {default_archive_dir()})")
+    parser.add_argument("--label", default="", help="Label stored with the snapshot")
+    parser.add_argument("--snapshot", help="Snapshot id to restore")
+    parser.add_argument("--at", type=_parse_time, help="Restore the state at this local time")
+    parser.add_argument("--key", action="append", help="Key name or private key path to restore (repeatable)")
+    parser.add_argument("--to", type=Path, help="Restore into this directory instead of the original paths")
+    parser.add_argument("--keep", type=int, help="Snapshots to keep when pruning")
+    args = parser.parse_intermixed_args(argv)
+
+    if args.command == "list":
+        for entry in KeyBackup(args.archive).list_snapshots():
+            print(json.dumps(entry))
+        return 0
+
+    passphrase = stdin_passphrase()
+    try:
+        if args.command == "init":
+            backup = KeyBackup.create(args.archive, passphrase)
+            print(backup.archive_dir)
+            return 0
+        backup = KeyBackup(args.archive, passphrase)
+        if args.command == "backup":
+            print(json.dumps(backup.snapshot(args.roots or [Path.home() / ".ssh"], args.label)))
+            return 0
+        if args.command == "prune":
+            if args.keep is None:
+                parser.error("prune needs --keep")
+            print(json.dumps(backup.prune(args.keep)))
+            return 0
+        results = backup.restore(args.snapshot, args.at, args.key, args.to)
+    except BackupError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    for result in results:
+        print(json.dumps(result))
+    return 1 if any(result['status'] == STATUS_FAILED for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
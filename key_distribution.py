@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Key distribution module for SSH GitHub Configurator
+Appends a public key to authorized_keys on many remote hosts concurrently
+"""
+
+import asyncio
+import random
+import subprocess
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from logger import app_logger
+from process_runner import ProcessRunner, CommandCancelledError, CONNECT_TIMEOUT
+from ssh_diagnostics import classify
+
+
+# Default number of hosts contacted at once
+DEFAULT_MAX_IN_FLIGHT = 16
+
+# Distribution statuses
+STATUS_ADDED = "added"
+STATUS_PRESENT = "present"
+STATUS_FAILED = "failed"
+
+# Runs on the remote host with the public key line on stdin. Matching is done on
+# the key blob, so an existing entry with different options or comment counts as
+# present and the file never gets a duplicate line.
+REMOTE_APPEND_SCRIPT = (
+    'umask 077; IFS= read -r key || exit 2; '
+    'blob=$(printf "%s\\n" "$key" | cut -d" " -f2); [ -n "$blob" ] || exit 2; '
+    'mkdir -p "$HOME/.ssh" && f="$HOME/.ssh/authorized_keys" && touch "$f" || exit 3; '
+    'if grep -qF -- "$blob" "$f"; then echo __KEY_PRESENT__; exit 0; fi; '
+    '[ -s "$f" ] && [ -n "$(tail -c 1 "$f")" ] && echo >> "$f"; '
+    'printf "%s\\n" "$key" >> "$f" && echo __KEY_ADDED__'
+)
+
+# ssh_diagnostics codes for failures that will not go away by retrying
+PERMANENT_ERRORS = frozenset({
+    "permission_denied", "host_key_verification_failed", "host_key_changed", "host_unresolved",
+    "key_not_found", "key_permissions_too_open", "algorithm_mismatch",
+})
+
+
+class KeyDistributor:
+    """
+    Pushes a public key to many hosts with a bounded number of concurrent ssh sessions
+
+    Each host is handled by one ssh invocation running REMOTE_APPEND_SCRIPT.
+    Connection-level failures (ssh exit status 255) are retried with
+    exponential backoff and jitter; authentication and host key errors are not.
+    """
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, retries: int = 2,
+                 backoff: float = 1.0, connect_timeout: int = 10, ssh_options: Optional[Sequence[str]] = None,
+                 runner: Optional[ProcessRunner] = None):
+        self.max_in_flight = max_in_flight
+        self.retries = retries
+        self.backoff = backoff
+        self.connect_timeout = connect_timeout
+        self.ssh_options = list(ssh_options or [])
+        # A dedicated runner so the in-flight limit is not capped by the shared UI runner
+        self.runner = runner or ProcessRunner(max_concurrent=max_in_flight)
+
+    def _command(self, host: str, identity_file: Optional[str]) -> List[str]:
+        cmd = ["ssh", "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=accept-new",
+               "-o", f"ConnectTimeout={self.connect_timeout}"]
+        if identity_file:
+            cmd += ["-i", str(identity_file), "-o", "IdentitiesOnly=yes"]
+        cmd += self.ssh_options
+        cmd += [host, REMOTE_APPEND_SCRIPT]
+        return cmd
+
+    async def distribute_to_host(self, host: str, public_key: str, semaphore: asyncio.Semaphore,
+                                 identity_file: Optional[str] = None,
+                                 cancel_event: Optional[threading.Event] = None) -> Dict[str, any]:
+        """Append public_key on one host, retrying transient failures"""
+        started = time.perf_counter()
+        result = {'host': host, 'status': STATUS_FAILED, 'attempts': 0, 'error': None, 'code': None,
+                  'duration': 0.0}
+        cmd = self._command(host, identity_file)
+
+        for attempt in range(self.retries + 1):
+            result['attempts'] = attempt + 1
+            async with semaphore:
+                try:
+                    completed = await self.runner.run_async(cmd, timeout=CONNECT_TIMEOUT,
+                                                            input_text=public_key.strip() + "\n",
+                                                            cancel_event=cancel_event)
+                except subprocess.TimeoutExpired:
+                    completed = None
+                    result['error'], result['code'] = "Timed out", "timeout"
+                except CommandCancelledError as e:
+                    result['error'], result['code'] = str(e), "cancelled"
+                    break
+                except OSError as e:
+                    result['error'], result['code'] = str(e), "os_error"
+                    break
+
+            if completed is not None:
+                if completed.returncode == 0 and "__KEY_PRESENT__" in completed.stdout:
+                    result['status'], result['error'], result['code'] = STATUS_PRESENT, None, None
+                    break
+                if completed.returncode == 0 and "__KEY_ADDED__" in completed.stdout:
+                    result['status'], result['error'], result['code'] = STATUS_ADDED, None, None
+                    break
+                diagnosis = classify(completed.stderr, "ssh", completed.returncode or 1)
+                error = diagnosis.line or completed.stderr.strip() or f"ssh exited with status {completed.returncode}"
+                result['error'], result['code'] = error.splitlines()[-1], diagnosis.code
+                # Only ssh's own connection errors (255) are worth retrying
+                if completed.returncode != 255 or diagnosis.code in PERMANENT_ERRORS:
+                    break
+
+            if attempt < self.retries:
+                delay = self.backoff * (2 ** attempt) * (0.5 + random.random())
+                app_logger.debug(f"Retrying {host} in {delay:.1f}s: {result['error']}")
+                await asyncio.sleep(delay)
+
+        result['duration'] = time.perf_counter() - started
+        level = app_logger.info if result['status'] != STATUS_FAILED else app_logger.warning
+        level(f"Key distribution to {host}: {result['status']}{' - ' + result['error'] if result['error'] else ''}")
+        return result
+
+    async def distribute_async(self, hosts: Iterable[str], public_key: str, identity_file: Optional[str] = None,
+                               progress_callback=None,
+                               cancel_event: Optional[threading.Event] = None) -> List[Dict[str, any]]:
+        """Distribute to all hosts, returning one result per host in input order"""
+        hosts = list(dict.fromkeys(hosts))
+        semaphore = asyncio.Semaphore(self.max_in_flight)
+        done = 0
+
+        async def run(host: str) -> Dict[str, any]:
+            nonlocal done
+            result = await self.distribute_to_host(host, public_key, semaphore, identity_file, cancel_event)
+            done += 1
+            if progress_callback:
+                try:
+                    progress_callback(done, len(hosts), result)
+                except Exception as e:
+                    app_logger.warning(f"Distribution progress callback failed: {e}")
+            return result
+
+        return list(await asyncio.gather(*(run(host) for host in hosts)))
+
+    def distribute(self, hosts: Iterable[str], public_key: str, identity_file: Optional[str] = None,
+                   progress_callback=None, cancel_event: Optional[threading.Event] = None) -> List[Dict[str, any]]:
+        """Blocking wrapper around distribute_async for worker threads"""
+        return asyncio.run(self.distribute_async(hosts, public_key, identity_file, progress_callback, cancel_event))
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Key events module for SSH GitHub Configurator
+In-process event bus for key lifecycle events, dispatching to subscribers on a worker pool
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from logger import app_logger
+
+
+# Event types published by SSHManager
+KEY_CREATED = "key_created"
+KEY_DELETED = "key_deleted"
+KEY_ROTATED = "key_rotated"
+AGENT_LOADED = "agent_loaded"
+TEST_RESULT = "test_result"
+EVENT_TYPES = (KEY_CREATED, KEY_DELETED, KEY_ROTATED, AGENT_LOADED, TEST_RESULT)
+
+# Events queued per subscriber before the oldest ones are dropped
+DEFAULT_QUEUE_SIZE = 1000
+
+# Most events handed to a batch subscriber in one call
+DEFAULT_BATCH_SIZE = 100
+
+# Threads delivering events; each subscriber uses at most one at a time
+DEFAULT_MAX_WORKERS = 2
+
+
+@dataclass(frozen=True)
+class KeyEvent:
+    """One published event; data holds event-specific fields such as 'private_path'"""
+    type: str
+    data: Dict[str, any] = field(default_factory=dict)
+    sequence: int = 0
+    timestamp: float = 0.0
+
+
+class Subscription:
+    """A subscriber's handler, event filter and bounded queue"""
+
+    def __init__(self, handler: Callable, types: Optional[Iterable[str]], batched: bool,
+                 queue_size: int, name: str):
+        self.handler = handler
+        self.types = frozenset(types) if types else None
+        self.batched = batched
+        self.name = name
+        self.queue = deque(maxlen=queue_size)
+        self.delivered = 0
+        self.dropped = 0
+        self.active = True
+        # True while a drain is queued or running; guarded by the bus lock
+        self.scheduled = False
+        self._dropped_reported = 0
+
+    def accepts(self, event: KeyEvent) -> bool:
+        return self.active and (self.types is None or event.type in self.types)
+
+
+class EventBus:
+    """
+    Publish/subscribe bus whose publishers never wait for subscribers
+
+    publish() only appends the event to each matching subscriber's bounded
+    queue and, if that subscriber is idle, schedules a drain on the worker
+    pool. A drain hands the subscriber up to batch_size events (one call for
+    batch subscribers, one call per event otherwise) and reschedules itself
+    while events remain, so busy subscribers take turns on the pool. Events
+    for one subscriber are delivered in publish order, never concurrently.
+    When a subscriber falls more than queue_size events behind, its oldest
+    events are dropped and counted instead of slowing the publisher down.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="key-events")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._subscriptions: List[Subscription] = []
+        self._sequence = itertools.count(1)
+        self._running = 0
+        self._closed = False
+
+    def subscribe(self, handler: Callable, types: Optional[Iterable[str]] = None, batched: bool = False,
+                  queue_size: Optional[int] = None, name: Optional[str] = None) -> Subscription:
+        """
+        Register a subscriber
+
+        Args:
+            handler: Called with one KeyEvent, or with a list of KeyEvents when batched
+            types: Event types to receive (None for all)
+            batched: Deliver queued events as lists of up to batch_size
+            queue_size: Events kept while the handler is behind (default: the bus queue_size)
+            name: Name used in logs and stats
+
+        Returns:
+            The Subscription, for unsubscribe()
+        """
+        subscription = Subscription(handler, types, batched, queue_size or self.queue_size,
+                                    name or getattr(handler, "__qualname__", repr(handler)))
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """Stop delivering to a subscriber; events already queued for it are discarded"""
+        with self._lock:
+            subscription.active = False
+            subscription.queue.clear()
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            self._idle.notify_all()
+
+    def publish(self, event_type: str, **data) -> KeyEvent:
+        """Queue an event for every matching subscriber and return immediately"""
+        event = KeyEvent(event_type, data, next(self._sequence), time.time())
+        to_schedule = []
+        with self._lock:
+            if self._closed:
+                return event
+            for subscription in self._subscriptions:
+                if not subscription.accepts(event):
+                    continue
+                if len(subscription.queue) == subscription.queue.maxlen:
+                    subscription.dropped += 1
+                subscription.queue.append(event)
+                if not subscription.scheduled:
+                    subscription.scheduled = True
+                    self._running += 1
+                    to_schedule.append(subscription)
+        for subscription in to_schedule:
+            self._executor.submit(self._drain, subscription)
+        return event
+
+    def _drain(self, subscription: Subscription):
+        with self._lock:
+            batch = [subscription.queue.popleft()
+                     for _ in range(min(self.batch_size, len(subscription.queue)))]
+            newly_dropped = subscription.dropped - subscription._dropped_reported
+            subscription._dropped_reported = subscription.dropped
+        if newly_dropped:
+            app_logger.warning(f"Event subscriber {subscription.name} is behind; "
+                               f"dropped {newly_dropped} event(s)")
+
+        try:
+            if subscription.batched:
+                if batch:
+                    self._deliver(subscription, batch)
+            else:
+                for event in batch:
+                    self._deliver(subscription, [event])
+        finally:
+            with self._lock:
+                if subscription.queue and subscription.active and not self._closed:
+                    reschedule = True
+                else:
+                    reschedule = False
+                    subscription.scheduled = False
+                    self._running -= 1
+                    self._idle.notify_all()
+            if reschedule:
+                try:
+                    self._executor.submit(self._drain, subscription)
+                except RuntimeError:
+                    # Executor shut down between the check and the submit
+                    with self._lock:
+                        subscription.scheduled = False
+                        self._running -= 1
+                        self._idle.notify_all()
+
+    def _deliver(self, subscription: Subscription, events: List[KeyEvent]):
+        try:
+            subscription.handler(events if subscription.batched else events[0])
+            subscription.delivered += len(events)
+        except Exception as e:
+            app_logger.error(f"Event subscriber {subscription.name} failed on {events[0].type}: {e}",
+                             exc_info=True)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been delivered. Returns False on timeout."""
+        with self._lock:
+            return self._idle.wait_for(lambda: self._running == 0, timeout)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Per-subscriber 'queued', 'delivered' and 'dropped' counts"""
+        with self._lock:
+            return {subscription.name: {'queued': len(subscription.queue), 'delivered': subscription.delivered,
+                                        'dropped': subscription.dropped}
+                    for subscription in self._subscriptions}
+
+    def close(self, timeout: Optional[float] = 5.0):
+        """Deliver what is queued (up to timeout), then stop the workers"""
+        self.flush(timeout)
+        with self._lock:
+            self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
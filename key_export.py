@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Key export module for SSH GitHub Configurator
+Streams public keys from the key inventory into bulk export formats
+"""
+
+import fnmatch
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from logger import app_logger
+from ssh_manager import SSHKeyError
+from key_record import KeyRecord
+
+
+# Supported export formats and their default file names
+EXPORT_FORMATS = {
+    "authorized_keys": "authorized_keys",
+    "jsonl": "public_keys.jsonl",
+    "github": "github_keys.jsonl",
+}
+
+
+def make_key_filter(types: Optional[Iterable[str]] = None, name_pattern: Optional[str] = None) -> Callable[[KeyRecord], bool]:
+    """
+    Build a predicate selecting inventory records
+
+    Args:
+        types: Key types to keep (e.g. {'ED25519', 'RSA'}); None keeps all
+        name_pattern: Glob matched against the private key file name
+    """
+    wanted_types = {t.upper() for t in types} if types else None
+
+    def key_filter(record: KeyRecord) -> bool:
+        if wanted_types and record.type.upper() not in wanted_types:
+            return False
+        if name_pattern and not fnmatch.fnmatch(record.name, name_pattern):
+            return False
+        return True
+
+    return key_filter
+
+
+def iter_public_keys(key_records: Iterable[KeyRecord],
+                     key_filter: Optional[Callable[[KeyRecord], bool]] = None) -> Iterator[Dict]:
+    """
+    Yield public key records for inventory records, skipping unreadable and duplicate keys
+
+    Each record contains 'name', 'type', 'algorithm', 'blob', 'comment', 'line'
+    and 'public_path'. Duplicates are detected by key blob, so only the blobs
+    seen so far are held in memory.
+    """
+    seen_blobs = set()
+    for key_record in key_records:
+        if key_filter and not key_filter(key_record):
+            continue
+
+        public_path = key_record.public_path
+        try:
+            with open(public_path, 'r', encoding='utf-8') as f:
+                line = f.readline().strip()
+        except OSError as e:
+            app_logger.warning(f"Skipping unreadable public key {public_path}: {e}")
+            continue
+
+        parts = line.split(None, 2)
+        if len(parts) < 2:
+            app_logger.warning(f"Skipping malformed public key {public_path}")
+            continue
+
+        blob = parts[1]
+        if blob in seen_blobs:
+            app_logger.debug(f"Skipping duplicate public key {public_path}")
+            continue
+        seen_blobs.add(blob)
+
+        yield {
+            'name': key_record.name,
+            'type': key_record.type,
+            'algorithm': parts[0],
+            'blob': blob,
+            'comment': parts[2] if len(parts) > 2 else "",
+            'line': line,
+            'public_path': str(public_path),
+        }
+
+
+def github_payload(record: Dict) -> Dict[str, str]:
+    """Body for POST https://api.github.com/user/keys from a public key record"""
+    return {'title': record['comment'] or record['name'], 'key': f"{record['algorithm']} {record['blob']}"}
+
+
+def format_records(records: Iterable[Dict], fmt: str) -> Iterator[str]:
+    """Yield output lines for the given export format"""
+    if fmt == "authorized_keys":
+        for record in records:
+            yield record['line'] + "\n"
+    elif fmt == "jsonl":
+        for record in records:
+            yield json.dumps(record, ensure_ascii=False) + "\n"
+    elif fmt == "github":
+        for record in records:
+            yield json.dumps(github_payload(record), ensure_ascii=False) + "\n"
+    else:
+        raise SSHKeyError(f"Unsupported export format: {fmt}")
+
+
+def write_atomic(output_path: Path, lines: Iterable[str], mode: int = 0o644) -> int:
+    """
+    Stream lines into a temporary file next to output_path, then rename it into place
+
+    Returns:
+        Number of lines written
+    """
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(prefix=f".{output_path.name}.", dir=output_path.parent)
+    count = 0
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline="\n") as f:
+            for line in lines:
+                f.write(line)
+                count += 1
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, output_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return count
+
+
+def export_public_keys(ssh_manager, output_path: Path, fmt: str = "authorized_keys",
+                       key_filter: Optional[Callable[[KeyRecord], bool]] = None) -> Dict[str, any]:
+    """
+    Export public keys from the inventory to a file
+
+    Args:
+        ssh_manager: SSHManager providing the key inventory
+        output_path: Destination file, replaced atomically
+        fmt: One of EXPORT_FORMATS
+        key_filter: Optional predicate selecting inventory records
+
+    Returns:
+        Dict with 'success', 'count', 'path' and 'format'
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise SSHKeyError(f"Unsupported export format: {fmt}")
+
+    app_logger.info(f"Exporting public keys as {fmt} to {output_path}")
+    try:
+        records = iter_public_keys(ssh_manager.iter_ssh_keys(), key_filter)
+        count = write_atomic(Path(output_path), format_records(records, fmt))
+    except SSHKeyError:
+        raise
+    except Exception as e:
+        app_logger.error(f"Public key export failed: {e}", exc_info=True)
+        raise SSHKeyError(f"Failed to export public keys: {e}")
+
+    app_logger.info(f"Exported {count} public key(s) to {output_path}")
+    return {'success': True, 'count': count, 'path': str(output_path), 'format': fmt}
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Key inventory module for SSH GitHub Configurator
+Scans one or more key directories concurrently with per-root caching
+"""
+
+import fnmatch
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from logger import app_logger
+from key_record import KeyRecord
+
+
+# File names in key directories that are never private keys
+NON_KEY_FILES = {"known_hosts", "config"}
+
+# Name suffix of the certificate ssh-keygen -s writes next to a public key
+CERT_SUFFIX = "-cert.pub"
+
+
+@dataclass(frozen=True)
+class KeyRoot:
+    """
+    A directory to search for SSH key pairs
+
+    Args:
+        path: Directory to scan
+        recursive: Also scan subdirectories
+        patterns: Glob patterns matched against private key file names (None matches all)
+        read_only: Keys under this root are inventoried but never modified or deleted
+    """
+    path: Path
+    recursive: bool = False
+    patterns: Optional[Tuple[str, ...]] = None
+    read_only: bool = False
+
+    @classmethod
+    def coerce(cls, value: Union["KeyRoot", str, Path]) -> "KeyRoot":
+        """Accept a KeyRoot, or a plain path for a non-recursive writable root"""
+        if isinstance(value, KeyRoot):
+            return value
+        return cls(Path(value).expanduser())
+
+    def matches(self, name: str) -> bool:
+        return not self.patterns or any(fnmatch.fnmatch(name, pattern) for pattern in self.patterns)
+
+
+def detect_key_type(public_key_path: Path) -> str:
+    """Determine the key type from the public key file contents"""
+    try:
+        with open(public_key_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+            if "ssh-rsa" in content:
+                return "RSA"
+            elif "ssh-ed25519" in content:
+                return "ED25519"
+            elif "ecdsa" in content:
+                return "ECDSA"
+    except Exception as e:
+        app_logger.warning(f"Could not determine key type for {public_key_path}: {e}")
+    return "unknown"
+
+
+def iter_root_directories(root: KeyRoot) -> Iterator[str]:
+    """Yield the directories a scan of root reads"""
+    yield str(root.path)
+    if root.recursive:
+        for dirpath, dirnames, _ in os.walk(root.path):
+            # Hidden directories hold internal state such as the key pool
+            dirnames[:] = [dirname for dirname in dirnames if not dirname.startswith(".")]
+            for dirname in dirnames:
+                yield os.path.join(dirpath, dirname)
+
+
+def scan_key_root(root: KeyRoot) -> List[KeyRecord]:
+    """Scan a single key root without caching, returning its key pairs"""
+    found_keys = []
+    for directory in iter_root_directories(root):
+        try:
+            with os.scandir(directory) as it:
+                files = {entry.name: entry for entry in it if entry.is_file()}
+        except FileNotFoundError:
+            continue
+        except PermissionError as e:
+            app_logger.warning(f"Cannot read key directory {directory}: {e}")
+            continue
+
+        for name in sorted(files):
+            if name.endswith(".pub") or name in NON_KEY_FILES or not root.matches(name):
+                continue
+            public_name = os.path.splitext(name)[0] + ".pub"
+            if public_name not in files:
+                continue
+
+            key_type = detect_key_type(files[public_name].path)
+            try:
+                public_mtime_ns = files[public_name].stat().st_mtime_ns
+            except OSError:
+                public_mtime_ns = None
+            cert_name = public_name[:-4] + CERT_SUFFIX
+            found_keys.append(KeyRecord(directory, name, public_name, key_type, root.path, root.read_only,
+                                        public_mtime_ns, cert_name if cert_name in files else None))
+            app_logger.debug(f"Found SSH key pair: {files[name].path} ({key_type})")
+    return found_keys
+
+
+class KeyInventory:
+    """
+    Concurrent, cached scanner over a set of key roots
+
+    Each root is scanned on a worker thread. Results are cached per root and
+    reused while the modification times of the scanned directories and the
+    stat entries of the public keys and certificates found are unchanged. A root that is still scanning when the caller's timeout expires
+    (e.g. a slow network mount) is skipped for that call; its scan keeps
+    running and fills the cache for the next one.
+    """
+
+    def __init__(self, roots: Sequence[Union[KeyRoot, str, Path]], max_workers: int = 4):
+        self.roots: List[KeyRoot] = [KeyRoot.coerce(root) for root in roots]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="key-scan")
+        self._lock = threading.Lock()
+        self._cache: Dict[KeyRoot, Tuple[tuple, tuple, List[KeyRecord]]] = {}
+        self._in_flight: Dict[KeyRoot, Future] = {}
+        # Called as listener(root path, entries) after each actual rescan of a root
+        self.listeners: List[Callable[[Path, List[KeyRecord]], None]] = []
+
+    def iter_keys(self, timeout: Optional[float] = None) -> Iterator[KeyRecord]:
+        """
+        Yield key pairs from all roots, root by root as each scan completes
+
+        Args:
+            timeout: Seconds to wait for slow roots before skipping them (None waits for all)
+        """
+        futures = {self._submit(root): root for root in self.roots}
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        pending = set(futures)
+
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                for future in pending:
+                    app_logger.warning(f"Key scan of {futures[future].path} is still running; skipping it for now")
+                return
+            for future in done:
+                root = futures[future]
+                try:
+                    entries = future.result()
+                except Exception as e:
+                    app_logger.error(f"Failed to scan key root {root.path}: {e}")
+                    continue
+                yield from entries
+
+    def invalidate(self, path: Optional[Path] = None):
+        """Drop cached results for the root containing path, or for all roots"""
+        with self._lock:
+            if path is None:
+                self._cache.clear()
+                return
+            path = Path(path)
+            for root in list(self._cache):
+                if path == root.path or root.path in path.parents:
+                    del self._cache[root]
+
+    def root_for(self, path: Path) -> Optional[KeyRoot]:
+        """Return the configured root that contains path, if any"""
+        path = Path(path)
+        for root in self.roots:
+            if path.parent == root.path or (root.recursive and root.path in path.parents):
+                return root
+        return None
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self, root: KeyRoot) -> Future:
+        with self._lock:
+            future = self._in_flight.get(root)
+            if future is None or future.done():
+                future = self._executor.submit(self._scan_cached, root)
+                self._in_flight[root] = future
+            return future
+
+    def _scan_cached(self, root: KeyRoot) -> List[KeyRecord]:
+        signature = self._signature(root)
+        with self._lock:
+            cached = self._cache.get(root)
+        # Files rewritten in place (e.g. a re-signed certificate) leave their directory's mtime alone
+        if cached and cached[0] == signature and cached[1] == self._file_signature(cached[2]):
+            return cached[2]
+
+        started = time.perf_counter()
+        entries = scan_key_root(root)
+        file_signature = self._file_signature(entries)
+        with self._lock:
+            self._cache[root] = (signature, file_signature, entries)
+        for listener in list(self.listeners):
+            try:
+                listener(root.path, entries)
+            except Exception as e:
+                app_logger.warning(f"Inventory listener failed: {e}")
+        app_logger.info(f"Scanned {root.path}: {len(entries)} key pair(s) in {time.perf_counter() - started:.3f}s")
+        return entries
+
+    def _signature(self, root: KeyRoot) -> tuple:
+        """Modification times of every directory a scan of root would read"""
+        signature = []
+        for directory in iter_root_directories(root):
+            try:
+                signature.append((directory, os.stat(directory).st_mtime_ns))
+            except OSError:
+                signature.append((directory, None))
+        return tuple(signature)
+
+    @staticmethod
+    def _file_signature(entries: List[KeyRecord]) -> tuple:
+        """Modification times and sizes of the public keys and certificates behind entries"""
+        signature = []
+        for record in entries:
+            for name in (record.public_name, record.cert_name):
+                if name is None:
+                    continue
+                try:
+                    stat = os.stat(os.path.join(record.directory, name))
+                    signature.append((stat.st_mtime_ns, stat.st_size))
+                except OSError:
+                    signature.append(None)
+        return tuple(signature)
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Key passphrase module for SSH GitHub Configurator
+Adds, changes or removes passphrases on many private keys in parallel, replacing each key atomically
+"""
+
+import os
+import shutil
+import stat
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from logger import app_logger
+from askpass import askpass_env
+from key_record import KeyRecord
+from key_verify import derive_public_blob, read_public_blob
+from process_runner import ProcessRunner, CommandCancelledError, KEYGEN_TIMEOUT
+from ssh_diagnostics import classify, summarize
+
+
+# Keys re-encrypted at the same time; the bcrypt KDF is CPU-bound
+DEFAULT_MAX_WORKERS = os.cpu_count() or 4
+
+# Hidden directory (skipped by the key scanner) holding the previous version of each key
+BACKUP_DIR_NAME = ".passphrase_backups"
+
+# Re-encryption statuses
+STATUS_CHANGED = "changed"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+
+class PassphraseChangeError(Exception):
+    """Raised for a key whose passphrase could not be changed"""
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class PassphraseChanger:
+    """
+    Re-encrypts private keys with 'ssh-keygen -p' on a bounded pool of workers
+
+    ssh-keygen rewrites the file it is given in place, so each key is copied to
+    a private temporary file next to it and re-encrypted there. The copy is then
+    read back and checked against the .pub file. Only then is the old key
+    hard-linked into the backup directory and the copy renamed over it. A
+    failure at any step leaves the original key untouched. Passphrases reach
+    ssh-keygen through the askpass helper, never argv.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, runner: Optional[ProcessRunner] = None):
+        self.max_workers = max_workers
+        self.runner = runner or ProcessRunner(max_concurrent=max_workers)
+
+    def change(self, record: KeyRecord, old_passphrase: Optional[str], new_passphrase: Optional[str],
+               kdf_rounds: Optional[int] = None, backup: bool = True,
+               cancel_event: Optional[threading.Event] = None) -> Dict[str, any]:
+        """
+        Re-encrypt one private key
+
+        Args:
+            record: Key to change
+            old_passphrase: Current passphrase, or None/"" for an unprotected key
+            new_passphrase: New passphrase, or None/"" to remove protection
+            kdf_rounds: bcrypt KDF rounds for the new encryption (ssh-keygen -a)
+            backup: Keep the previous key in BACKUP_DIR_NAME
+
+        Returns:
+            Dict with 'private_path', 'status' (changed/skipped/failed), 'error',
+            'code', 'backup' and 'duration'
+        """
+        started = time.perf_counter()
+        result = {'private_path': str(record.private_path), 'status': STATUS_FAILED, 'error': None,
+                  'code': None, 'backup': None, 'duration': 0.0}
+        if record.read_only:
+            result['status'], result['error'] = STATUS_SKIPPED, "Key is in a read-only key root"
+        else:
+            try:
+                result['backup'] = self._reencrypt(record, old_passphrase or "", new_passphrase or "",
+                                                   kdf_rounds, backup, cancel_event)
+                result['status'] = STATUS_CHANGED
+            except PassphraseChangeError as e:
+                result['error'], result['code'] = str(e), e.code
+            except CommandCancelledError as e:
+                result['error'], result['code'] = str(e), "cancelled"
+            except Exception as e:
+                result['error'], result['code'] = str(e), "os_error"
+
+        result['duration'] = time.perf_counter() - started
+        level = app_logger.warning if result['status'] == STATUS_FAILED else app_logger.info
+        level(f"Passphrase change for {record.private_path}: {result['status']}"
+              f"{' - ' + result['error'] if result['error'] else ''}")
+        return result
+
+    def _reencrypt(self, record: KeyRecord, old_passphrase: str, new_passphrase: str,
+                   kdf_rounds: Optional[int], backup: bool, cancel_event) -> Optional[str]:
+        private_path = record.private_path
+        original_mode = stat.S_IMODE(os.stat(private_path).st_mode)
+        work_path = private_path.with_name(f".{private_path.name}.rekey-{uuid.uuid4().hex[:8]}")
+
+        try:
+            # O_EXCL with 0600 so the copy is never readable by others, even briefly
+            fd = os.open(work_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+            with os.fdopen(fd, "wb") as out, open(private_path, "rb") as src:
+                shutil.copyfileobj(src, out)
+
+            cmd = ["ssh-keygen", "-q", "-p", "-f", str(work_path)]
+            if kdf_rounds:
+                cmd[3:3] = ["-a", str(int(kdf_rounds))]
+            if not old_passphrase:
+                # Fail instead of prompting when the key turns out to be protected
+                cmd[3:3] = ["-P", ""]
+            if not new_passphrase:
+                cmd[3:3] = ["-N", ""]
+            run_kwargs = {}
+            if old_passphrase or new_passphrase:
+                run_kwargs = {"env": askpass_env(new_passphrase, old_passphrase=old_passphrase or None),
+                              "start_new_session": True}
+            completed = self.runner.run(cmd, timeout=KEYGEN_TIMEOUT, cancel_event=cancel_event, **run_kwargs)
+            if completed.returncode != 0:
+                diagnosis = classify(completed.stderr + completed.stdout, "ssh-keygen", completed.returncode)
+                raise PassphraseChangeError(f"ssh-keygen -p failed: {diagnosis.line or diagnosis.code}",
+                                            diagnosis.code)
+
+            self._check_public(work_path, record.public_path, new_passphrase)
+
+            backup_path = self._backup(private_path) if backup else None
+            os.chmod(work_path, original_mode)
+            os.replace(work_path, private_path)
+            return str(backup_path) if backup_path else None
+        finally:
+            try:
+                os.unlink(work_path)
+            except FileNotFoundError:
+                pass
+
+    @staticmethod
+    def _check_public(work_path: Path, public_path: Path, new_passphrase: str):
+        """Check the re-encrypted key still carries the public key from its .pub file"""
+        # OpenSSH-format keys store the public key in clear, so this needs no second KDF run
+        blob, _method = derive_public_blob(work_path, new_passphrase or None)
+        if blob is None:
+            raise PassphraseChangeError("Re-encrypted key could not be read back", "invalid_key_format")
+        try:
+            expected = read_public_blob(public_path)
+        except (OSError, ValueError):
+            return  # No usable .pub to compare against
+        if blob != expected:
+            raise PassphraseChangeError(f"Private key does not match {public_path.name}", "key_mismatch")
+
+    @staticmethod
+    def _backup(private_path: Path) -> Path:
+        backup_dir = private_path.parent / BACKUP_DIR_NAME
+        backup_dir.mkdir(mode=0o700, exist_ok=True)
+        backup_path = backup_dir / f"{private_path.name}.{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        try:
+            # The rename that follows gives the key a new inode, so a hard link keeps the old content
+            os.link(private_path, backup_path)
+        except OSError:
+            shutil.copy2(private_path, backup_path)
+        return backup_path
+
+    def change_many(self, records: Iterable[KeyRecord], old_passphrase: Optional[str],
+                    new_passphrase: Optional[str], kdf_rounds: Optional[int] = None, backup: bool = True,
+                    progress_callback: Optional[Callable[[int, int, Dict[str, any]], None]] = None,
+                    cancel_event: Optional[threading.Event] = None) -> List[Dict[str, any]]:
+        """Re-encrypt all records in parallel, returning one result per record in input order"""
+        records = list(dict.fromkeys(records))
+        results: List[Optional[Dict[str, any]]] = [None] * len(records)
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="rekey") as executor:
+            futures = {executor.submit(self.change, record, old_passphrase, new_passphrase, kdf_rounds,
+                                       backup, cancel_event): index for index, record in enumerate(records)}
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results[futures[future]] = result
+                if progress_callback:
+                    try:
+                        progress_callback(done, len(records), result)
+                    except Exception as e:
+                        app_logger.warning(f"Passphrase progress callback failed: {e}")
+
+        failed = [result for result in results if result['status'] == STATUS_FAILED]
+        changed = sum(1 for result in results if result['status'] == STATUS_CHANGED)
+        app_logger.info(f"Passphrase change finished: {changed}/{len(results)} key(s) changed")
+        if failed:
+            app_logger.warning(f"Passphrase change failures by cause: {summarize(r['code'] for r in failed)}")
+        return results
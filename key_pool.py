@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Key pool module for SSH GitHub Configurator
+Keeps pre-generated key pairs in a private staging directory so new keys can be handed out instantly
+"""
+
+import os
+import shutil
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from logger import app_logger
+from askpass import askpass_env
+from process_runner import ProcessRunner, process_runner, PROBE_TIMEOUT, KEYGEN_TIMEOUT
+
+
+# Default number of ready keys kept per type
+DEFAULT_POOL_SIZES = {"ed25519": 2, "rsa": 1}
+
+# Seconds between checks for an idle system before refilling
+IDLE_POLL_INTERVAL = 1.0
+
+POOL_KEY_NAME = "key"
+CLAIMED_PREFIX = "claimed-"
+
+
+class KeyPool:
+    """
+    A pool of unencrypted, ready-made key pairs per key type
+
+    Layout: <staging>/<type>/<id>/key{,.pub}. A pooled key becomes visible only
+    once both files exist, by renaming its finished build directory into the
+    type directory. Claiming renames the entry to a unique name first, so two
+    threads never receive the same key. Refills run on a dedicated runner and
+    wait until the shared process runner is idle, so they do not compete with
+    commands the user is waiting for; claims run on the shared runner so they
+    never queue behind a refill.
+    """
+
+    def __init__(self, staging_dir: Path, sizes: Optional[Dict[str, int]] = None, refill_workers: int = 1):
+        self.staging_dir = Path(staging_dir)
+        self.sizes = dict(DEFAULT_POOL_SIZES if sizes is None else sizes)
+        self.runner = ProcessRunner(max_concurrent=refill_workers)
+        self._executor = ThreadPoolExecutor(max_workers=refill_workers, thread_name_prefix="key-pool")
+        self._lock = threading.Lock()
+        self._pending: Dict[str, int] = {key_type: 0 for key_type in self.sizes}
+        self._closed = threading.Event()
+        self._prepare()
+
+    def _prepare(self):
+        self.staging_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        os.chmod(self.staging_dir, 0o700)
+        for entry in self.staging_dir.iterdir():
+            # Leftovers from a crash: half-claimed keys and unfinished builds
+            if entry.name.startswith((CLAIMED_PREFIX, ".build-")):
+                shutil.rmtree(entry, ignore_errors=True)
+        for key_type in self.sizes:
+            (self.staging_dir / key_type).mkdir(mode=0o700, exist_ok=True)
+
+    def available(self, key_type: str) -> int:
+        type_dir = self.staging_dir / key_type
+        try:
+            return sum(1 for entry in type_dir.iterdir() if (entry / POOL_KEY_NAME).is_file())
+        except FileNotFoundError:
+            return 0
+
+    def refill(self):
+        """Schedule generation of whatever each type is missing"""
+        if self._closed.is_set():
+            return
+        for key_type, size in self.sizes.items():
+            with self._lock:
+                missing = size - self.available(key_type) - self._pending[key_type]
+                self._pending[key_type] += max(missing, 0)
+            for _ in range(max(missing, 0)):
+                self._executor.submit(self._generate_one, key_type)
+
+    def _generate_one(self, key_type: str):
+        try:
+            # Yield to interactive work: only build while nothing else is running
+            while process_runner.active_commands() and not self._closed.wait(IDLE_POLL_INTERVAL):
+                pass
+            if self._closed.is_set():
+                return
+
+            build_dir = self.staging_dir / f".build-{uuid.uuid4().hex}"
+            build_dir.mkdir(mode=0o700)
+            private_path = build_dir / POOL_KEY_NAME
+            cmd = ["ssh-keygen", "-q", "-t", key_type, "-N", "", "-C", "pool", "-f", str(private_path)]
+            result = self.runner.run(cmd, timeout=KEYGEN_TIMEOUT * 4)
+            if result.returncode != 0 or not private_path.with_suffix(".pub").exists():
+                shutil.rmtree(build_dir, ignore_errors=True)
+                app_logger.warning(f"Key pool could not generate {key_type} key: {result.stderr.strip()}")
+                return
+            os.rename(build_dir, self.staging_dir / key_type / build_dir.name[len(".build-"):])
+            app_logger.debug(f"Key pool: {key_type} key ready ({self.available(key_type)}/{self.sizes[key_type]})")
+        except Exception as e:
+            app_logger.warning(f"Key pool refill failed for {key_type}: {e}")
+        finally:
+            with self._lock:
+                self._pending[key_type] -= 1
+
+    def claim(self, key_type: str, private_path: Path, comment: str, passphrase: str = "",
+              overwrite: bool = False) -> bool:
+        """
+        Move a pooled key to private_path, setting its comment and optional passphrase
+
+        Returns:
+            True if a pooled key was installed, False if none was available
+            (the caller then generates one normally)
+        """
+        type_dir = self.staging_dir / key_type
+        # A pooled key is spent once taken, so leave existing destinations to the normal path's error handling
+        if not overwrite and (Path(private_path).exists() or Path(f"{private_path}.pub").exists()):
+            return False
+        try:
+            candidates = [entry for entry in type_dir.iterdir() if (entry / POOL_KEY_NAME).is_file()]
+        except FileNotFoundError:
+            return False
+
+        for entry in candidates:
+            claimed = self.staging_dir / f"{CLAIMED_PREFIX}{entry.name}"
+            try:
+                os.rename(entry, claimed)
+            except OSError:
+                continue  # Another thread claimed it first
+            try:
+                self._install(claimed, Path(private_path), comment, passphrase, overwrite)
+                app_logger.info(f"Claimed pooled {key_type} key for {private_path}")
+                return True
+            except Exception as e:
+                app_logger.warning(f"Could not use pooled {key_type} key: {e}")
+                return False
+            finally:
+                shutil.rmtree(claimed, ignore_errors=True)
+                self.refill()
+        return False
+
+    def _install(self, claimed: Path, private_path: Path, comment: str, passphrase: str, overwrite: bool):
+        key = claimed / POOL_KEY_NAME
+        result = process_runner.run(["ssh-keygen", "-q", "-c", "-P", "", "-C", comment, "-f", str(key)],
+                                    timeout=PROBE_TIMEOUT)
+        if result.returncode != 0:
+            raise RuntimeError(f"ssh-keygen -c failed: {result.stderr.strip()}")
+        if passphrase:
+            # New passphrase comes from the askpass helper, never the command line
+            result = process_runner.run(["ssh-keygen", "-q", "-p", "-P", "", "-f", str(key)], timeout=PROBE_TIMEOUT,
+                                        env=askpass_env(passphrase), start_new_session=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"ssh-keygen -p failed: {result.stderr.strip()}")
+
+        public_path = Path(f"{private_path}.pub")
+        if overwrite:
+            os.replace(key.with_suffix(".pub"), public_path)
+            os.replace(key, private_path)
+            return
+        # link() fails instead of clobbering a key created in the meantime
+        os.link(key, private_path)
+        try:
+            os.link(key.with_suffix(".pub"), public_path)
+        except OSError:
+            private_path.unlink()
+            raise
+
+    def close(self):
+        self._closed.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
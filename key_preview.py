@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Key preview module for SSH GitHub Configurator
+Bounded LRU cache of public key file contents for the key list preview
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from logger import app_logger
+from key_record import KeyRecord
+
+
+# Default number of public keys kept in memory
+DEFAULT_PREVIEW_ENTRIES = 512
+
+
+class PublicKeyCache:
+    """
+    LRU cache of .pub contents validated by modification time
+
+    peek() never touches the disk, so the Tk thread can call it freely.
+    load() stats the file and rereads it only when its mtime or size changed; it
+    is meant for worker threads. sync_root() is registered with the key
+    inventory so rescans drop stale and vanished entries.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_PREVIEW_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[tuple, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, path) -> bool:
+        with self._lock:
+            return str(path) in self._entries
+
+    def peek(self, path) -> Optional[str]:
+        """Cached content without any I/O, or None"""
+        key = str(path)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                return None
+            self._entries.move_to_end(key)
+            return cached[1]
+
+    def load(self, path) -> str:
+        """Content of path, reading the file only if it changed since it was cached"""
+        key = str(path)
+        st = os.stat(key)
+        stamp = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == stamp:
+                self._entries.move_to_end(key)
+                return cached[1]
+
+        with open(key, "r", encoding="utf-8", errors="replace") as f:
+            content = f.read().strip()
+        self._store(key, stamp, content)
+        return content
+
+    def _store(self, key: str, stamp: tuple, content: str):
+        with self._lock:
+            self._entries[key] = (stamp, content)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path=None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(str(path), None)
+
+    def sync_root(self, root_path: Path, entries: Iterable[KeyRecord]):
+        """Inventory listener: drop cached keys under root_path whose file changed or disappeared"""
+        current: Dict[str, Optional[int]] = {
+            os.path.join(record.directory, record.public_name): record.public_mtime_ns for record in entries
+        }
+        prefix = str(root_path).rstrip(os.sep) + os.sep
+        dropped = 0
+        with self._lock:
+            for key in list(self._entries):
+                if not key.startswith(prefix):
+                    continue
+                mtime_ns = current.get(key, -1)
+                if mtime_ns == -1 or (mtime_ns is not None and mtime_ns != self._entries[key][0][0]):
+                    del self._entries[key]
+                    dropped += 1
+        if dropped:
+            app_logger.debug(f"Public key cache: dropped {dropped} stale entr(ies) under {root_path}")
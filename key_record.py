@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Key record module for SSH GitHub Configurator
+Compact immutable description of one SSH key pair, shared by all inventory callers
+"""
+
+import base64
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+_UNSET = object()
+
+
+class KeyRecord:
+    """
+    One private/public key pair found in a key root
+
+    Paths are stored as an interned directory string plus file names rather
+    than Path objects, so records in the same directory share their directory
+    string. The fingerprint, key size, modification time and certificate
+    details are computed on first access and then kept. Records are immutable
+    and hashable by their paths.
+    """
+
+    __slots__ = ("directory", "name", "public_name", "type", "root", "read_only", "public_mtime_ns",
+                 "cert_name", "_fingerprint", "_bits", "_mtime", "_certificate")
+
+    def __init__(self, directory: str, name: str, public_name: str, key_type: str = "unknown",
+                 root: Optional[Path] = None, read_only: bool = False, public_mtime_ns: Optional[int] = None,
+                 cert_name: Optional[str] = None):
+        setter = object.__setattr__
+        setter(self, "directory", sys.intern(str(directory)))
+        setter(self, "name", name)
+        setter(self, "public_name", public_name)
+        setter(self, "type", sys.intern(key_type))
+        setter(self, "root", root)
+        setter(self, "read_only", read_only)
+        setter(self, "public_mtime_ns", public_mtime_ns)
+        setter(self, "cert_name", cert_name)
+        setter(self, "_fingerprint", _UNSET)
+        setter(self, "_bits", _UNSET)
+        setter(self, "_mtime", _UNSET)
+        setter(self, "_certificate", _UNSET)
+
+    @classmethod
+    def from_paths(cls, private_path: Union[str, Path], public_path: Union[str, Path], key_type: str = "unknown",
+                   root: Optional[Path] = None, read_only: bool = False,
+                   public_mtime_ns: Optional[int] = None, cert_name: Optional[str] = None) -> "KeyRecord":
+        private_path, public_path = Path(private_path), Path(public_path)
+        return cls(str(private_path.parent), private_path.name, public_path.name, key_type,
+                   root, read_only, public_mtime_ns, cert_name)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "KeyRecord":
+        """Rebuild a record from to_dict() output (e.g. a daemon response)"""
+        root, cert_path = data.get('root'), data.get('cert_path')
+        return cls.from_paths(data['private_path'], data['public_path'], data.get('type', "unknown"),
+                              Path(root) if root else None, bool(data.get('read_only')),
+                              data.get('public_mtime_ns'), Path(cert_path).name if cert_path else None)
+
+    def to_dict(self) -> Dict[str, any]:
+        """JSON-compatible form"""
+        return {
+            'type': self.type,
+            'private_path': str(self.private_path),
+            'public_path': str(self.public_path),
+            'root': str(self.root) if self.root is not None else None,
+            'read_only': self.read_only,
+            'public_mtime_ns': self.public_mtime_ns,
+            'cert_path': str(self.cert_path) if self.cert_name else None,
+        }
+
+    @property
+    def private_path(self) -> Path:
+        return Path(self.directory, self.name)
+
+    @property
+    def public_path(self) -> Path:
+        return Path(self.directory, self.public_name)
+
+    @property
+    def cert_path(self) -> Optional[Path]:
+        return Path(self.directory, self.cert_name) if self.cert_name else None
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """SHA256 fingerprint of the public key, or None if it cannot be read"""
+        if self._fingerprint is _UNSET:
+            from key_verify import fingerprint
+            blob = self._public_fields()[1]
+            try:
+                value = fingerprint(base64.b64decode(blob)) if blob else None
+            except ValueError:
+                value = None
+            object.__setattr__(self, "_fingerprint", value)
+        return self._fingerprint
+
+    @property
+    def bits(self) -> Optional[int]:
+        """Key size in bits, or None if unknown"""
+        if self._bits is _UNSET:
+            from key_audit import key_bits
+            algorithm, blob = self._public_fields()
+            object.__setattr__(self, "_bits", key_bits(algorithm, blob) if blob else None)
+        return self._bits
+
+    @property
+    def mtime(self) -> Optional[float]:
+        """Modification time of the private key, or None if it is gone"""
+        if self._mtime is _UNSET:
+            try:
+                value = os.stat(os.path.join(self.directory, self.name)).st_mtime
+            except OSError:
+                value = None
+            object.__setattr__(self, "_mtime", value)
+        return self._mtime
+
+    @property
+    def certificate(self) -> Optional[Dict[str, any]]:
+        """Decoded OpenSSH certificate for this key (see ssh_ca.parse_certificate), or None"""
+        if self._certificate is _UNSET:
+            value = None
+            if self.cert_name:
+                from ssh_ca import parse_certificate
+                try:
+                    value = parse_certificate(os.path.join(self.directory, self.cert_name))
+                except (OSError, ValueError, struct.error):
+                    value = None
+            object.__setattr__(self, "_certificate", value)
+        return self._certificate
+
+    @property
+    def cert_expires(self) -> Optional[int]:
+        """Certificate expiry as epoch seconds, or None without a certificate or for one that never expires"""
+        certificate = self.certificate
+        return certificate['valid_before'] if certificate else None
+
+    def _public_fields(self):
+        try:
+            with open(os.path.join(self.directory, self.public_name), "r", encoding="utf-8") as f:
+                parts = f.readline().split()
+        except OSError:
+            return "", ""
+        return (parts[0], parts[1]) if len(parts) >= 2 else ("", "")
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"KeyRecord is immutable (cannot set {name})")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"KeyRecord is immutable (cannot delete {name})")
+
+    def __reduce__(self):
+        return (KeyRecord, (self.directory, self.name, self.public_name, self.type,
+                            self.root, self.read_only, self.public_mtime_ns, self.cert_name))
+
+    def _identity(self):
+        return (self.directory, self.name, self.public_name)
+
+    def __eq__(self, other):
+        if not isinstance(other, KeyRecord):
+            return NotImplemented
+        return self._identity() == other._identity()
+
+    def __hash__(self):
+        return hash(self._identity())
+
+    def __repr__(self):
+        return f"KeyRecord({self.type}, {self.private_path})"
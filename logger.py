@@ -10,6 +10,11 @@ from pathlib import Path
 from datetime import datetime
 
 
+def log_directory() -> Path:
+    """Directory holding the log files (and diagnostic reports written next to them)"""
+    return Path.home() / ".ssh_github_configurator_logs"
+
+
 class AppLogger:
     """Centralized logging class for the application"""
     
@@ -24,7 +29,7 @@ class AppLogger:
     def _setup_handlers(self):
         """Setup logging handlers for file and console output"""
         # Create logs directory if it doesn't exist
-        log_dir = Path.home() / ".ssh_github_configurator_logs"
+        log_dir = log_directory()
         log_dir.mkdir(exist_ok=True)
         
         # File handler
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Process runner module for SSH GitHub Configurator
+Provides a shared, cancellable subprocess runner usable from threads and asyncio
+"""
+
+import asyncio
+import subprocess
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Sequence
+
+from logger import app_logger
+
+
+# Default timeouts (seconds) for the kinds of commands the application runs
+PROBE_TIMEOUT = 10
+AGENT_TIMEOUT = 15
+KEYGEN_TIMEOUT = 30
+CONNECT_TIMEOUT = 45
+
+# Seconds between cancellation and timeout checks while a command waits for a slot
+SLOT_POLL_INTERVAL = 0.05
+
+LineCallback = Callable[[str], None]
+
+
+class CommandCancelledError(Exception):
+    """Raised when a running command is cancelled"""
+    pass
+
+
+@dataclass
+class CommandResult:
+    """Result of a finished command, compatible with subprocess.CompletedProcess"""
+    args: List[str]
+    returncode: int
+    stdout: str
+    stderr: str
+    duration: float
+
+
+@dataclass
+class CommandTiming:
+    """Timing record for a single command execution"""
+    command: str
+    started_at: float
+    duration: float
+    returncode: Optional[int]
+    status: str = "ok"
+
+
+@dataclass
+class _ActiveCommand:
+    """Bookkeeping for a command currently running"""
+    args: List[str]
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
+
+class ProcessRunner:
+    """Runs external commands with streaming output, cancellation and concurrency limits"""
+
+    def __init__(self, max_concurrent: int = 4, history_size: int = 500):
+        self.max_concurrent = max_concurrent
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._active: Dict[int, _ActiveCommand] = {}
+        # Commands blocked in run() waiting for a slot, by id() of their record
+        self._waiting: Dict[int, _ActiveCommand] = {}
+        self._next_id = 0
+        self._timings = deque(maxlen=history_size)
+        # Threads run_async() waits on for a slot; created on first contention
+        self._slot_waiters: Optional[ThreadPoolExecutor] = None
+
+    def run(self, args: Sequence[str], timeout: Optional[float] = None,
+            input_text: Optional[str] = None, check: bool = False,
+            on_stdout: Optional[LineCallback] = None,
+            on_stderr: Optional[LineCallback] = None,
+            cancel_event: Optional[threading.Event] = None,
+            cwd=None, env=None, capture_output: bool = True,
+            start_new_session: bool = False) -> CommandResult:
+        """
+        Run a command in the calling thread, streaming output lines to callbacks
+
+        Args:
+            args: Command and arguments
+            timeout: Seconds, including any wait for a free slot, before the command is killed (None for no limit)
+            input_text: Text written to the command's stdin
+            check: Raise subprocess.CalledProcessError on non-zero exit
+            on_stdout: Called with each stdout line as it is produced
+            on_stderr: Called with each stderr line as it is produced
+            cancel_event: Event that cancels the command when set, also while it waits for a slot
+            cwd: Working directory for the command
+            env: Environment for the command
+            capture_output: Pipe stdout/stderr. Disable for commands that fork a
+                background process holding the pipes open (e.g. xclip).
+            start_new_session: Detach the command from the controlling terminal
+
+        Returns:
+            CommandResult with collected output and duration
+
+        Raises:
+            FileNotFoundError: If the executable does not exist
+            subprocess.TimeoutExpired: If the timeout is exceeded
+            CommandCancelledError: If the command was cancelled
+        """
+        args = [str(arg) for arg in args]
+        # The timeout covers the wait for a slot as well as the command
+        deadline = time.perf_counter() + timeout if timeout is not None else None
+        active = self._acquire_slot_blocking(args, cancel_event, deadline, timeout)
+        command_id = self._register(active)
+        status = "ok"
+        returncode = None
+
+        # Durations cover the command itself, not the wait for a slot
+        started = time.perf_counter()
+        try:
+            app_logger.debug(f"Running command: {' '.join(args)}")
+            process = subprocess.Popen(
+                args,
+                stdin=subprocess.PIPE if input_text is not None else subprocess.DEVNULL,
+                stdout=subprocess.PIPE if capture_output else subprocess.DEVNULL,
+                stderr=subprocess.PIPE if capture_output else subprocess.DEVNULL,
+                text=True,
+                errors="replace",
+                cwd=cwd,
+                env=env,
+                start_new_session=start_new_session
+            )
+
+            stdout_lines: List[str] = []
+            stderr_lines: List[str] = []
+            readers = []
+            if capture_output:
+                readers = [
+                    threading.Thread(target=self._pump, args=(process.stdout, stdout_lines, on_stdout), daemon=True),
+                    threading.Thread(target=self._pump, args=(process.stderr, stderr_lines, on_stderr), daemon=True),
+                ]
+            for reader in readers:
+                reader.start()
+
+            if input_text is not None:
+                try:
+                    process.stdin.write(input_text)
+                    process.stdin.close()
+                except (BrokenPipeError, OSError):
+                    pass
+
+            while True:
+                try:
+                    returncode = process.wait(timeout=0.05)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+
+                if active.cancel_event.is_set() or (cancel_event is not None and cancel_event.is_set()):
+                    self._terminate(process)
+                    status = "cancelled"
+                    raise CommandCancelledError(f"Command cancelled: {args[0]}")
+
+                if deadline is not None and time.perf_counter() > deadline:
+                    self._terminate(process)
+                    status = "timeout"
+                    raise subprocess.TimeoutExpired(args, timeout)
+
+            for reader in readers:
+                reader.join(timeout=1)
+
+            result = CommandResult(
+                args=args,
+                returncode=returncode,
+                stdout="".join(stdout_lines),
+                stderr="".join(stderr_lines),
+                duration=time.perf_counter() - started
+            )
+
+            if check and returncode != 0:
+                status = "failed"
+                raise subprocess.CalledProcessError(returncode, args, output=result.stdout, stderr=result.stderr)
+
+            return result
+
+        except FileNotFoundError:
+            status = "not_found"
+            raise
+        finally:
+            self._slots.release()
+            self._unregister(command_id)
+            self._record(args, started, returncode, status)
+
+    async def run_async(self, args: Sequence[str], timeout: Optional[float] = None,
+                        input_text: Optional[str] = None, check: bool = False,
+                        on_stdout: Optional[LineCallback] = None,
+                        on_stderr: Optional[LineCallback] = None,
+                        cancel_event: Optional[threading.Event] = None,
+                        cwd=None, env=None, start_new_session: bool = False) -> CommandResult:
+        """
+        Run a command from asyncio, sharing the same concurrency limit as run()
+
+        Accepts the same arguments as run(). Cancelling the awaiting task also
+        terminates the child process.
+        """
+        args = [str(arg) for arg in args]
+        status = "ok"
+        returncode = None
+        loop = asyncio.get_running_loop()
+
+        await self._acquire_slot()
+        active = _ActiveCommand(args=args)
+        command_id = self._register(active)
+        started = time.perf_counter()
+        process = None
+        try:
+            app_logger.debug(f"Running command (async): {' '.join(args)}")
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                stdin=asyncio.subprocess.PIPE if input_text is not None else asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd,
+                env=env,
+                start_new_session=start_new_session
+            )
+
+            stdout_lines: List[str] = []
+            stderr_lines: List[str] = []
+
+            async def pump(stream, lines, callback):
+                while True:
+                    raw = await stream.readline()
+                    if not raw:
+                        break
+                    line = raw.decode("utf-8", errors="replace")
+                    lines.append(line)
+                    if callback:
+                        try:
+                            callback(line.rstrip("\n"))
+                        except Exception as e:
+                            app_logger.warning(f"Output callback failed: {e}")
+
+            async def feed():
+                if input_text is not None:
+                    try:
+                        process.stdin.write(input_text.encode("utf-8"))
+                        await process.stdin.drain()
+                        process.stdin.close()
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass
+
+            async def watch_cancel():
+                while not (active.cancel_event.is_set() or (cancel_event is not None and cancel_event.is_set())):
+                    await asyncio.sleep(0.05)
+
+            work = asyncio.gather(
+                feed(),
+                pump(process.stdout, stdout_lines, on_stdout),
+                pump(process.stderr, stderr_lines, on_stderr),
+                process.wait()
+            )
+            watcher = loop.create_task(watch_cancel())
+            done, _ = await asyncio.wait({work, watcher}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            watcher.cancel()
+
+            if work not in done:
+                work.cancel()
+                # Retrieve the cancellation so it is not reported as unhandled
+                work.add_done_callback(lambda future: future.cancelled() or future.exception())
+                if watcher in done:
+                    status = "cancelled"
+                    raise CommandCancelledError(f"Command cancelled: {args[0]}")
+                status = "timeout"
+                raise subprocess.TimeoutExpired(args, timeout)
+
+            returncode = process.returncode
+            result = CommandResult(
+                args=args,
+                returncode=returncode,
+                stdout="".join(stdout_lines),
+                stderr="".join(stderr_lines),
+                duration=time.perf_counter() - started
+            )
+
+            if check and returncode != 0:
+                status = "failed"
+                raise subprocess.CalledProcessError(returncode, args, output=result.stdout, stderr=result.stderr)
+
+            return result
+
+        except FileNotFoundError:
+            status = "not_found"
+            raise
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
+        finally:
+            if process is not None and process.returncode is None:
+                try:
+                    process.kill()
+                    await process.wait()
+                except ProcessLookupError:
+                    pass
+            self._slots.release()
+            self._unregister(command_id)
+            self._record(args, started, returncode, status)
+
+    def _acquire_slot_blocking(self, args: List[str], cancel_event: Optional[threading.Event],
+                               deadline: Optional[float], timeout: Optional[float]) -> _ActiveCommand:
+        """Wait for a concurrency slot, giving up on cancellation or at the deadline"""
+        active = _ActiveCommand(args=args)
+        if self._slots.acquire(blocking=False):
+            return active
+        # Waiting commands can be cancelled by cancel_all() but are not listed as running
+        with self._lock:
+            self._waiting[id(active)] = active
+        try:
+            while not self._slots.acquire(timeout=SLOT_POLL_INTERVAL):
+                if active.cancel_event.is_set() or (cancel_event is not None and cancel_event.is_set()):
+                    self._record(args, time.perf_counter(), None, "cancelled")
+                    raise CommandCancelledError(f"Command cancelled while queued: {args[0]}")
+                if deadline is not None and time.perf_counter() > deadline:
+                    self._record(args, time.perf_counter(), None, "timeout")
+                    raise subprocess.TimeoutExpired(args, timeout)
+        finally:
+            with self._lock:
+                del self._waiting[id(active)]
+        return active
+
+    async def _acquire_slot(self):
+        """Wait for a concurrency slot without blocking or polling the event loop"""
+        if self._slots.acquire(blocking=False):
+            return
+        with self._lock:
+            if self._slot_waiters is None:
+                # One waiting thread per slot; further waiters queue in order behind them
+                self._slot_waiters = ThreadPoolExecutor(max_workers=self.max_concurrent,
+                                                        thread_name_prefix="process-slot")
+        acquired = asyncio.get_running_loop().run_in_executor(self._slot_waiters, self._slots.acquire)
+        try:
+            await asyncio.shield(acquired)
+        except asyncio.CancelledError:
+            # The waiting thread still takes the slot; hand it back once it has
+            acquired.add_done_callback(lambda future: future.cancelled() or self._slots.release())
+            raise
+
+    def cancel_all(self) -> int:
+        """Cancel every running or queued command. Returns the number of commands signalled."""
+        with self._lock:
+            active = list(self._active.values()) + list(self._waiting.values())
+        for command in active:
+            command.cancel_event.set()
+        if active:
+            app_logger.info(f"Cancelling {len(active)} running command(s)")
+        return len(active)
+
+    def active_commands(self) -> List[str]:
+        """Return the command lines currently running"""
+        with self._lock:
+            return [" ".join(command.args) for command in self._active.values()]
+
+    def get_timings(self) -> List[CommandTiming]:
+        """Return the recorded timings of recent commands, oldest first"""
+        with self._lock:
+            return list(self._timings)
+
+    def _register(self, active: _ActiveCommand) -> int:
+        """Record a command that holds a slot"""
+        with self._lock:
+            command_id = self._next_id
+            self._next_id += 1
+            self._active[command_id] = active
+        return command_id
+
+    def _unregister(self, command_id: int):
+        with self._lock:
+            self._active.pop(command_id, None)
+
+    def _record(self, args: List[str], started: float, returncode: Optional[int], status: str):
+        duration = time.perf_counter() - started
+        timing = CommandTiming(
+            command=args[0] if args else "",
+            started_at=time.time() - duration,
+            duration=duration,
+            returncode=returncode,
+            status=status
+        )
+        with self._lock:
+            self._timings.append(timing)
+        app_logger.debug(f"Command {timing.command} finished in {duration:.3f}s ({status}, exit code {returncode})")
+
+    @staticmethod
+    def _pump(stream, lines: List[str], callback: Optional[LineCallback]):
+        """Read a stream line by line, forwarding each line to the callback"""
+        try:
+            for line in iter(stream.readline, ""):
+                lines.append(line)
+                if callback:
+                    try:
+                        callback(line.rstrip("\n"))
+                    except Exception as e:
+                        app_logger.warning(f"Output callback failed: {e}")
+        finally:
+            stream.close()
+
+    @staticmethod
+    def _terminate(process: subprocess.Popen):
+        """Terminate a process, killing it if it does not exit promptly"""
+        try:
+            process.terminate()
+            process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        except OSError:
+            pass
+
+
+# Global runner instance
+process_runner = ProcessRunner()
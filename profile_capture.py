@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Profile capture module for SSH GitHub Configurator
+On-demand cProfile and tracemalloc capture of the next operations or a time window, reported next to the logs
+"""
+
+import cProfile
+import io
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from logger import app_logger, log_directory
+
+
+# Operations profiled when neither a count nor a duration is given
+DEFAULT_OPERATIONS = 20
+
+# Functions listed in the text report, sorted by cumulative time
+REPORT_FUNCTIONS = 40
+
+# Allocation sites listed in the allocation report
+TOP_ALLOCATIONS = 25
+
+# Stack frames kept per traced allocation
+TRACE_FRAMES = 10
+
+# From Python 3.12 cProfile runs on sys.monitoring: one profiler sees every thread and no second one can start
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+
+class ProfileCapture:
+    """
+    One cProfile/tracemalloc capture
+
+    The thread that calls start() (the Tk thread in the UI) is profiled for
+    the whole capture. Before Python 3.12 cProfile only sees the thread that
+    enabled it, so each operation passed through run() (scheduler tasks, on
+    their worker threads) gets its own profiler and stop() merges them into
+    one pstats file. From 3.12 the single profiler already covers every
+    thread and run() only counts operations. tracemalloc traces every thread.
+
+    The capture ends after `operations` calls to run(), after `duration`
+    seconds (the owner schedules stop(); on_limit only reports the count
+    limit), or when stop() is called. start() and stop() must run on the
+    same thread.
+    """
+
+    def __init__(self, operations: Optional[int] = None, duration: Optional[float] = None,
+                 output_dir: Optional[Path] = None, on_limit: Optional[Callable[[], None]] = None):
+        if operations is None and duration is None:
+            operations = DEFAULT_OPERATIONS
+        self.operations = operations
+        self.duration = duration
+        self.output_dir = Path(output_dir) if output_dir else log_directory()
+        self.on_limit = on_limit
+
+        self._lock = threading.Lock()
+        self._profiles: List[cProfile.Profile] = []
+        self._main_profile: Optional[cProfile.Profile] = None
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._owns_tracemalloc = False
+        self._started_at = 0.0
+        self._main_thread: Optional[int] = None
+        # Operations let in so far; concurrent operations count before they finish
+        self._admitted = 0
+        self.completed = 0
+        self.active = False
+
+    def describe(self) -> str:
+        """Human readable limit, e.g. '20 operations' or '30s'"""
+        parts = []
+        if self.operations is not None:
+            parts.append(f"{self.operations} operations")
+        if self.duration is not None:
+            parts.append(f"{self.duration:g}s")
+        return " or ".join(parts)
+
+    def start(self):
+        """Start tracing allocations and profiling the calling thread"""
+        if self.active:
+            return
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(TRACE_FRAMES)
+            self._owns_tracemalloc = True
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.take_snapshot()
+        self._main_profile = cProfile.Profile()
+        try:
+            self._main_profile.enable()
+        except ValueError as e:
+            # Python 3.12+: a debugger, coverage tool or another capture already holds the profiler slot
+            if self._owns_tracemalloc:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+            raise RuntimeError(f"Cannot start profiling: {e}")
+        self._started_at = time.monotonic()
+        self._main_thread = threading.get_ident()
+        self.active = True
+        app_logger.info(f"Profiling started (next {self.describe()})")
+
+    def run(self, name: str, func: Callable, *args):
+        """Call func(*args) under its own profiler while the capture is active"""
+        with self._lock:
+            if not self.active or (self.operations is not None and self._admitted >= self.operations):
+                return func(*args)
+            self._admitted += 1
+            # The main profiler already covers this call: it runs on the starting thread, or on 3.12+ anywhere
+            covered = PROCESS_WIDE_PROFILER or threading.get_ident() == self._main_thread
+            profile = None if covered else cProfile.Profile()
+            if profile is not None:
+                self._profiles.append(profile)
+
+        try:
+            return profile.runcall(func, *args) if profile is not None else func(*args)
+        finally:
+            with self._lock:
+                self.completed += 1
+                reached = self.operations is not None and self.completed == self.operations
+            app_logger.debug(f"Profiled operation {self.completed}: {name}")
+            if reached and self.on_limit:
+                self.on_limit()
+
+    def stop(self) -> Dict[str, any]:
+        """
+        End the capture and write the reports
+
+        Returns:
+            Dict with 'pstats', 'report' and 'allocations' paths, 'operations' and 'seconds'
+        """
+        if not self.active:
+            raise RuntimeError("Profile capture is not running")
+        self._main_profile.disable()
+        with self._lock:
+            self.active = False
+            # Only profiles that recorded something can be loaded into pstats
+            profiles = [profile for profile in [self._main_profile] + self._profiles if profile.getstats()]
+        elapsed = time.monotonic() - self._started_at
+
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d_%H%M%S")
+        base = self.output_dir / f"profile_{stamp}"
+        paths = {'pstats': base.with_suffix(".pstats"),
+                 'report': base.with_name(f"{base.name}_report.txt"),
+                 'allocations': base.with_name(f"{base.name}_allocations.txt")}
+
+        stats = pstats.Stats(*profiles) if profiles else pstats.Stats()
+        stats.dump_stats(str(paths['pstats']))
+        paths['report'].write_text(self._format_report(stats, elapsed), encoding="utf-8")
+        paths['allocations'].write_text(self._format_allocations(snapshot, current, peak), encoding="utf-8")
+
+        app_logger.info(f"Profiling finished after {self.completed} operations in {elapsed:.1f}s; "
+                        f"reports written to {self.output_dir}")
+        result = {name: str(path) for name, path in paths.items()}
+        result.update({'operations': self.completed, 'seconds': elapsed})
+        return result
+
+    def _format_report(self, stats: pstats.Stats, elapsed: float) -> str:
+        stream = io.StringIO()
+        stream.write(f"Profile capture: {self.completed} operations in {elapsed:.3f}s "
+                     f"(limit: {self.describe()})\n")
+        stream.write("Times of operations running on different threads are summed.\n")
+        stream.write("Load the .pstats file with: python -m pstats <file>\n\n")
+        stats.stream = stream
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(REPORT_FUNCTIONS)
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(REPORT_FUNCTIONS)
+        return stream.getvalue()
+
+    def _format_allocations(self, snapshot: tracemalloc.Snapshot, current: int, peak: int) -> str:
+        # Leave out allocations made by the profilers and tracemalloc themselves
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__),
+                   tracemalloc.Filter(False, cProfile.__file__),
+                   tracemalloc.Filter(False, pstats.__file__),
+                   tracemalloc.Filter(False, __file__)]
+        snapshot = snapshot.filter_traces(filters)
+        lines = [f"Traced memory: {current / 1024:.1f} KiB current, {peak / 1024:.1f} KiB peak", ""]
+
+        lines.append(f"Top {TOP_ALLOCATIONS} allocation sites (live at the end of the capture):")
+        for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+            lines.append(f"  {stat}")
+
+        if self._baseline is not None:
+            baseline = self._baseline.filter_traces(filters)
+            lines += ["", f"Top {TOP_ALLOCATIONS} changes since the capture started:"]
+            for stat in snapshot.compare_to(baseline, "lineno")[:TOP_ALLOCATIONS]:
+                lines.append(f"  {stat}")
+
+        top = snapshot.statistics("traceback")[:3]
+        for index, stat in enumerate(top, 1):
+            lines += ["", f"Traceback of allocation site #{index} ({stat.size / 1024:.1f} KiB, "
+                          f"{stat.count} blocks):"]
+            lines += [f"  {line}" for line in stat.traceback.format()]
+        return "\n".join(lines) + "\n"
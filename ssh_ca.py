@@ -0,0 +1,487 @@
+#!/usr/bin/env python3
+"""
+SSH CA module for SSH GitHub Configurator
+Signs user and host public keys into short-lived OpenSSH certificates and renews them before they expire
+
+Usage:
+    python ssh_ca.py init --ca ~/.ssh/ca/user_ca
+    python ssh_ca.py sign --ca ~/.ssh/ca/user_ca -n alice,deploy [--validity=-5m:+1d] KEY.pub ...
+    python ssh_ca.py list [ROOT ...]
+    python ssh_ca.py renew --ca ~/.ssh/ca/user_ca [--within 6h] [ROOT ...]
+"""
+
+import argparse
+import base64
+import contextlib
+import json
+import os
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from logger import app_logger
+from askpass import askpass_env, resolve_passphrase, stdin_passphrase, PassphraseSource
+from key_inventory import KeyRoot, scan_key_root, CERT_SUFFIX
+from key_record import KeyRecord
+from key_verify import fingerprint, _read_string
+from process_runner import ProcessRunner, CommandCancelledError, PROBE_TIMEOUT, AGENT_TIMEOUT, KEYGEN_TIMEOUT
+from ssh_diagnostics import classify, summarize
+
+
+# Default validity: backdated a little for clock skew, one day ahead
+DEFAULT_VALIDITY = "-5m:+1d"
+
+# Certificates expiring within this many seconds are renewed
+DEFAULT_RENEW_WITHIN = 6 * 3600
+
+# Public keys signed per ssh-keygen invocation when they share a key id
+SIGN_CHUNK_SIZE = 64
+
+# Signing statuses
+STATUS_SIGNED = "signed"
+STATUS_CURRENT = "current"
+STATUS_SKIPPED = "skipped"
+STATUS_FAILED = "failed"
+
+# Key-specific fields between the nonce and the serial, per certificate type
+CERT_KEY_FIELDS = {
+    "ssh-rsa-cert-v01@openssh.com": 2,
+    "ssh-dss-cert-v01@openssh.com": 4,
+    "ecdsa-sha2-nistp256-cert-v01@openssh.com": 2,
+    "ecdsa-sha2-nistp384-cert-v01@openssh.com": 2,
+    "ecdsa-sha2-nistp521-cert-v01@openssh.com": 2,
+    "ssh-ed25519-cert-v01@openssh.com": 1,
+    "sk-ecdsa-sha2-nistp256-cert-v01@openssh.com": 3,
+    "sk-ssh-ed25519-cert-v01@openssh.com": 2,
+}
+
+# Extensions ssh-keygen -O accepts by name
+STANDARD_EXTENSIONS = {"permit-X11-forwarding", "permit-agent-forwarding", "permit-port-forwarding",
+                       "permit-pty", "permit-user-rc", "no-touch-required"}
+
+_FOREVER = 0xFFFFFFFFFFFFFFFF
+_TIME_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def cert_path_for(public_path) -> Path:
+    """Where ssh-keygen -s writes the certificate for a public key file"""
+    public_path = Path(public_path)
+    stem = public_path.name[:-4] if public_path.name.endswith(".pub") else public_path.name
+    return public_path.with_name(stem + CERT_SUFFIX)
+
+
+def parse_duration(value: str) -> int:
+    """Seconds in an OpenSSH time interval such as '6h', '1d12h' or '3600'"""
+    value = value.strip()
+    if value.isdigit():
+        return int(value)
+    parts = re.findall(r"(\d+)([smhdwSMHDW])", value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        raise ValueError(f"Invalid time interval: {value}")
+    return sum(int(number) * _TIME_UNITS[unit.lower()] for number, unit in parts)
+
+
+def _string_list(data: bytes) -> List[str]:
+    items, offset = [], 0
+    while offset < len(data):
+        item, offset = _read_string(data, offset)
+        items.append(item.decode("utf-8", "replace"))
+    return items
+
+
+def _option_map(data: bytes) -> Dict[str, str]:
+    """Critical options / extensions: name followed by a (possibly empty) wrapped string value"""
+    options, offset = {}, 0
+    while offset < len(data):
+        name, offset = _read_string(data, offset)
+        value, offset = _read_string(data, offset)
+        if value:
+            value, _ = _read_string(value, 0)
+        options[name.decode("utf-8", "replace")] = value.decode("utf-8", "replace")
+    return options
+
+
+def parse_certificate_blob(blob: bytes) -> Dict[str, any]:
+    """
+    Decode an OpenSSH certificate (PROTOCOL.certkeys) without calling ssh-keygen
+
+    Returns:
+        Dict with 'type', 'serial', 'cert_type' (user/host), 'key_id', 'principals',
+        'valid_after'/'valid_before' (epoch seconds, None when unbounded),
+        'critical_options', 'extensions' and 'ca_fingerprint'
+    """
+    algorithm, offset = _read_string(blob, 0)
+    algorithm = algorithm.decode("ascii", "replace")
+    if algorithm not in CERT_KEY_FIELDS:
+        raise ValueError(f"Not a supported certificate type: {algorithm}")
+    _, offset = _read_string(blob, offset)  # nonce
+    for _ in range(CERT_KEY_FIELDS[algorithm]):
+        _, offset = _read_string(blob, offset)
+    serial, kind = struct.unpack(">QI", blob[offset:offset + 12])
+    key_id, offset = _read_string(blob, offset + 12)
+    principals, offset = _read_string(blob, offset)
+    valid_after, valid_before = struct.unpack(">QQ", blob[offset:offset + 16])
+    critical, offset = _read_string(blob, offset + 16)
+    extensions, offset = _read_string(blob, offset)
+    _, offset = _read_string(blob, offset)  # reserved
+    signature_key, offset = _read_string(blob, offset)
+    return {
+        'type': algorithm,
+        'serial': serial,
+        'cert_type': "host" if kind == 2 else "user",
+        'key_id': key_id.decode("utf-8", "replace"),
+        'principals': _string_list(principals),
+        'valid_after': valid_after or None,
+        'valid_before': None if valid_before == _FOREVER else valid_before,
+        'critical_options': _option_map(critical),
+        'extensions': _option_map(extensions),
+        'ca_fingerprint': fingerprint(signature_key),
+    }
+
+
+def parse_certificate(path) -> Dict[str, any]:
+    """Decode a *-cert.pub file"""
+    with open(path, "r", encoding="utf-8") as f:
+        parts = f.readline().split()
+    if len(parts) < 2:
+        raise ValueError("Malformed certificate file")
+    return parse_certificate_blob(base64.b64decode(parts[1], validate=True))
+
+
+def certificate_options(cert: Dict[str, any]) -> List[str]:
+    """ssh-keygen -O arguments that reproduce a certificate's critical options and extensions"""
+    if cert['cert_type'] == "host":
+        return []
+    options = ["clear"]
+    for name, value in cert['extensions'].items():
+        if name in STANDARD_EXTENSIONS:
+            options.append(name)
+        else:
+            options.append(f"extension:{name}={value}" if value else f"extension:{name}")
+    for name, value in cert['critical_options'].items():
+        if name in ("force-command", "source-address"):
+            options.append(f"{name}={value}")
+        elif name == "verify-required":
+            options.append(name)
+        else:
+            options.append(f"critical:{name}={value}" if value else f"critical:{name}")
+    return options
+
+
+class CASigningError(Exception):
+    """Raised when a signing batch fails as a whole"""
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class CertificateAuthority:
+    """
+    A CA key that signs many public keys in parallel
+
+    Keys sharing one key id are signed by a single ssh-keygen invocation (up to
+    SIGN_CHUNK_SIZE keys, serials incremented per key). Chunks run on a
+    dedicated process runner. When the CA key has a passphrase, it is loaded
+    once into a private ssh-agent for the batch, so the passphrase KDF runs
+    once instead of once per invocation, and the decrypted key never touches
+    the disk.
+    """
+
+    def __init__(self, key_path: Path, passphrase_source: Optional[PassphraseSource] = None,
+                 max_workers: Optional[int] = None):
+        self.key_path = Path(key_path)
+        self.public_path = Path(f"{self.key_path}.pub")
+        self.passphrase_source = passphrase_source
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.runner = ProcessRunner(max_concurrent=self.max_workers)
+        self._serial_lock = threading.Lock()
+        self._next_serial = int(time.time() * 1000)
+
+    @classmethod
+    def create(cls, key_path: Path, key_type: str = "ed25519", comment: str = "ssh-github-configurator CA",
+               passphrase: Optional[str] = None) -> "CertificateAuthority":
+        """Generate a new CA key pair (refusing to overwrite an existing one)"""
+        key_path = Path(key_path)
+        if key_path.exists():
+            raise FileExistsError(f"CA key already exists: {key_path}")
+        key_path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+        cmd = ["ssh-keygen", "-q", "-t", key_type, "-C", comment, "-f", str(key_path)]
+        run_kwargs = {}
+        if passphrase:
+            run_kwargs = {"env": askpass_env(passphrase), "start_new_session": True}
+        else:
+            cmd[1:1] = ["-N", ""]
+        ProcessRunner().run(cmd, timeout=KEYGEN_TIMEOUT, check=True, **run_kwargs)
+        app_logger.info(f"Created {key_type} CA key {key_path}")
+        return cls(key_path, passphrase)
+
+    @property
+    def fingerprint(self) -> str:
+        from key_verify import read_public_blob
+        return fingerprint(read_public_blob(self.public_path))
+
+    def _reserve_serials(self, count: int) -> int:
+        with self._serial_lock:
+            first = self._next_serial
+            self._next_serial += count
+        return first
+
+    @contextlib.contextmanager
+    def _signing_key(self, cancel_event=None):
+        """Yield (ssh-keygen -s arguments, extra env) for this CA, unlocking it once if needed"""
+        passphrase = resolve_passphrase(self.passphrase_source)
+        if not passphrase:
+            yield ["-P", "", "-s", str(self.key_path)], None
+            return
+
+        # ssh-add re-prompts forever on a wrong passphrase, so check it once up front
+        checked = self.runner.run(["ssh-keygen", "-y", "-f", str(self.key_path)], timeout=PROBE_TIMEOUT,
+                                  env=askpass_env(passphrase), start_new_session=True, cancel_event=cancel_event)
+        if checked.returncode != 0:
+            diagnosis = classify(checked.stderr, "ssh-keygen", checked.returncode)
+            raise CASigningError(f"Could not unlock CA key: {diagnosis.line or diagnosis.code}", diagnosis.code)
+
+        agent_dir = Path(tempfile.mkdtemp(prefix="sshgc-ca-"))
+        socket_path = agent_dir / "agent.sock"
+        agent_pid = None
+        try:
+            started = self.runner.run(["ssh-agent", "-s", "-a", str(socket_path)], timeout=PROBE_TIMEOUT)
+            agent_pid = classify(started.stdout, "ssh-agent", started.returncode).fields.get("pid")
+            if started.returncode != 0 or agent_pid is None:
+                raise CASigningError(f"Could not start ssh-agent for the CA key: {started.stderr.strip()}",
+                                     "agent_unavailable")
+            env = dict(os.environ, SSH_AUTH_SOCK=str(socket_path))
+            added = self.runner.run(["ssh-add", "-q", str(self.key_path)], timeout=AGENT_TIMEOUT,
+                                    env=askpass_env(passphrase, env), start_new_session=True,
+                                    cancel_event=cancel_event)
+            if added.returncode != 0:
+                diagnosis = classify(added.stderr, "ssh-add", added.returncode)
+                raise CASigningError(f"Could not unlock CA key: {diagnosis.line or diagnosis.code}", diagnosis.code)
+            yield ["-U", "-s", str(self.public_path)], env
+        finally:
+            if agent_pid is not None:
+                self.runner.run(["ssh-agent", "-k"], timeout=PROBE_TIMEOUT,
+                                env=dict(os.environ, SSH_AGENT_PID=agent_pid, SSH_AUTH_SOCK=str(socket_path)))
+            shutil.rmtree(agent_dir, ignore_errors=True)
+
+    def _sign_chunk(self, signing_args: List[str], env, records: List[KeyRecord], key_id: str,
+                    principals: Sequence[str], validity: str, options: Sequence[str], host: bool,
+                    cancel_event) -> List[Dict[str, any]]:
+        serial = self._reserve_serials(len(records))
+        cmd = ["ssh-keygen", "-q"] + signing_args + ["-I", key_id, "-n", ",".join(principals),
+                                                       "-V", validity, "-z", f"+{serial}"]
+        if host:
+            cmd.append("-h")
+        for option in options:
+            cmd += ["-O", option]
+        cmd += [str(record.public_path) for record in records]
+
+        results = []
+        try:
+            completed = self.runner.run(cmd, timeout=KEYGEN_TIMEOUT, env=env, cancel_event=cancel_event)
+            diagnosis = classify(completed.stderr, "ssh-keygen", completed.returncode)
+            batch_error = None if completed.returncode == 0 else (diagnosis.line or diagnosis.code, diagnosis.code)
+        except CommandCancelledError as e:
+            batch_error = (str(e), "cancelled")
+
+        ca_fingerprint = self.fingerprint
+        for record in records:
+            result = {'public_path': str(record.public_path), 'certificate': None, 'status': STATUS_FAILED,
+                      'error': None, 'code': None, 'valid_before': None}
+            cert_path = cert_path_for(record.public_path)
+            try:
+                cert = parse_certificate(cert_path)
+                # ssh-keygen stops at the first failing key; only certificates from this run count
+                if cert['ca_fingerprint'] != ca_fingerprint or cert['key_id'] != key_id or \
+                        not serial <= cert['serial'] < serial + len(records):
+                    raise ValueError("certificate was not written")
+                result.update(certificate=str(cert_path), status=STATUS_SIGNED, valid_before=cert['valid_before'])
+            except (OSError, ValueError, struct.error) as e:
+                result['error'], result['code'] = batch_error or (str(e), "os_error")
+            results.append(result)
+        return results
+
+    def sign(self, records: Iterable[KeyRecord], principals: Sequence[str], validity: str = DEFAULT_VALIDITY,
+             key_id: Optional[str] = None, options: Sequence[str] = (), host: bool = False,
+             progress_callback: Optional[Callable[[int, int, Dict[str, any]], None]] = None,
+             cancel_event: Optional[threading.Event] = None) -> List[Dict[str, any]]:
+        """
+        Issue certificates for many public keys
+
+        Args:
+            records: Keys to certify; each certificate is written next to its .pub
+            principals: User names (or host names with host=True) the certificates are valid for
+            validity: ssh-keygen -V interval, e.g. '-5m:+1d' or '+8h'
+            key_id: Key id for every certificate; None uses each key's file name,
+                which costs one ssh-keygen invocation per key
+            options: ssh-keygen -O certificate options ('clear' first drops the default permissions)
+            host: Issue host certificates
+
+        Returns:
+            One dict per key with 'public_path', 'certificate', 'status'
+            (signed/skipped/failed), 'error', 'code' and 'valid_before'
+        """
+        if not principals:
+            raise ValueError("At least one principal is required")
+        jobs = [(record, key_id) for record in dict.fromkeys(records)]
+        return self._run_jobs([(record, job_key_id or record.name, list(principals), validity, list(options), host)
+                               for record, job_key_id in jobs], progress_callback, cancel_event)
+
+    def _run_jobs(self, jobs, progress_callback, cancel_event) -> List[Dict[str, any]]:
+        results: Dict[KeyRecord, Dict[str, any]] = {}
+        groups: Dict[tuple, List[KeyRecord]] = {}
+        for record, key_id, principals, validity, options, host in jobs:
+            if record.read_only:
+                results[record] = {'public_path': str(record.public_path), 'certificate': None,
+                                   'status': STATUS_SKIPPED, 'error': "Key is in a read-only key root",
+                                   'code': None, 'valid_before': None}
+                continue
+            groups.setdefault((key_id, tuple(principals), validity, tuple(options), host), []).append(record)
+
+        chunks = []
+        for (key_id, principals, validity, options, host), members in groups.items():
+            for start in range(0, len(members), SIGN_CHUNK_SIZE):
+                chunks.append((members[start:start + SIGN_CHUNK_SIZE], key_id, principals, validity, options, host))
+
+        total, done = len(jobs), len(results)
+        if chunks:
+            try:
+                with self._signing_key(cancel_event) as (signing_args, env), \
+                        ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="ca-sign") as executor:
+                    futures = {executor.submit(self._sign_chunk, signing_args, env, members, key_id, principals,
+                                               validity, options, host, cancel_event): members
+                               for members, key_id, principals, validity, options, host in chunks}
+                    for future in as_completed(futures):
+                        for record, result in zip(futures[future], future.result()):
+                            done += 1
+                            results[record] = result
+                            if progress_callback:
+                                try:
+                                    progress_callback(done, total, result)
+                                except Exception as e:
+                                    app_logger.warning(f"Signing progress callback failed: {e}")
+            except (CASigningError, CommandCancelledError, subprocess.TimeoutExpired) as e:
+                code = getattr(e, "code", None) or ("cancelled" if isinstance(e, CommandCancelledError) else "timeout")
+                for members, *_ in chunks:
+                    for record in members:
+                        results[record] = {'public_path': str(record.public_path), 'certificate': None,
+                                           'status': STATUS_FAILED, 'error': str(e), 'code': code,
+                                           'valid_before': None}
+
+        ordered = [results[record] for record, *_ in jobs]
+        signed = sum(1 for result in ordered if result['status'] == STATUS_SIGNED)
+        app_logger.info(f"CA {self.key_path.name} signed {signed}/{len(ordered)} key(s) in {len(chunks)} batch(es)")
+        failed = [result for result in ordered if result['status'] == STATUS_FAILED]
+        if failed:
+            app_logger.warning(f"Certificate signing failures by cause: {summarize(r['code'] for r in failed)}")
+        return ordered
+
+    def renew_expiring(self, records: Iterable[KeyRecord], within: float = DEFAULT_RENEW_WITHIN,
+                       validity: Optional[str] = None, now: Optional[float] = None,
+                       progress_callback=None, cancel_event: Optional[threading.Event] = None) -> List[Dict[str, any]]:
+        """
+        Re-sign only certificates from this CA that expire within the given number of seconds
+
+        Each renewal keeps the certificate's key id, principals, type and options.
+        Without a validity, the new certificate gets the same lifetime as the old one.
+
+        Returns:
+            One dict per record that has a certificate from this CA; certificates
+            not close to expiry are reported with status 'current'
+        """
+        now = time.time() if now is None else now
+        ca_fingerprint = self.fingerprint
+        jobs, current = [], []
+        for record in records:
+            cert = record.certificate
+            if cert is None or cert['ca_fingerprint'] != ca_fingerprint or cert['valid_before'] is None:
+                continue
+            if cert['valid_before'] - now > within:
+                current.append({'public_path': str(record.public_path), 'certificate': str(record.cert_path),
+                                'status': STATUS_CURRENT, 'error': None, 'code': None,
+                                'valid_before': cert['valid_before']})
+                continue
+            lifetime = cert['valid_before'] - (cert['valid_after'] or cert['valid_before'] - 86400)
+            renew_validity = validity or f"-5m:+{int(lifetime)}s"
+            jobs.append((record, cert['key_id'], cert['principals'], renew_validity,
+                         certificate_options(cert), cert['cert_type'] == "host"))
+
+        app_logger.info(f"Renewing {len(jobs)} certificate(s) expiring within {within / 3600:.1f}h "
+                        f"({len(current)} still current)")
+        return (self._run_jobs(jobs, progress_callback, cancel_event) if jobs else []) + current
+
+
+def _records_for(paths: Sequence[str]) -> List[KeyRecord]:
+    records = []
+    for path in paths:
+        public_path = Path(path)
+        if public_path.suffix != ".pub":
+            public_path = Path(f"{public_path}.pub")
+        records.append(KeyRecord.from_paths(public_path.with_suffix(""), public_path))
+    return records
+
+
+def _inventory_records(roots: Sequence[str]) -> List[KeyRecord]:
+    records = []
+    for root in roots or [str(Path.home() / ".ssh")]:
+        records.extend(scan_key_root(KeyRoot(Path(root).expanduser())))
+    return records
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Issue and renew OpenSSH certificates")
+    parser.add_argument("command", choices=["init", "sign", "list", "renew"])
+    parser.add_argument("paths", nargs="*", help="Public keys (sign) or key roots (list, renew)")
+    parser.add_argument("--ca", type=Path, help="CA private key")
+    parser.add_argument("--passphrase-stdin", action="store_true", help="Read the CA passphrase from stdin")
+    parser.add_argument("-n", "--principals", help="Comma-separated principals")
+    parser.add_argument("-V", "--validity",
+                        help=f"Validity interval; pass a leading '-' as --validity={DEFAULT_VALIDITY} "
+                             f"(default {DEFAULT_VALIDITY})")
+    parser.add_argument("-I", "--key-id", help="Key id for all certificates (default: key file name)")
+    parser.add_argument("-O", "--option", action="append", default=[], help="Certificate option (repeatable)")
+    parser.add_argument("--host", action="store_true", help="Issue host certificates")
+    parser.add_argument("--within", default="6h", help="Renew certificates expiring within this interval")
+    args = parser.parse_intermixed_args(argv)
+
+    if args.command == "list":
+        for record in _inventory_records(args.paths):
+            cert = record.certificate
+            if cert:
+                print(json.dumps({'certificate': str(record.cert_path), **cert}))
+        return 0
+
+    if args.ca is None:
+        parser.error("--ca is required")
+    passphrase = stdin_passphrase() if args.passphrase_stdin else None
+
+    if args.command == "init":
+        ca = CertificateAuthority.create(args.ca, passphrase=passphrase)
+        print(ca.public_path.read_text().strip())
+        return 0
+
+    ca = CertificateAuthority(args.ca, passphrase)
+    if args.command == "sign":
+        if not args.principals or not args.paths:
+            parser.error("sign needs -n PRINCIPALS and at least one public key")
+        results = ca.sign(_records_for(args.paths), args.principals.split(","), args.validity or DEFAULT_VALIDITY,
+                          key_id=args.key_id, options=args.option, host=args.host)
+    else:
+        results = ca.renew_expiring(_inventory_records(args.paths), parse_duration(args.within), args.validity)
+
+    for result in results:
+        print(json.dumps(result))
+    return 1 if any(result['status'] == STATUS_FAILED for result in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+SSH diagnostics module for SSH GitHub Configurator
+Classifies ssh, ssh-keygen, ssh-add and ssh-agent output into structured codes with a precompiled rule table
+"""
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Tools the rule table covers
+TOOLS = ("ssh", "ssh-keygen", "ssh-add", "ssh-agent")
+
+# Severities
+SEVERITY_OK = "ok"
+SEVERITY_ERROR = "error"
+
+# Codes used when nothing in the table matches
+CODE_OK = "ok"
+CODE_UNKNOWN = "unknown_error"
+
+# (code, severity, tools, literal, pattern) in priority order: when several rules
+# match the same output, the earliest one is the primary code. The literal must
+# occur in every match of the pattern; rules whose literal is absent are skipped
+# without running the regex. Named groups become fields.
+RULES: List[Tuple[str, str, Tuple[str, ...], str, str]] = [
+    # ssh
+    ("authenticated", SEVERITY_OK, ("ssh",), "successfully authenticated",
+     r"Hi (?P<username>[^!\s]+)! You've successfully authenticated"),
+    ("authenticated", SEVERITY_OK, ("ssh",), "Welcome to GitLab",
+     r"Welcome to GitLab, @(?P<username>[^!\s]+)!"),
+    ("host_key_changed", SEVERITY_ERROR, ("ssh",), "REMOTE HOST IDENTIFICATION HAS CHANGED",
+     r"REMOTE HOST IDENTIFICATION HAS CHANGED"),
+    ("host_key_verification_failed", SEVERITY_ERROR, ("ssh",), "Host key verification failed",
+     r"Host key verification failed"),
+    ("key_permissions_too_open", SEVERITY_ERROR, ("ssh", "ssh-add", "ssh-keygen"), "are too open",
+     r"Permissions (?P<mode>0[0-7]+) for '(?P<path>[^']+)' are too open"),
+    ("agent_sign_failure", SEVERITY_ERROR, ("ssh",), "Agent admitted failure to sign",
+     r"Agent admitted failure to sign"),
+    ("agent_sign_failure", SEVERITY_ERROR, ("ssh",), "agent refused operation",
+     r"signing failed[^\n]*: agent refused operation"),
+    ("permission_denied", SEVERITY_ERROR, ("ssh",), "Permission denied (",
+     r"Permission denied \((?P<methods>[^)]*)\)"),
+    ("host_unresolved", SEVERITY_ERROR, ("ssh",), "Could not resolve hostname",
+     r"Could not resolve hostname (?P<host>[^\s:]+)"),
+    ("connection_refused", SEVERITY_ERROR, ("ssh",), "Connection refused",
+     r"connect to host (?P<host>\S+) port (?P<port>\d+): Connection refused"),
+    ("connection_timeout", SEVERITY_ERROR, ("ssh",), "timed out",
+     r"connect to host (?P<host>\S+) port (?P<port>\d+): (?:Connection|Operation) timed out"),
+    ("connection_timeout", SEVERITY_ERROR, ("ssh",), "Connection timed out during banner exchange",
+     r"Connection timed out during banner exchange"),
+    ("network_unreachable", SEVERITY_ERROR, ("ssh",), "Network is unreachable",
+     r"connect to host (?P<host>\S+) port (?P<port>\d+): Network is unreachable"),
+    ("algorithm_mismatch", SEVERITY_ERROR, ("ssh",), "Unable to negotiate",
+     r"Unable to negotiate with (?P<host>\S+) port (?P<port>\d+): no matching (?P<algorithm>[\w ]+?) found"),
+    ("connection_closed", SEVERITY_ERROR, ("ssh",), "Connection reset by peer",
+     r"Connection reset by peer"),
+    ("connection_closed", SEVERITY_ERROR, ("ssh",), "Connection closed by",
+     r"Connection closed by (?:authenticating user \S+ )?(?P<host>[\w.:-]+) port (?P<port>\d+)"),
+    ("agent_unavailable", SEVERITY_ERROR, ("ssh-add",), "Could not open a connection to your authentication agent",
+     r"Could not open a connection to your authentication agent"),
+    ("agent_unavailable", SEVERITY_ERROR, ("ssh-add",), "Error connecting to agent",
+     r"Error connecting to agent: (?P<reason>[^\n]+)"),
+    ("key_not_found", SEVERITY_ERROR, ("ssh", "ssh-add", "ssh-keygen"), "not accessible",
+     r"Identity file (?P<path>\S+) not accessible"),
+    ("key_not_found", SEVERITY_ERROR, ("ssh", "ssh-add", "ssh-keygen"), "no such identity",
+     r"no such identity: (?P<path>[^:\n]+)"),
+    ("key_not_found", SEVERITY_ERROR, ("ssh", "ssh-add", "ssh-keygen"), "No such file or directory",
+     r"^(?P<path>[^:\n]+): No such file or directory"),
+    # ssh-keygen
+    ("key_exists", SEVERITY_ERROR, ("ssh-keygen",), "already exists",
+     r"(?P<path>\S+) already exists"),
+    ("unsupported_key_type", SEVERITY_ERROR, ("ssh-keygen",), "unknown key type",
+     r"unknown key type (?P<key_type>\S+)"),
+    ("invalid_key_size", SEVERITY_ERROR, ("ssh-keygen",), "key length",
+     r"Invalid (?:RSA |ECDSA |DSA )?key length"),
+    ("invalid_key_size", SEVERITY_ERROR, ("ssh-keygen",), "key bits",
+     r"key bits \S+ (?:too small|exceeds maximum)"),
+    ("passphrase_too_short", SEVERITY_ERROR, ("ssh-keygen",), "too short",
+     r"[Pp]assphrase (?:is )?too short"),
+    ("passphrase_mismatch", SEVERITY_ERROR, ("ssh-keygen",), "Passphrases do not match",
+     r"Passphrases do not match"),
+    ("save_failed", SEVERITY_ERROR, ("ssh-keygen",), "Saving key",
+     r"Saving key \"(?P<path>[^\"]+)\" failed: (?P<reason>[^\n]+)"),
+    # shared by ssh-keygen and ssh-add
+    ("bad_passphrase", SEVERITY_ERROR, ("ssh-keygen", "ssh-add"), "incorrect passphrase supplied",
+     r"incorrect passphrase supplied"),
+    ("bad_passphrase", SEVERITY_ERROR, ("ssh-keygen", "ssh-add"), "Bad passphrase",
+     r"Bad passphrase"),
+    ("invalid_key_format", SEVERITY_ERROR, ("ssh-keygen", "ssh-add"), "invalid format",
+     r"(?:[Ll]oad key \"?(?P<path>[^\":\n]+)\"?: )?invalid format"),
+    ("invalid_key_format", SEVERITY_ERROR, ("ssh-keygen", "ssh-add"), "is not a public key file",
+     r"(?P<path>\S+) is not a public key file"),
+    ("agent_refused_key", SEVERITY_ERROR, ("ssh-add",), "Could not add identity",
+     r"Could not add identity \"(?P<path>[^\"]+)\": (?P<reason>[^\n]+)"),
+    # successful output worth parsing
+    ("identity_added", SEVERITY_OK, ("ssh-add",), "Identity added",
+     r"Identity added: (?P<path>\S+)(?: \((?P<comment>[^)\n]*)\))?"),
+    ("key_generated", SEVERITY_OK, ("ssh-keygen",), "The key fingerprint is",
+     r"The key fingerprint is:\s+(?P<fingerprint>(?:SHA256|MD5):\S+)"),
+    ("agent_started", SEVERITY_OK, ("ssh-agent",), "SSH_AUTH_SOCK=",
+     r"SSH_AUTH_SOCK=(?P<socket>[^;\n]+);"),
+    ("agent_started", SEVERITY_OK, ("ssh-agent",), "SSH_AGENT_PID=",
+     r"SSH_AGENT_PID=(?P<pid>\d+);"),
+]
+
+
+@dataclass(frozen=True)
+class Diagnosis:
+    """Classification of one tool run"""
+    code: str
+    severity: str
+    fields: Dict[str, str] = field(default_factory=dict)
+    codes: Tuple[str, ...] = ()
+    line: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.severity != SEVERITY_ERROR
+
+
+class OutputClassifier:
+    """
+    Precompiled rule table, split per tool
+
+    Each tool gets its own tuple of (index, literal, compiled pattern). For an
+    output, a rule's regex only runs when its literal occurs in the text, so a
+    typical message costs a few substring scans and one or two regex searches.
+    All matching rules contribute fields; the earliest one gives the code.
+    """
+
+    def __init__(self, rules=RULES):
+        self.rules = list(rules)
+        compiled = [(index, literal, re.compile(pattern, re.MULTILINE))
+                    for index, (_code, _severity, _tools, literal, pattern) in enumerate(self.rules)]
+        self._tables: Dict[Optional[str], tuple] = {None: tuple(compiled)}
+        for tool in TOOLS:
+            self._tables[tool] = tuple(entry for entry in compiled if tool in self.rules[entry[0]][2])
+
+    def classify(self, output: str, tool: Optional[str] = None, returncode: Optional[int] = None) -> Diagnosis:
+        """
+        Classify the combined stdout/stderr of one tool run
+
+        Args:
+            output: Text printed by the tool
+            tool: One of TOOLS to restrict the rules, or None for all
+            returncode: Exit status; decides between ok and unknown_error when nothing matches
+
+        Returns:
+            Diagnosis with the primary code, all matched codes and extracted fields
+        """
+        output = output or ""
+        matched: List[Tuple[int, re.Match]] = []
+        for index, literal, pattern in self._tables.get(tool) or self._tables[None]:
+            if literal in output:
+                match = pattern.search(output)
+                if match is not None:
+                    matched.append((index, match))
+
+        if not matched:
+            if returncode in (None, 0):
+                return Diagnosis(CODE_OK, SEVERITY_OK)
+            return Diagnosis(CODE_UNKNOWN, SEVERITY_ERROR, line=_last_line(output))
+
+        fields: Dict[str, str] = {}
+        codes: List[str] = []
+        for index, match in matched:
+            code = self.rules[index][0]
+            if code not in codes:
+                codes.append(code)
+            for name, value in match.groupdict().items():
+                if value is not None:
+                    fields.setdefault(name, value.strip())
+
+        primary = matched[0]
+        if returncode not in (None, 0):
+            # With a failing exit status an error outranks any success message before it
+            primary = next((entry for entry in matched if self.rules[entry[0]][1] == SEVERITY_ERROR), primary)
+        code, severity = self.rules[primary[0]][0], self.rules[primary[0]][1]
+        return Diagnosis(code, severity, fields, tuple(codes), _line_of(output, primary[1]))
+
+
+def _line_of(output: str, match: re.Match) -> str:
+    start = output.rfind("\n", 0, match.start()) + 1
+    end = output.find("\n", match.end())
+    return output[start:end if end != -1 else len(output)].strip()
+
+
+def _last_line(output: Optional[str]) -> str:
+    lines = (output or "").strip().splitlines()
+    return lines[-1].strip() if lines else ""
+
+
+def summarize(diagnoses: Iterable) -> Dict[str, int]:
+    """Count primary codes across many runs, most frequent first (accepts Diagnosis objects or codes)"""
+    return dict(Counter(getattr(diagnosis, "code", diagnosis) for diagnosis in diagnoses).most_common())
+
+
+def describe(diagnosis: Diagnosis) -> str:
+    """Short one-line explanation for logs and error messages"""
+    if diagnosis.line:
+        return f"{diagnosis.code}: {diagnosis.line}"
+    return diagnosis.code
+
+
+# Global classifier instance
+output_classifier = OutputClassifier()
+
+
+def classify(output: str, tool: Optional[str] = None, returncode: Optional[int] = None) -> Diagnosis:
+    """Classify output with the shared classifier"""
+    return output_classifier.classify(output, tool, returncode)
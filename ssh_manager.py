@@ -7,22 +7,106 @@ Handles all SSH key operations including detection, generation, and testing
 import subprocess
 import platform
 from pathlib import Path
-from typing import Optional, Tuple, Dict
+from typing import Optional, Tuple, Dict, List, Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 from logger import app_logger
+from process_runner import (process_runner, CommandCancelledError,
+                            PROBE_TIMEOUT, AGENT_TIMEOUT, KEYGEN_TIMEOUT, CONNECT_TIMEOUT)
+from task_scheduler import current_cancel_event
+from key_inventory import KeyInventory, KeyRoot, detect_key_type, CERT_SUFFIX
+from key_record import KeyRecord
+from askpass import askpass_env, resolve_passphrase, PassphraseSource
+from key_verify import KeyPairVerifier
+from key_distribution import KeyDistributor, DEFAULT_MAX_IN_FLIGHT
+from ssh_multiplex import ControlMasterPool
+from key_pool import KeyPool
+from ssh_diagnostics import classify, describe, summarize
+from key_passphrase import PassphraseChanger, DEFAULT_MAX_WORKERS as REKEY_MAX_WORKERS
+from ssh_ca import CertificateAuthority, DEFAULT_VALIDITY, DEFAULT_RENEW_WITHIN
+from key_backup import KeyBackup, BackupError
+from key_events import EventBus, KEY_CREATED, KEY_DELETED, KEY_ROTATED, AGENT_LOADED, TEST_RESULT
 import os
 
 
+# Events after which an open master connection may be authenticated with stale credentials
+CREDENTIAL_EVENTS = (KEY_CREATED, KEY_DELETED, KEY_ROTATED, AGENT_LOADED)
+
+# Seconds a connection test waits for pending key events to close stale master connections
+CREDENTIAL_FLUSH_TIMEOUT = 2.0
+
+
+# User guidance for failed connection tests, by diagnostic code
+CONNECTION_GUIDANCE = {
+    "permission_denied": "❌ Authentication failed. Please:\n1. Add your public key to GitHub (Settings → SSH and GPG keys)\n2. Ensure your key is added to ssh-agent (ssh-add ~/.ssh/id_ed25519)",
+    "host_unresolved": "❌ Network error. Check your internet connection and DNS settings.",
+    "network_unreachable": "❌ Network error. Check your internet connection and DNS settings.",
+    "connection_timeout": "❌ Connection blocked. Check firewall settings or try a different network.",
+    "connection_refused": "❌ Connection blocked. Check firewall settings or try a different network.",
+    "key_not_found": "❌ SSH key not found. Generate an SSH key first.",
+    "agent_sign_failure": "❌ Key not loaded in ssh-agent. Run: ssh-add ~/.ssh/id_ed25519",
+    "key_permissions_too_open": "❌ Private key permissions are too open. Run: chmod 600 on the key file.",
+    "host_key_changed": "❌ GitHub's host key does not match known_hosts. Remove the old entry with ssh-keygen -R github.com.",
+    "host_key_verification_failed": "❌ Host key verification failed. Check ~/.ssh/known_hosts.",
+}
+
+
 class SSHKeyError(Exception):
     """Custom exception for SSH key operations"""
-    pass
+
+    def __init__(self, message: str, code: Optional[str] = None):
+        super().__init__(message)
+        # Diagnostic code from ssh_diagnostics when the error came from an OpenSSH tool
+        self.code = code
 
 
 class SSHManager:
     """Manages SSH key operations"""
     
-    def __init__(self):
-        self.ssh_dir = Path.home() / ".ssh"
+    # Serialises starting an ssh-agent when keys are loaded from several threads
+    _agent_lock = threading.Lock()
+    
+    def __init__(self, key_roots=None, scan_timeout: Optional[float] = None):
+        """
+        Args:
+            key_roots: Directories to inventory, as KeyRoot objects or paths. Defaults
+                to ~/.ssh. New keys are created in the first writable root.
+            scan_timeout: Seconds to wait for slow roots (e.g. network mounts) before
+                returning the keys found so far. None waits for every root.
+        """
+        roots = [KeyRoot.coerce(root) for root in (key_roots or [Path.home() / ".ssh"])]
+        writable = [root for root in roots if not root.read_only]
+        self.ssh_dir = writable[0].path if writable else Path.home() / ".ssh"
+        self.key_roots = roots
+        self.scan_timeout = scan_timeout
+        self.inventory = KeyInventory(roots)
+        self.verifier = KeyPairVerifier()
+        # Shared master connections for repeated tests and remote commands
+        self.multiplexer = ControlMasterPool()
+        # Optional pool of pre-generated keys, see enable_key_pool()
+        self.key_pool = None
+        # Optional encrypted backups taken before keys are deleted or overwritten, see enable_backups()
+        self.key_backup = None
+        # Optional callable receiving live output lines from external commands
+        self.output_callback = None
+        # Key lifecycle events (key_created, key_deleted, ...) for subscribers such as the UI
+        self.events = EventBus()
+        # A master authenticated with an old key or agent would make tests pass without checking the current one
+        self.events.subscribe(self._on_credentials_changed, types=CREDENTIAL_EVENTS, batched=True,
+                              name="ssh_multiplexer")
         self._ensure_ssh_directory()
+
+    def _run(self, cmd, timeout: Optional[float] = PROBE_TIMEOUT, **kwargs):
+        """Run an external command through the shared process runner, streaming its output"""
+        kwargs.setdefault("on_stdout", self.output_callback)
+        kwargs.setdefault("on_stderr", self.output_callback)
+        # Commands started from a scheduled task stop when that task is cancelled
+        kwargs.setdefault("cancel_event", current_cancel_event())
+        return process_runner.run(cmd, timeout=timeout, **kwargs)
+
+    def cancel_running_commands(self) -> int:
+        """Cancel any external commands currently running. Returns how many were cancelled."""
+        return process_runner.cancel_all()
     
     def _ensure_ssh_directory(self):
         """Ensure SSH directory exists with proper permissions"""
@@ -40,10 +124,10 @@ class SSHManager:
             app_logger.error(f"Failed to create/check SSH directory: {e}", exc_info=True)
             raise SSHKeyError(f"Cannot access SSH directory: {e}")
     
-    def check_existing_keys(self) -> Dict[str, any]:
+    def check_existing_keys(self) -> Optional[KeyRecord]:
         """
-        Check for existing SSH keys
-        Returns dict with key info: {'found': bool, 'type': str, 'path': Path}
+        Check for an existing default SSH key (id_ed25519, then id_rsa)
+        Returns its KeyRecord, or None if neither key pair exists
         """
         try:
             app_logger.info("Checking for existing SSH keys")
@@ -58,64 +142,69 @@ class SSHManager:
             
             if ed25519_private.exists() and ed25519_public.exists():
                 app_logger.info("Found ed25519 key pair")
-                return {
-                    'found': True,
-                    'type': 'ed25519',
-                    'private_path': ed25519_private,
-                    'public_path': ed25519_public
-                }
+                return self._key_record(ed25519_private, ed25519_public)
             elif rsa_private.exists() and rsa_public.exists():
                 app_logger.info("Found RSA key pair")
-                return {
-                    'found': True,
-                    'type': 'RSA',
-                    'private_path': rsa_private,
-                    'public_path': rsa_public
-                }
+                return self._key_record(rsa_private, rsa_public)
             else:
                 app_logger.info("No SSH key pairs found")
-                return {'found': False}
+                return None
 
         except Exception as e:
             app_logger.error(f"Error checking existing keys: {e}", exc_info=True)
             raise SSHKeyError(f"Failed to check existing keys: {e}")
 
-    def find_all_ssh_keys(self) -> list[Dict[str, Path]]:
+    def _key_record(self, private_path: Path, public_path: Path) -> KeyRecord:
+        """KeyRecord for a key pair in one of the configured roots"""
+        root = self.inventory.root_for(private_path)
+        cert_path = Path(public_path).with_name(Path(public_path).name[:-4] + CERT_SUFFIX)
+        return KeyRecord.from_paths(private_path, public_path, detect_key_type(public_path),
+                                    root.path if root else private_path.parent, root.read_only if root else False,
+                                    cert_name=cert_path.name if cert_path.exists() else None)
+
+    def find_all_ssh_keys(self) -> List[KeyRecord]:
+        """
+        Finds all SSH key pairs (private and public) in the key roots.
+        Returns a list of KeyRecord objects.
+        """
+        return list(self.iter_ssh_keys())
+
+    def iter_ssh_keys(self):
         """
-        Finds all SSH key pairs (private and public) in the .ssh directory.
-        Returns a list of dictionaries, each containing 'private_path' and 'public_path'.
+        Lazily yields a KeyRecord for each SSH key pair found in all key roots.
+        Roots are scanned concurrently and results are cached per root.
         """
-        app_logger.info(f"Searching for SSH keys in {self.ssh_dir}")
-        found_keys = []
+        app_logger.info(f"Searching for SSH keys in {', '.join(str(root.path) for root in self.key_roots)}")
         try:
-            for private_key_path in self.ssh_dir.iterdir():
-                if private_key_path.is_file() and not private_key_path.suffix == '.pub' and private_key_path.name not in ["known_hosts", "config"]:
-                    public_key_path = private_key_path.with_suffix('.pub')
-                    if public_key_path.is_file():
-                        key_type = "unknown"
-                        try:
-                            with open(public_key_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                                if "ssh-rsa" in content:
-                                    key_type = "RSA"
-                                elif "ssh-ed25519" in content:
-                                    key_type = "ED25519"
-                                elif "ecdsa" in content:
-                                    key_type = "ECDSA"
-                        except Exception as e:
-                            app_logger.warning(f"Could not determine key type for {public_key_path}: {e}")
-
-                        found_keys.append({
-                            'type': key_type,
-                            'private_path': private_key_path,
-                            'public_path': public_key_path
-                        })
-                        app_logger.info(f"Found SSH key pair: {private_key_path} ({key_type})")
-            return found_keys
+            yield from self.inventory.iter_keys(timeout=self.scan_timeout)
         except Exception as e:
             app_logger.error(f"Error finding all SSH keys: {e}", exc_info=True)
             raise SSHKeyError(f"Failed to find all SSH keys: {e}")
 
+    def verify_key_pairs(self, passphrase_source: Optional[PassphraseSource] = None) -> List[Dict[str, any]]:
+        """
+        Check that every private key matches its .pub file by comparing fingerprints
+        
+        Args:
+            passphrase_source: Passphrase for keys that can only be read with ssh-keygen
+            
+        Returns:
+            One result dict per key pair; see KeyPairVerifier.verify
+        """
+        try:
+            return self.verifier.verify_all(self.iter_ssh_keys(), passphrase_source)
+        except SSHKeyError:
+            raise
+        except Exception as e:
+            app_logger.error(f"Error verifying SSH key pairs: {e}", exc_info=True)
+            raise SSHKeyError(f"Failed to verify SSH key pairs: {e}")
+
+    def _check_writable(self, path: Path):
+        """Raise SSHKeyError if path lives under a read-only key root"""
+        root = self.inventory.root_for(path)
+        if root is not None and root.read_only:
+            raise SSHKeyError(f"{path} is in read-only key directory {root.path}")
+
     def load_public_key(self, pubkey_path: Path) -> str:
         """Load public key content from file"""
         try:
@@ -146,6 +235,8 @@ class SSHManager:
             public_key_path: The path to the public SSH key file.
         """
         app_logger.info(f"Attempting to delete SSH key pair: {private_key_path} and {public_key_path}")
+        self._check_writable(private_key_path)
+        self._backup_before_change(f"delete {private_key_path.name}")
         try:
             if private_key_path.exists():
                 private_key_path.unlink()
@@ -160,6 +251,7 @@ class SSHManager:
                 app_logger.warning(f"Public key not found, skipping deletion: {public_key_path}")
             
             app_logger.info("SSH key pair deletion process completed.")
+            self.events.publish(KEY_DELETED, private_path=str(private_key_path), public_path=str(public_key_path))
         except Exception as e:
             app_logger.error(f"Error deleting SSH key pair: {e}", exc_info=True)
             raise SSHKeyError(f"Failed to delete SSH key pair: {e}")
@@ -170,15 +262,9 @@ class SSHManager:
             app_logger.debug(f"Checking availability of command: {command}")
             
             if platform.system() == "Windows":
-                result = subprocess.run(["where", command], 
-                                      capture_output=True, 
-                                      text=True, 
-                                      timeout=10)
+                result = process_runner.run(["where", command], timeout=PROBE_TIMEOUT)
             else:
-                result = subprocess.run(["which", command], 
-                                      capture_output=True, 
-                                      text=True, 
-                                      timeout=10)
+                result = process_runner.run(["which", command], timeout=PROBE_TIMEOUT)
             
             available = result.returncode == 0
             app_logger.debug(f"Command {command} available: {available}")
@@ -191,20 +277,26 @@ class SSHManager:
             app_logger.error(f"Error checking command availability: {e}", exc_info=True)
             return False
     
-    def generate_ssh_key(self, email: str = None, passphrase: str = "", use_passphrase: bool = False, overwrite: bool = False, key_name: str = None) -> Dict[str, any]:
+    def generate_ssh_key(self, email: str = None, passphrase: str = "", use_passphrase: bool = False, overwrite: bool = False, key_name: str = None,
+                         passphrase_source: Optional[PassphraseSource] = None) -> Dict[str, any]:
         """
         Generate SSH key following GitHub best practices
         
         Args:
             email: Email for key comment (if None, will prompt user)
-            passphrase: Passphrase for the key. If None, interactive input will be used.
+            passphrase: Passphrase for the key. If None and no passphrase_source is given, interactive input in a terminal window will be used.
             use_passphrase: Whether to use a passphrase for the key (deprecated, now inferred from 'passphrase' argument)
             overwrite: Whether to overwrite existing keys
             key_name: Optional name for the key file (e.g., 'github_key'). If None, uses default 'id_ed25519' or 'id_rsa'.
+            passphrase_source: Passphrase string or callable (e.g. askpass.stdin_passphrase or a secret
+                store lookup) used when passphrase is None. Supplied without a terminal.
         """
         try:
             app_logger.info("Starting SSH key generation process")
             
+            if passphrase is None and passphrase_source is not None:
+                passphrase = resolve_passphrase(passphrase_source)
+            
             # Ensure SSH directory exists with proper permissions
             self._ensure_ssh_directory()
             
@@ -213,14 +305,7 @@ class SSHManager:
                 raise SSHKeyError("ssh-keygen command not found. Please install OpenSSH.")
             
             # Use provided email or generate a default one
-            if not email:
-                try:
-                    import getpass
-                    username = getpass.getuser()
-                    hostname = platform.node()
-                    email = f"{username}@{hostname}"
-                except Exception:
-                    email = "user@localhost"
+            email = email or self._default_email()
             
             app_logger.info(f"Using email for key comment: {email}")
             
@@ -271,101 +356,281 @@ class SSHManager:
                     app_logger.warning(f"ed25519 generation failed: {e}")
                     
                     # Only fallback to RSA if ed25519 is not supported, not if keys exist
-                    if "already exists" not in str(e).lower():
+                    if e.code != "key_exists":
                         app_logger.info("Falling back to RSA key generation")
                         try:
                             return self._generate_key_type("rsa", email, passphrase=passphrase, overwrite=overwrite, key_name=key_name)
                         except SSHKeyError as rsa_error:
                             app_logger.error(f"RSA generation also failed: {rsa_error}")
-                            raise SSHKeyError(f"Failed to generate both ed25519 and RSA keys: {rsa_error}")
+                            raise SSHKeyError(f"Failed to generate both ed25519 and RSA keys: {rsa_error}", rsa_error.code)
                     else:
                         # If keys exist, don't fallback, just raise the original error
                         raise e
                         
         except Exception as e:
             app_logger.error(f"Unexpected error during key generation: {e}", exc_info=True)
-            raise SSHKeyError(f"Key generation failed: {e}")
+            raise SSHKeyError(f"Key generation failed: {e}", getattr(e, "code", None))
     
-    def _generate_key_type(self, key_type: str, email: str, passphrase: str = "", overwrite: bool = False, key_name: str = None) -> Dict[str, any]:
-        """Generate specific type of SSH key"""
+    @staticmethod
+    def _default_email() -> str:
+        """user@host comment for keys generated without an email"""
         try:
-            if key_name:
-                private_path = self.ssh_dir / key_name
-                public_path = self.ssh_dir / f"{key_name}.pub"
-            elif key_type == "ed25519":
-                private_path = self.ssh_dir / "id_ed25519"
-                public_path = self.ssh_dir / "id_ed25519.pub"
-            elif key_type == "rsa":
-                private_path = self.ssh_dir / "id_rsa"
-                public_path = self.ssh_dir / "id_rsa.pub"
-            else:
-                raise SSHKeyError(f"Unsupported key type: {key_type}")
+            import getpass
+            return f"{getpass.getuser()}@{platform.node()}"
+        except Exception:
+            return "user@localhost"
+    
+    def enable_key_pool(self, sizes: Optional[Dict[str, int]] = None, refill_workers: int = 1,
+                        staging_dir: Optional[Path] = None) -> KeyPool:
+        """
+        Keep pre-generated keys ready so generate_ssh_key returns without waiting for ssh-keygen
+        
+        Args:
+            sizes: Number of ready keys per type, e.g. {'ed25519': 2, 'rsa': 1}
+            refill_workers: Keys generated concurrently while refilling
+            staging_dir: Private staging directory; must be on the same filesystem as
+                the key directory. Defaults to <ssh_dir>/.key_pool.
+        """
+        if self.key_pool is not None:
+            self.key_pool.close()
+        self.key_pool = KeyPool(staging_dir or self.ssh_dir / ".key_pool", sizes, refill_workers)
+        self.key_pool.refill()
+        return self.key_pool
+    
+    def enable_backups(self, passphrase_source: PassphraseSource, archive_dir: Optional[Path] = None) -> KeyBackup:
+        """
+        Snapshot the writable key roots into an encrypted archive before any key is deleted or overwritten
+        
+        Args:
+            passphrase_source: Archive passphrase (string or callable); a new archive is
+                created with it when none exists yet
+            archive_dir: Archive directory. Defaults to ~/.ssh_github_configurator_backups.
+        """
+        passphrase = resolve_passphrase(passphrase_source)
+        backup = KeyBackup(archive_dir, passphrase)
+        try:
+            if not backup.exists:
+                backup = KeyBackup.create(archive_dir, passphrase)
+            backup.unlock()
+        except BackupError as e:
+            raise SSHKeyError(f"Cannot open key backup archive: {e}", e.code)
+        self.key_backup = backup
+        return backup
+    
+    def backup_keys(self, label: str = "") -> Dict[str, any]:
+        """Take a snapshot of the writable key roots now (requires enable_backups())"""
+        if self.key_backup is None:
+            raise SSHKeyError("Key backups are not enabled")
+        try:
+            return self.key_backup.snapshot([root for root in self.key_roots if not root.read_only], label,
+                                            cancel_event=current_cancel_event())
+        except (BackupError, CommandCancelledError, subprocess.TimeoutExpired, OSError) as e:
+            app_logger.error(f"Key backup failed: {e}")
+            raise SSHKeyError(f"Key backup failed: {e}", getattr(e, "code", None))
+    
+    def _backup_before_change(self, reason: str):
+        """Snapshot the keys before a destructive change; a failed backup blocks the change"""
+        if self.key_backup is not None:
+            self.backup_keys(f"before {reason}")
+    
+    def restore_keys(self, snapshot_id: Optional[str] = None, at: Optional[float] = None,
+                     keys: Optional[List[str]] = None, target_dir: Optional[Path] = None) -> List[Dict[str, any]]:
+        """
+        Restore keys from the backup archive (requires enable_backups())
+        
+        Args:
+            snapshot_id: Snapshot to restore; None picks by 'at' or the latest
+            at: Point in time as epoch seconds
+            keys: Key names or private key paths; None restores whole directories
+            target_dir: Restore into this directory instead of the original locations
+            
+        Returns:
+            One dict per file with 'path', 'status', 'replaced', 'error' and 'code'
+        """
+        if self.key_backup is None:
+            raise SSHKeyError("Key backups are not enabled")
+        try:
+            results = self.key_backup.restore(snapshot_id, at, keys, target_dir, cancel_event=current_cancel_event())
+        except BackupError as e:
+            raise SSHKeyError(f"Key restore failed: {e}", e.code)
+        self.inventory.invalidate()
+        if target_dir is None:
+            for result in results:
+                private_path = Path(result['path'])
+                public_path = private_path.with_name(f"{private_path.name}.pub")
+                if result['status'] != "restored" or private_path.suffix == ".pub" or not public_path.exists():
+                    continue
+                self.events.publish(KEY_ROTATED if result['replaced'] else KEY_CREATED, private_path=str(private_path),
+                                    public_path=str(public_path), **({"what": "restore"} if result['replaced'] else {}))
+        return results
+    
+    def generate_ssh_keys_batch(self, requests: List[Dict[str, any]], max_workers: int = 4,
+                                progress_callback: Optional[Callable[[int, int, Dict[str, any]], None]] = None) -> List[Dict[str, any]]:
+        """
+        Generate several keys in parallel without any terminal interaction
+        
+        Args:
+            requests: One dict of generate_ssh_key keyword arguments per key. A request with
+                neither 'passphrase' nor 'passphrase_source' gets an unprotected key.
+            max_workers: Number of keys generated at the same time
+            progress_callback: Called as (completed, total, result) after each key finishes
+            
+        Returns:
+            One result dict per request, in request order. Failed requests have
+            'success' False and an 'error' message instead of raising.
+        """
+        total = len(requests)
+        results: List[Optional[Dict[str, any]]] = [None] * total
+        app_logger.info(f"Generating {total} SSH key(s) in batch with {max_workers} worker(s)")
 
-            # Use provided passphrase or empty string if not using passphrase
-            # The use_passphrase argument is now implicitly handled by checking if passphrase is provided
-            cmd = [
-                "ssh-keygen", "-t", key_type, "-C", email,
-                "-f", str(private_path)
-            ]
+        def generate(request: Dict[str, any]) -> Dict[str, any]:
+            kwargs = dict(request)
+            if kwargs.get("passphrase") is None and kwargs.get("passphrase_source") is None:
+                kwargs["passphrase"] = ""
+            return self.generate_ssh_key(**kwargs)
 
-            if passphrase is not None: # If passphrase is not None, it means it's either an empty string or a provided passphrase
-                cmd.extend([ "-N", passphrase])
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="keygen") as executor:
+            futures = {executor.submit(generate, request): index for index, request in enumerate(requests)}
+            for completed, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                try:
+                    result = future.result()
+                except SSHKeyError as e:
+                    result = {"success": False, "key_name": requests[index].get("key_name"), "error": str(e),
+                              "code": e.code}
+                results[index] = result
+                if progress_callback:
+                    try:
+                        progress_callback(completed, total, result)
+                    except Exception as e:
+                        app_logger.warning(f"Batch progress callback failed: {e}")
 
-            app_logger.info(f"Generating {key_type} key with command: {' '.join(cmd)}")
+        succeeded = sum(1 for result in results if result and result.get("success"))
+        app_logger.info(f"Batch key generation finished: {succeeded}/{total} succeeded")
+        if succeeded < total:
+            failures = summarize(result.get("code") or "unknown_error"
+                                 for result in results if not result.get("success"))
+            app_logger.warning(f"Batch key generation failures by cause: {failures}")
+        return results
 
-            # Check if key already exists
-            if (private_path.exists() or public_path.exists()) and not overwrite:
-                raise SSHKeyError(f"Key '{private_path.name}' already exists. Use overwrite=True to replace existing keys.")
-            
-            # Remove existing keys if overwrite is True
-            if overwrite:
-                for path in [private_path, public_path]:
-                    if path.exists():
-                        path.unlink()
-                        app_logger.info(f"Removed existing key: {path}")
-            
-            # Run ssh-keygen command
-            result = subprocess.run(
-                cmd, 
-                capture_output=True, 
-                text=True, 
-                timeout=30,
-                check=True
-            )
+    def _generate_key_type(self, key_type: str, email: str, passphrase: str = "", overwrite: bool = False, key_name: str = None) -> Dict[str, any]:
+        """Generate specific type of SSH key"""
+        try:
+            private_path, public_path = self._key_paths(key_type, key_name)
+            cmd, run_kwargs = self._keygen_command(key_type, email, private_path, passphrase)
+            replaced = self._prepare_key_destination(private_path, public_path, overwrite)
             
-            # Verify key files were created
-            if not private_path.exists() or not public_path.exists():
-                raise SSHKeyError(f"Key files were not created: {private_path}, {public_path}")
+            # Take a ready-made key from the pool when possible, otherwise run ssh-keygen
+            if not self._claim_pooled_key(key_type, private_path, email, passphrase, overwrite):
+                self._run(cmd, timeout=KEYGEN_TIMEOUT, check=True, **run_kwargs)
             
-            # Set proper permissions (600 for private key, 644 for public key)
-            self._set_key_permissions(private_path, public_path)
+            self._finalize_key_files(private_path, public_path)
             
             # Add key to ssh-agent if available
-            self._add_key_to_agent(private_path, key_type)
-            
-            app_logger.info(f"Successfully generated {key_type} SSH key pair")
-            
-            return {
-                "success": True,
-                "key_type": key_type,
-                "private_key_path": str(private_path),
-                "public_key_path": str(public_path),
-                "email": email,
-                "message": f"Successfully generated {key_type} SSH key pair"
-            }
+            self._add_key_to_agent(private_path, key_type, passphrase=passphrase)
             
-        except subprocess.CalledProcessError as e:
-            error_msg = f"ssh-keygen failed: {e.stderr or e.stdout or str(e)}"
-            app_logger.error(error_msg)
-            raise SSHKeyError(error_msg)
-        except subprocess.TimeoutExpired:
+            return self._generated_key_result(key_type, email, private_path, public_path, replaced)
+        except Exception as e:
+            raise self._keygen_failure(e, key_type)
+    
+    def _key_paths(self, key_type: str, key_name: Optional[str]) -> Tuple[Path, Path]:
+        """Private and public key paths for a new key"""
+        if key_name:
+            return self.ssh_dir / key_name, self.ssh_dir / f"{key_name}.pub"
+        elif key_type == "ed25519":
+            return self.ssh_dir / "id_ed25519", self.ssh_dir / "id_ed25519.pub"
+        elif key_type == "rsa":
+            return self.ssh_dir / "id_rsa", self.ssh_dir / "id_rsa.pub"
+        raise SSHKeyError(f"Unsupported key type: {key_type}")
+    
+    def _keygen_command(self, key_type: str, email: str, private_path: Path, passphrase: Optional[str]):
+        """ssh-keygen command and extra run() arguments for generating one key"""
+        # Use provided passphrase or empty string if not using passphrase
+        # The use_passphrase argument is now implicitly handled by checking if passphrase is provided
+        cmd = [
+            "ssh-keygen", "-t", key_type, "-C", email,
+            "-f", str(private_path)
+        ]
+        
+        run_kwargs = {}
+        if passphrase:
+            # Supply the passphrase through the askpass helper instead of the command line
+            run_kwargs = {"env": askpass_env(passphrase), "start_new_session": True}
+        elif passphrase is not None:
+            cmd.extend(["-N", ""])
+        
+        app_logger.info(f"Generating {key_type} key with command: {' '.join(cmd)}")
+        return cmd, run_kwargs
+    
+    def _prepare_key_destination(self, private_path: Path, public_path: Path, overwrite: bool) -> bool:
+        """Refuse or clear existing key files. Returns True if an existing key is being replaced."""
+        # Check if key already exists
+        if (private_path.exists() or public_path.exists()) and not overwrite:
+            raise SSHKeyError(f"Key '{private_path.name}' already exists. Use overwrite=True to replace existing keys.",
+                              "key_exists")
+        
+        # Remove existing keys if overwrite is True
+        replaced = overwrite and (private_path.exists() or public_path.exists())
+        if replaced:
+            self._backup_before_change(f"overwrite {private_path.name}")
+            for path in [private_path, public_path]:
+                if path.exists():
+                    path.unlink()
+                    app_logger.info(f"Removed existing key: {path}")
+        return replaced
+    
+    def _claim_pooled_key(self, key_type: str, private_path: Path, email: str, passphrase: Optional[str],
+                          overwrite: bool) -> bool:
+        if self.key_pool is not None and key_type in self.key_pool.sizes and \
+                self.key_pool.claim(key_type, private_path, email, passphrase or "", overwrite):
+            app_logger.info(f"Using pre-generated {key_type} key from the key pool")
+            return True
+        return False
+    
+    def _finalize_key_files(self, private_path: Path, public_path: Path):
+        # Verify key files were created
+        if not private_path.exists() or not public_path.exists():
+            raise SSHKeyError(f"Key files were not created: {private_path}, {public_path}")
+        
+        # Set proper permissions (600 for private key, 644 for public key)
+        self._set_key_permissions(private_path, public_path)
+    
+    def _generated_key_result(self, key_type: str, email: str, private_path: Path, public_path: Path,
+                              replaced: bool) -> Dict[str, any]:
+        app_logger.info(f"Successfully generated {key_type} SSH key pair")
+        
+        record = self._key_record(private_path, public_path)
+        self.events.publish(KEY_ROTATED if replaced else KEY_CREATED, private_path=str(private_path),
+                            public_path=str(public_path), key_type=key_type, key=record,
+                            **({"what": "key"} if replaced else {}))
+        return {
+            "success": True,
+            "key_type": key_type,
+            "key": record,
+            "email": email,
+            "message": f"Successfully generated {key_type} SSH key pair"
+        }
+    
+    @staticmethod
+    def _keygen_failure(error: Exception, key_type: str) -> SSHKeyError:
+        """Log a failed key generation and turn it into an SSHKeyError carrying a diagnostic code"""
+        if isinstance(error, subprocess.CalledProcessError):
+            output = error.stderr or error.stdout or ""
+            diagnosis = classify(output, "ssh-keygen", error.returncode)
+            error_msg = f"ssh-keygen failed: {output or str(error)}"
+            app_logger.error(f"{error_msg} [{diagnosis.code}]")
+            return SSHKeyError(error_msg, diagnosis.code)
+        if isinstance(error, subprocess.TimeoutExpired):
             error_msg = "SSH key generation timed out"
             app_logger.error(error_msg)
-            raise SSHKeyError(error_msg)
-        except Exception as e:
-            error_msg = f"Unexpected error generating {key_type} key: {e}"
-            app_logger.error(error_msg, exc_info=True)
-            raise SSHKeyError(error_msg)
+            return SSHKeyError(error_msg, "timeout")
+        if isinstance(error, CommandCancelledError):
+            error_msg = "SSH key generation was cancelled"
+            app_logger.info(error_msg)
+            return SSHKeyError(error_msg, "cancelled")
+        error_msg = f"Unexpected error generating {key_type} key: {error}"
+        app_logger.error(error_msg, exc_info=True)
+        return SSHKeyError(error_msg, getattr(error, "code", None))
     
     def _set_key_permissions(self, private_key_path: Path, public_key_path: Path):
         """Set proper permissions for SSH keys following security best practices"""
@@ -375,16 +640,16 @@ class SSHManager:
                 # Remove inheritance and set specific permissions
                 
                 # For private key: only current user has full control
-                subprocess.run([
+                process_runner.run([
                     "icacls", str(private_key_path), "/inheritance:r", "/grant:r", 
                     f"{os.getlogin()}:F"
-                ], check=False, capture_output=True)
+                ], timeout=PROBE_TIMEOUT)
                 
                 # For public key: current user has full control, others can read
-                subprocess.run([
+                process_runner.run([
                     "icacls", str(public_key_path), "/inheritance:r", "/grant:r", 
                     f"{os.getlogin()}:F", "/grant:r", "Everyone:R"
-                ], check=False, capture_output=True)
+                ], timeout=PROBE_TIMEOUT)
                 
                 app_logger.info("Set Windows permissions for SSH keys")
                 
@@ -406,7 +671,142 @@ class SSHManager:
             app_logger.warning(f"Could not set key permissions: {e}")
             # Continue anyway as the keys are still functional
     
-    def _add_key_to_agent(self, private_key_path: Path, key_type: str):
+    def distribute_public_key(self, public_key_path: Path, hosts: List[str],
+                              max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, retries: int = 2,
+                              identity_file: Optional[Path] = None,
+                              progress_callback: Optional[Callable] = None) -> List[Dict[str, any]]:
+        """
+        Append a public key to authorized_keys on many hosts concurrently
+        
+        Args:
+            public_key_path: Public key to install
+            hosts: ssh destinations (e.g. 'deploy@web1' or host aliases from ssh_config)
+            max_in_flight: Maximum number of simultaneous ssh sessions
+            retries: Retries per host for connection failures
+            identity_file: Existing key used to log in to the hosts
+            progress_callback: Called with (done, total, result) as hosts finish
+            
+        Returns:
+            One dict per host with 'host', 'status' (added/present/failed),
+            'attempts', 'error', 'code' (ssh_diagnostics code of the last failure) and 'duration'
+        """
+        public_key = self.load_public_key(Path(public_key_path))
+        distributor = KeyDistributor(max_in_flight=max_in_flight, retries=retries)
+        results = distributor.distribute(hosts, public_key, identity_file=identity_file,
+                                         progress_callback=progress_callback,
+                                         cancel_event=current_cancel_event())
+        failed = [result for result in results if result['status'] == "failed"]
+        app_logger.info(f"Distributed {Path(public_key_path).name} to {len(results) - len(failed)}/{len(results)} host(s)")
+        if failed:
+            app_logger.warning(f"Key distribution failures by cause: {summarize(result['code'] for result in failed)}")
+        return results
+    
+    def change_passphrases(self, records: List[KeyRecord], old_passphrase_source: Optional[PassphraseSource] = None,
+                           new_passphrase_source: Optional[PassphraseSource] = None,
+                           kdf_rounds: Optional[int] = None, backup: bool = True,
+                           max_workers: int = REKEY_MAX_WORKERS,
+                           progress_callback: Optional[Callable] = None) -> List[Dict[str, any]]:
+        """
+        Add, change or remove the passphrase of many private keys in parallel
+        
+        Args:
+            records: Keys to re-encrypt
+            old_passphrase_source: Current passphrase (string or callable); None for unprotected keys
+            new_passphrase_source: New passphrase (string or callable); None or "" removes protection
+            kdf_rounds: bcrypt KDF rounds for the new encryption (ssh-keygen -a); None keeps the default
+            backup: Keep each previous key in a hidden .passphrase_backups directory
+            max_workers: Keys re-encrypted at the same time
+            progress_callback: Called with (done, total, result) as keys finish
+            
+        Returns:
+            One dict per key with 'private_path', 'status' (changed/skipped/failed),
+            'error', 'code', 'backup' and 'duration'
+        """
+        # Resolve each source once so a prompting callable asks only one time
+        old_passphrase = resolve_passphrase(old_passphrase_source)
+        new_passphrase = resolve_passphrase(new_passphrase_source)
+        changer = PassphraseChanger(max_workers=max_workers)
+        results = changer.change_many(records, old_passphrase, new_passphrase, kdf_rounds=kdf_rounds,
+                                      backup=backup, progress_callback=progress_callback,
+                                      cancel_event=current_cancel_event())
+        for directory in {record.directory for record in records}:
+            self.inventory.invalidate(Path(directory))
+        for result in results:
+            if result['status'] == "changed":
+                self.events.publish(KEY_ROTATED, private_path=result['private_path'], what="passphrase")
+        return results
+    
+    def sign_public_keys(self, ca_key_path: Path, records: List[KeyRecord], principals: List[str],
+                         validity: str = DEFAULT_VALIDITY, key_id: Optional[str] = None,
+                         options: Optional[List[str]] = None, host: bool = False,
+                         ca_passphrase_source: Optional[PassphraseSource] = None,
+                         progress_callback: Optional[Callable] = None) -> List[Dict[str, any]]:
+        """
+        Issue OpenSSH certificates for many public keys with one CA key
+        
+        Args:
+            ca_key_path: CA private key (its .pub must sit next to it)
+            records: Keys to certify; certificates are written as <key>-cert.pub
+            principals: User names, or host names with host=True
+            validity: ssh-keygen -V interval, e.g. '-5m:+1d'
+            key_id: Shared key id (signs in batches); None uses each key's file name
+            options: ssh-keygen -O certificate options
+            host: Issue host certificates
+            ca_passphrase_source: Passphrase of the CA key (string or callable)
+            progress_callback: Called with (done, total, result) as keys finish
+            
+        Returns:
+            One dict per key with 'public_path', 'certificate', 'status'
+            (signed/skipped/failed), 'error', 'code' and 'valid_before'
+        """
+        ca = CertificateAuthority(ca_key_path, ca_passphrase_source)
+        results = ca.sign(records, principals, validity, key_id=key_id, options=options or (), host=host,
+                          progress_callback=progress_callback, cancel_event=current_cancel_event())
+        for directory in {record.directory for record in records}:
+            self.inventory.invalidate(Path(directory))
+        self._publish_certificates(results)
+        return results
+    
+    def renew_expiring_certificates(self, ca_key_path: Path, within: float = DEFAULT_RENEW_WITHIN,
+                                    validity: Optional[str] = None,
+                                    ca_passphrase_source: Optional[PassphraseSource] = None,
+                                    progress_callback: Optional[Callable] = None) -> List[Dict[str, any]]:
+        """
+        Re-sign the certificates from a CA that expire within 'within' seconds
+        
+        Certificates across all key roots are considered; each renewal keeps its
+        key id, principals and options. Certificates that are not close to expiry
+        are reported with status 'current' and left alone.
+        """
+        records = [record for record in self.find_all_ssh_keys() if record.cert_name]
+        ca = CertificateAuthority(ca_key_path, ca_passphrase_source)
+        results = ca.renew_expiring(records, within, validity, progress_callback=progress_callback,
+                                    cancel_event=current_cancel_event())
+        for directory in {record.directory for record in records}:
+            self.inventory.invalidate(Path(directory))
+        self._publish_certificates(results)
+        return results
+    
+    def _publish_certificates(self, results: List[Dict[str, any]]):
+        for result in results:
+            if result['status'] == "signed":
+                self.events.publish(KEY_ROTATED, public_path=result['public_path'], what="certificate",
+                                    certificate=result['certificate'], valid_before=result['valid_before'])
+    
+    def add_key_to_agent(self, private_key_path: Path, passphrase_source: Optional[PassphraseSource] = None) -> bool:
+        """
+        Load an existing private key into ssh-agent without a terminal
+        
+        Args:
+            private_key_path: Path to the private key
+            passphrase_source: Passphrase string or callable for protected keys
+            
+        Returns:
+            True if the key was added
+        """
+        return self._add_key_to_agent(Path(private_key_path), "SSH", passphrase=resolve_passphrase(passphrase_source))
+    
+    def _add_key_to_agent(self, private_key_path: Path, key_type: str, passphrase: Optional[str] = None) -> bool:
         """Add SSH key to ssh-agent following best practices"""
         try:
             # Check if ssh-agent is running and start if needed
@@ -414,68 +814,46 @@ class SSHManager:
                 # On Windows, ensure ssh-agent service is running
                 try:
                     # Check if service exists and is running
-                    result = subprocess.run([
+                    result = process_runner.run([
                         "powershell", "-Command", 
                         "Get-Service ssh-agent -ErrorAction SilentlyContinue | Select-Object Status"
-                    ], capture_output=True, text=True)
+                    ], timeout=AGENT_TIMEOUT)
                     
                     if "Running" not in result.stdout:
                         # Try to start the service
-                        start_result = subprocess.run([
+                        start_result = process_runner.run([
                             "powershell", "-Command", 
                             "Start-Service ssh-agent -ErrorAction SilentlyContinue"
-                        ], capture_output=True, text=True)
+                        ], timeout=AGENT_TIMEOUT)
                         
                         if start_result.returncode == 0:
                             app_logger.info("Started ssh-agent service on Windows")
                         else:
                             app_logger.info("ssh-agent service not available on Windows, skipping key addition")
-                            return
+                            return False
                     
                 except Exception as e:
                     app_logger.warning(f"Could not manage ssh-agent service on Windows: {e}")
-                    return
+                    return False
             else:
                 # On Unix-like systems, start ssh-agent if not running
-                if not os.environ.get('SSH_AUTH_SOCK'):
-                    try:
-                        # Try to start ssh-agent
-                        result = subprocess.run(
-                            ['ssh-agent', '-s'], 
-                            capture_output=True, text=True, timeout=10
-                        )
-                        if result.returncode == 0:
-                            # Parse the output to set environment variables
-                            for line in result.stdout.split('\n'):
-                                if 'SSH_AUTH_SOCK' in line:
-                                    sock_path = line.split('=')[1].split(';')[0]
-                                    os.environ['SSH_AUTH_SOCK'] = sock_path
-                                elif 'SSH_AGENT_PID' in line:
-                                    pid = line.split('=')[1].split(';')[0]
-                                    os.environ['SSH_AGENT_PID'] = pid
-                            app_logger.info("Started ssh-agent")
-                        else:
-                            app_logger.info("Could not start ssh-agent, skipping key addition")
-                            return
-                    except Exception as e:
-                        app_logger.warning(f"Could not start ssh-agent: {e}")
-                        return
+                with self._agent_lock:
+                    if not self._ensure_unix_agent():
+                        return False
             
-            # Add key to ssh-agent
-            result = subprocess.run(
-                ["ssh-add", str(private_key_path)],
-                capture_output=True, text=True, timeout=15
-            )
+            cmd, run_kwargs = self._agent_add_command(private_key_path, passphrase)
+            result = self._run(cmd, timeout=AGENT_TIMEOUT, **run_kwargs)
             
             if result.returncode == 0:
                 app_logger.info(f"Successfully added {key_type} key to ssh-agent")
+                self.events.publish(AGENT_LOADED, private_path=str(private_key_path), key_type=key_type)
                 
                 # On macOS, also add to keychain if available
                 if platform.system() == "Darwin":
                     try:
-                        keychain_result = subprocess.run([
+                        keychain_result = self._run([
                             "ssh-add", "--apple-use-keychain", str(private_key_path)
-                        ], capture_output=True, text=True, timeout=10)
+                        ], timeout=AGENT_TIMEOUT, **run_kwargs)
                         
                         if keychain_result.returncode == 0:
                             app_logger.info("Successfully added key to macOS keychain")
@@ -483,68 +861,159 @@ class SSHManager:
                             app_logger.info("Could not add key to macOS keychain (normal if no passphrase)")
                     except Exception as e:
                         app_logger.warning(f"Could not add key to macOS keychain: {e}")
+                return True
             else:
-                error_msg = result.stderr or result.stdout or "Unknown error"
-                app_logger.warning(f"Could not add key to ssh-agent: {error_msg}")
+                diagnosis = classify(result.stderr + result.stdout, "ssh-add", result.returncode)
+                app_logger.warning(f"Could not add key to ssh-agent: {describe(diagnosis)}")
+                return False
                 
         except Exception as e:
             app_logger.warning(f"Could not add key to ssh-agent: {e}")
+            return False
+
+    @staticmethod
+    def _agent_add_command(private_key_path: Path, passphrase: Optional[str]):
+        # Add key to ssh-agent, answering passphrase prompts through the askpass helper
+        run_kwargs = {"env": askpass_env(passphrase), "start_new_session": True} if passphrase else {}
+        return ["ssh-add", str(private_key_path)], run_kwargs
     
-            output = result.stderr or result.stdout or ""
-            app_logger.info(f"SSH test output (exit code {result.returncode}): {output}")
-            
-            if result.returncode == 1 and "successfully authenticated" in output:
-                # Extract username from output if available
-                username = "your account"
-                if "Hi " in output:
-                    try:
-                        username = output.split("Hi ")[1].split("!")[0]
-                    except:
-                        pass
-                
-                app_logger.info("GitHub SSH connection successful")
-                return {
-                    'success': True,
-                    'message': f"✅ Successfully authenticated with GitHub as {username}!",
-                    'output': output,
-                    'username': username
-                }
-            else:
-                # Analyze the error and provide specific guidance
-                if "Permission denied (publickey)" in output:
-                    guidance = "❌ Authentication failed. Please:\n1. Add your public key to GitHub (Settings → SSH and GPG keys)\n2. Ensure your key is added to ssh-agent (ssh-add ~/.ssh/id_ed25519)"
-                elif "Could not resolve hostname" in output:
-                    guidance = "❌ Network error. Check your internet connection and DNS settings."
-                elif "Connection timed out" in output or "Connection refused" in output:
-                    guidance = "❌ Connection blocked. Check firewall settings or try a different network."
-                elif "No such file or directory" in output or "No such identity" in output:
-                    guidance = "❌ SSH key not found. Generate an SSH key first."
-                elif "Agent admitted failure to sign" in output:
-                    guidance = "❌ Key not loaded in ssh-agent. Run: ssh-add ~/.ssh/id_ed25519"
-                elif result.returncode == 255:
-                    guidance = "❌ SSH connection failed. Verify your SSH configuration."
+    def _ensure_unix_agent(self) -> bool:
+        """Start ssh-agent and export its variables if none is running. Returns False if unavailable."""
+        if not os.environ.get('SSH_AUTH_SOCK'):
+            try:
+                # Try to start ssh-agent
+                result = process_runner.run(['ssh-agent', '-s'], timeout=PROBE_TIMEOUT)
+                if result.returncode == 0:
+                    # Parse the output to set environment variables
+                    for line in result.stdout.split('\n'):
+                        if 'SSH_AUTH_SOCK' in line:
+                            sock_path = line.split('=')[1].split(';')[0]
+                            os.environ['SSH_AUTH_SOCK'] = sock_path
+                        elif 'SSH_AGENT_PID' in line:
+                            pid = line.split('=')[1].split(';')[0]
+                            os.environ['SSH_AGENT_PID'] = pid
+                    app_logger.info("Started ssh-agent")
                 else:
-                    guidance = "❌ Unknown error. Verify your SSH key is correctly configured."
-                
-                app_logger.warning(f"GitHub SSH connection failed (exit code {result.returncode}): {output}")
-                return {
-                    'success': False,
-                    'message': guidance,
-                    'output': output,
-                    'exit_code': result.returncode
-                }
-                
-        except subprocess.TimeoutExpired:
+                    app_logger.info("Could not start ssh-agent, skipping key addition")
+                    return False
+            except Exception as e:
+                app_logger.warning(f"Could not start ssh-agent: {e}")
+                return False
+        return True
+
+    def run_remote(self, host: str, command: str, timeout: Optional[float] = CONNECT_TIMEOUT,
+                   input_text: Optional[str] = None, reuse_connection: bool = True):
+        """
+        Run a command on a remote host, reusing a multiplexed master connection
+        
+        Args:
+            host: ssh destination
+            command: Remote command line
+            reuse_connection: Start or reuse a ControlMaster for host
+            
+        Returns:
+            CommandResult from the process runner
+        """
+        cmd = ["ssh", "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=accept-new"]
+        if reuse_connection and self.multiplexer.ensure_master(host):
+            cmd += self.multiplexer.client_options(host)
+        cmd += [host, command]
+        return self._run(cmd, timeout=timeout, input_text=input_text)
+    
+    def close_connections(self):
+        """Shut down all multiplexed master connections"""
+        self.multiplexer.close_all()
+
+    def _on_credentials_changed(self, events):
+        """Drop master connections after keys or the agent changed (called on an event bus thread)"""
+        if self.multiplexer.active_hosts():
+            app_logger.info(f"Closing SSH master connections after {events[-1].type}")
+            self.close_connections()
+
+    def test_github_connection(self, host: str = "git@github.com", reuse_connection: bool = True) -> Dict[str, any]:
+        """
+        Test SSH authentication against GitHub (equivalent to 'ssh -T git@github.com')
+        
+        Args:
+            host: Destination to test
+            reuse_connection: Go through a ControlMaster so repeated tests skip the handshake
+        
+        Returns:
+            Dict with 'success', a user-facing 'message' and the raw 'output'
+        """
+        try:
+            completed = self._run(self._connection_test_command(host, reuse_connection), timeout=CONNECT_TIMEOUT)
+            result = self._classify_connection_output(completed.returncode, completed.stderr or completed.stdout or "")
+        except Exception as e:
+            result = self._connection_test_failure(e)
+        self._publish_test_result(host, result)
+        return result
+
+    def _connection_test_command(self, host: str, reuse_connection: bool) -> List[str]:
+        app_logger.info(f"Testing SSH connection to {host}")
+        cmd = ["ssh", "-T", "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=accept-new"]
+        # Let a key change published just before this test close the masters it invalidated
+        if reuse_connection and not self.events.flush(CREDENTIAL_FLUSH_TIMEOUT):
+            app_logger.warning("Key events still pending; testing without a shared connection")
+            reuse_connection = False
+        if reuse_connection and self.multiplexer.ensure_master(host):
+            cmd += self.multiplexer.client_options(host)
+        cmd.append(host)
+        return cmd
+
+    def _publish_test_result(self, host: str, result: Dict[str, any]):
+        self.events.publish(TEST_RESULT, host=host, success=result['success'], code=result.get('code'),
+                            username=result.get('username'))
+
+    @staticmethod
+    def _connection_test_failure(error: Exception) -> Dict[str, any]:
+        """Result for a connection test that could not run to completion"""
+        if isinstance(error, subprocess.TimeoutExpired):
             app_logger.error("GitHub SSH connection test timed out")
             return {
                 'success': False,
-                'message': "❌ Connection timeout (45s). Check your internet connection or try again.",
-                'output': "Connection timed out after 45 seconds"
+                'message': f"❌ Connection timeout ({CONNECT_TIMEOUT}s). Check your internet connection or try again.",
+                'output': f"Connection timed out after {CONNECT_TIMEOUT} seconds",
+                'code': "timeout"
             }
-        except Exception as e:
-            app_logger.error(f"Error testing GitHub connection: {e}", exc_info=True)
+        app_logger.error(f"Error testing GitHub connection: {error}", exc_info=True)
+        return {
+            'success': False,
+            'message': f"❌ Connection test error: {str(error)}",
+            'output': str(error)
+        }
+
+    def _classify_connection_output(self, returncode: int, output: str) -> Dict[str, any]:
+        """Turn the exit code and output of 'ssh -T' into a result with user guidance"""
+        app_logger.info(f"SSH test output (exit code {returncode}): {output}")
+        diagnosis = classify(output, "ssh", returncode)
+        
+        # GitHub exits with 1 after a successful login; warnings about other identities may outrank it
+        if returncode == 1 and "authenticated" in diagnosis.codes:
+            username = diagnosis.fields.get("username", "your account")
+            
+            app_logger.info("GitHub SSH connection successful")
+            return {
+                'success': True,
+                'message': f"✅ Successfully authenticated with GitHub as {username}!",
+                'output': output,
+                'username': username,
+                'code': "authenticated"
+            }
+        else:
+            # Analyze the error and provide specific guidance
+            guidance = CONNECTION_GUIDANCE.get(diagnosis.code)
+            if guidance is None:
+                if returncode == 255:
+                    guidance = "❌ SSH connection failed. Verify your SSH configuration."
+                else:
+                    guidance = "❌ Unknown error. Verify your SSH key is correctly configured."
+            
+            app_logger.warning(f"GitHub SSH connection failed (exit code {returncode}): {output}")
             return {
                 'success': False,
-                'message': f"❌ Connection test error: {str(e)}",
-                'output': str(e)
-            }
\ No newline at end of file
+                'message': guidance,
+                'output': output,
+                'exit_code': returncode,
+                'code': diagnosis.code
+            }
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+SSH multiplexing module for SSH GitHub Configurator
+Keeps one ControlMaster session per host so repeated probes and remote commands skip the handshake
+"""
+
+import atexit
+import hashlib
+import os
+import platform
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from logger import app_logger
+from process_runner import process_runner, PROBE_TIMEOUT, CONNECT_TIMEOUT
+
+
+# Seconds an idle master stays up after its last client disconnects
+DEFAULT_PERSIST = 600
+
+# Seconds before retrying a host whose master failed to start
+FAILURE_BACKOFF = 30
+
+
+# Live pools, closed together at interpreter exit without keeping them alive until then
+_pools: "weakref.WeakSet[ControlMasterPool]" = weakref.WeakSet()
+
+
+def _close_pools():
+    for pool in list(_pools):
+        pool.close_all()
+
+
+atexit.register(_close_pools)
+
+
+def default_runtime_dir() -> Path:
+    """Private directory for control sockets ($XDG_RUNTIME_DIR when available)"""
+    base = os.environ.get("XDG_RUNTIME_DIR")
+    if base and os.path.isdir(base):
+        path = Path(base) / "ssh-github-configurator"
+        path.mkdir(mode=0o700, exist_ok=True)
+    else:
+        # Control socket paths must stay short (about 100 bytes), so use the system temp dir
+        path = Path(tempfile.mkdtemp(prefix="sshgc-cm-"))
+    os.chmod(path, 0o700)
+    return path
+
+
+class ControlMasterPool:
+    """
+    Manages ControlMaster/ControlPersist master connections, one per destination
+
+    Masters are started explicitly with 'ssh -M -N -f' and their output goes to a
+    per-host log file. Keeping them off our pipes means a backgrounded master
+    never holds a caller's stdout/stderr open. Clients connect with
+    ControlMaster=no, so they reuse a live master and otherwise connect
+    directly.
+    """
+
+    def __init__(self, runtime_dir: Optional[Path] = None, persist: int = DEFAULT_PERSIST):
+        # OpenSSH for Windows has no Unix-socket multiplexing
+        self.supported = platform.system() != "Windows"
+        self.persist = persist
+        self._runtime_dir = Path(runtime_dir) if runtime_dir else None
+        self._owns_runtime_dir = runtime_dir is None
+        self._lock = threading.Lock()
+        self._host_locks: Dict[str, threading.Lock] = {}
+        self._masters: Dict[str, Path] = {}
+        self._failed: Dict[str, float] = {}
+        _pools.add(self)
+
+    @property
+    def runtime_dir(self) -> Path:
+        with self._lock:
+            if self._runtime_dir is None:
+                self._runtime_dir = default_runtime_dir()
+            return self._runtime_dir
+
+    def control_path(self, host: str) -> Path:
+        digest = hashlib.sha1(host.encode("utf-8")).hexdigest()[:16]
+        return self.runtime_dir / f"cm-{digest}"
+
+    def client_options(self, host: str) -> List[str]:
+        """ssh options that reuse the host's master connection when one is running"""
+        if not self.supported:
+            return []
+        return ["-o", "ControlMaster=no", "-o", f"ControlPath={self.control_path(host)}"]
+
+    def _host_lock(self, host: str) -> threading.Lock:
+        with self._lock:
+            return self._host_locks.setdefault(host, threading.Lock())
+
+    def is_alive(self, host: str) -> bool:
+        """Health check: ask the master for this host whether it is still running"""
+        if not self.supported:
+            return False
+        control_path = self.control_path(host)
+        if not control_path.exists():
+            return False
+        try:
+            result = process_runner.run(["ssh", "-O", "check", "-o", f"ControlPath={control_path}", host],
+                                        timeout=PROBE_TIMEOUT)
+        except Exception as e:
+            app_logger.debug(f"ControlMaster check failed for {host}: {e}")
+            return False
+        return result.returncode == 0
+
+    def ensure_master(self, host: str, extra_options: Optional[List[str]] = None) -> bool:
+        """
+        Start a master connection for host unless a healthy one exists
+
+        Returns:
+            True if a master is running for host afterwards
+        """
+        if not self.supported:
+            return False
+        with self._host_lock(host):
+            if self.is_alive(host):
+                return True
+            # Don't pay for a second handshake on every call to a host that just failed
+            if time.monotonic() - self._failed.get(host, float("-inf")) < FAILURE_BACKOFF:
+                return False
+
+            control_path = self.control_path(host)
+            try:
+                control_path.unlink()
+            except FileNotFoundError:
+                pass
+
+            log_path = self.runtime_dir / f"{control_path.name}.log"
+            cmd = ["ssh", "-M", "-N", "-f",
+                   "-o", "BatchMode=yes", "-o", "StrictHostKeyChecking=accept-new",
+                   "-o", f"ControlPath={control_path}", "-o", f"ControlPersist={self.persist}",
+                   "-E", str(log_path)]
+            cmd += list(extra_options or [])
+            cmd.append(host)
+            try:
+                # -f forks once authenticated; without pipes the parent's exit is all we wait for
+                result = process_runner.run(cmd, timeout=CONNECT_TIMEOUT, capture_output=False,
+                                            start_new_session=True)
+            except Exception as e:
+                app_logger.warning(f"Could not start ControlMaster for {host}: {e}")
+                self._failed[host] = time.monotonic()
+                return False
+
+            if result.returncode != 0:
+                app_logger.warning(f"ControlMaster for {host} failed to start: {self._log_tail(log_path)}")
+                self._failed[host] = time.monotonic()
+                return False
+            self._failed.pop(host, None)
+            with self._lock:
+                self._masters[host] = control_path
+            app_logger.info(f"Started ControlMaster for {host}")
+            return True
+
+    def stop(self, host: str) -> bool:
+        """Ask the master for host to exit and forget it"""
+        with self._lock:
+            control_path = self._masters.pop(host, None)
+        if control_path is None or not control_path.exists():
+            return False
+        try:
+            result = process_runner.run(["ssh", "-O", "exit", "-o", f"ControlPath={control_path}", host],
+                                        timeout=PROBE_TIMEOUT)
+            app_logger.info(f"Stopped ControlMaster for {host}")
+            return result.returncode == 0
+        except Exception as e:
+            app_logger.warning(f"Could not stop ControlMaster for {host}: {e}")
+            return False
+
+    def active_hosts(self) -> List[str]:
+        with self._lock:
+            return list(self._masters)
+
+    def close_all(self):
+        """Stop every master started by this pool and remove the private runtime dir"""
+        for host in self.active_hosts():
+            self.stop(host)
+        with self._lock:
+            runtime_dir, owned = self._runtime_dir, self._owns_runtime_dir
+            if runtime_dir is not None and owned and runtime_dir.name.startswith("sshgc-cm-"):
+                # A later ensure_master() creates a fresh directory
+                self._runtime_dir = None
+            else:
+                runtime_dir = None
+        if runtime_dir is not None:
+            shutil.rmtree(runtime_dir, ignore_errors=True)
+
+    @staticmethod
+    def _log_tail(log_path: Path) -> str:
+        try:
+            lines = log_path.read_text(encoding="utf-8", errors="replace").strip().splitlines()
+            return lines[-1] if lines else "no output"
+        except OSError:
+            return "no output"
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Task scheduler module for SSH GitHub Configurator
+Runs background work on a bounded worker pool and delivers results to the Tk thread
+"""
+
+import itertools
+import queue
+import threading
+from typing import Any, Callable, Optional
+
+from logger import app_logger
+
+
+# Priorities: lower values run first
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 10
+PRIORITY_LOW = 20
+
+_current = threading.local()
+
+
+class TaskCancelledError(Exception):
+    """Raised inside a task when its cancellation token has been triggered"""
+    pass
+
+
+class CancellationToken:
+    """Cooperative cancellation and progress reporting handle passed to each task"""
+
+    def __init__(self, scheduler: "TaskScheduler", task: "Task"):
+        self.event = threading.Event()
+        self._scheduler = scheduler
+        self._task = task
+
+    @property
+    def cancelled(self) -> bool:
+        return self.event.is_set()
+
+    def cancel(self):
+        self.event.set()
+
+    def raise_if_cancelled(self):
+        """Raise TaskCancelledError if cancellation was requested"""
+        if self.event.is_set():
+            raise TaskCancelledError(f"Task '{self._task.name}' was cancelled")
+
+    def report_progress(self, value: Optional[float] = None, message: str = ""):
+        """
+        Report progress to the UI thread
+
+        Args:
+            value: Fraction complete between 0 and 1 (None if unknown)
+            message: Optional status text
+        """
+        if self._task.on_progress:
+            self._scheduler._post(self._task.on_progress, value, message)
+
+
+class Task:
+    """A unit of background work submitted to the scheduler"""
+
+    def __init__(self, func: Callable, name: str, priority: int,
+                 on_success: Optional[Callable] = None,
+                 on_error: Optional[Callable] = None,
+                 on_progress: Optional[Callable] = None,
+                 on_cancel: Optional[Callable] = None):
+        self.func = func
+        self.name = name
+        self.priority = priority
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.on_cancel = on_cancel
+        self.token: Optional[CancellationToken] = None
+        self.state = "queued"
+
+    def cancel(self):
+        """Request cancellation; queued tasks are skipped, running tasks are signalled"""
+        if self.token:
+            self.token.cancel()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.token is not None and self.token.cancelled
+
+
+def current_cancel_event() -> Optional[threading.Event]:
+    """Return the cancellation event of the task running in this thread, if any"""
+    token = getattr(_current, "token", None)
+    return token.event if token else None
+
+
+class TaskScheduler:
+    """
+    Worker pool with a priority queue and a single coalesced Tk result pump
+
+    Tasks receive a CancellationToken as their only argument. Success, error,
+    progress and cancel callbacks are always invoked on the Tk thread, drained
+    in batches by one recurring root.after() callback. Must be created on the
+    Tk thread; while no task is active the pump keeps polling at
+    idle_interval_ms so call_soon() works from any thread.
+    """
+
+    def __init__(self, root, max_workers: int = 3, pump_interval_ms: int = 50, batch_size: int = 100,
+                 idle_interval_ms: int = 200):
+        self.root = root
+        self.max_workers = max_workers
+        self.pump_interval_ms = pump_interval_ms
+        self.idle_interval_ms = idle_interval_ms
+        self.batch_size = batch_size
+
+        self._tasks = queue.PriorityQueue()
+        self._results = queue.SimpleQueue()
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._active = set()
+        self._workers = []
+        self._pump_id = None
+        self._pump_idle = False
+        self._shutdown = False
+        # Optional wrapper called as instrument(name, func, token) instead of func(token), e.g. a profiler
+        self.instrument: Optional[Callable[[str, Callable, CancellationToken], Any]] = None
+        self._schedule_pump(idle=True)
+
+    def submit(self, func: Callable[[CancellationToken], Any], name: str = "task",
+               priority: int = PRIORITY_NORMAL,
+               on_success: Optional[Callable[[Any], None]] = None,
+               on_error: Optional[Callable[[Exception], None]] = None,
+               on_progress: Optional[Callable[[Optional[float], str], None]] = None,
+               on_cancel: Optional[Callable[[], None]] = None) -> Task:
+        """
+        Queue a function for background execution. Must be called from the Tk thread.
+
+        Args:
+            func: Callable taking a CancellationToken and returning a result
+            name: Name used in logs
+            priority: Lower values are started first
+            on_success: Called with the result on the Tk thread
+            on_error: Called with the exception on the Tk thread
+            on_progress: Called with (value, message) on the Tk thread
+            on_cancel: Called on the Tk thread if the task was cancelled
+
+        Returns:
+            The Task handle, which can be used to cancel it
+        """
+        if self._shutdown:
+            raise RuntimeError("Task scheduler has been shut down")
+
+        task = Task(func, name, priority, on_success, on_error, on_progress, on_cancel)
+        task.token = CancellationToken(self, task)
+        with self._lock:
+            self._active.add(task)
+        self._tasks.put((priority, next(self._sequence), task))
+        self._ensure_workers()
+        self._ensure_pump()
+        app_logger.debug(f"Task queued: {name} (priority {priority})")
+        return task
+
+    def call_soon(self, callback: Callable, *args):
+        """Run callback(*args) on the Tk thread at the next pump. Safe to call from any thread."""
+        self._post(callback, *args)
+
+    def cancel_all(self) -> int:
+        """Cancel every queued and running task. Returns the number of tasks signalled."""
+        with self._lock:
+            tasks = list(self._active)
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    @property
+    def pending_count(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    def shutdown(self):
+        """Cancel outstanding work and stop the worker threads"""
+        self._shutdown = True
+        self.cancel_all()
+        for _ in self._workers:
+            self._tasks.put((float("inf"), next(self._sequence), None))
+        if self._pump_id is not None:
+            try:
+                self.root.after_cancel(self._pump_id)
+            except Exception:
+                pass
+            self._pump_id = None
+
+    def _ensure_workers(self):
+        with self._lock:
+            needed = min(self.max_workers, len(self._active)) - len(self._workers)
+            for _ in range(needed):
+                worker = threading.Thread(target=self._worker_loop, name=f"task-worker-{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+
+    def _worker_loop(self):
+        while True:
+            _, _, task = self._tasks.get()
+            if task is None:
+                return
+            self._execute(task)
+
+    def _execute(self, task: Task):
+        if task.cancelled:
+            self._finish(task, "cancelled", None)
+            return
+
+        task.state = "running"
+        _current.token = task.token
+        try:
+            instrument = self.instrument
+            if instrument is not None:
+                result = instrument(task.name, task.func, task.token)
+            else:
+                result = task.func(task.token)
+            if task.cancelled:
+                self._finish(task, "cancelled", None)
+            else:
+                self._finish(task, "done", result)
+        except TaskCancelledError:
+            self._finish(task, "cancelled", None)
+        except Exception as e:
+            if task.cancelled:
+                self._finish(task, "cancelled", None)
+            else:
+                app_logger.error(f"Task '{task.name}' failed: {e}", exc_info=True)
+                self._finish(task, "error", e)
+        finally:
+            _current.token = None
+
+    def _finish(self, task: Task, state: str, payload):
+        task.state = state
+        app_logger.debug(f"Task {state}: {task.name}")
+        if state == "done" and task.on_success:
+            self._post(task.on_success, payload)
+        elif state == "error" and task.on_error:
+            self._post(task.on_error, payload)
+        elif state == "cancelled" and task.on_cancel:
+            self._post(task.on_cancel)
+        self._post(self._retire, task)
+
+    def _retire(self, task: Task):
+        with self._lock:
+            self._active.discard(task)
+
+    def _post(self, callback: Callable, *args):
+        self._results.put((callback, args))
+
+    def _ensure_pump(self):
+        """Switch the pump to the busy interval (Tk thread only)"""
+        if self._pump_id is not None and self._pump_idle:
+            try:
+                self.root.after_cancel(self._pump_id)
+            except Exception:
+                pass
+            self._pump_id = None
+        if self._pump_id is None:
+            self._schedule_pump(idle=False)
+
+    def _schedule_pump(self, idle: bool):
+        if self._shutdown:
+            return
+        self._pump_idle = idle
+        self._pump_id = self.root.after(self.idle_interval_ms if idle else self.pump_interval_ms, self._pump)
+
+    def _pump(self):
+        """Drain up to batch_size queued callbacks; poll faster while work remains"""
+        self._pump_id = None
+        for _ in range(self.batch_size):
+            try:
+                callback, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                callback(*args)
+            except Exception as e:
+                app_logger.error(f"Task callback failed: {e}", exc_info=True)
+
+        if self.pending_count or not self._results.empty():
+            self._schedule_pump(idle=False)
+        else:
+            self._schedule_pump(idle=True)
@@ -5,14 +5,41 @@ Contains the main GUI interface with improved error handling and user feedback
 """
 
 import tkinter as tk
-from tkinter import ttk, messagebox, scrolledtext
-import threading
+from tkinter import ttk, messagebox, scrolledtext, filedialog, simpledialog
 from pathlib import Path
+import os
 import platform
+import time
+import threading
 
 from ssh_manager import SSHManager, SSHKeyError
 from utils import safe_execute, ErrorHandler, ClipboardManager
 from logger import app_logger
+from process_runner import process_runner, PROBE_TIMEOUT
+from task_scheduler import TaskScheduler, PRIORITY_HIGH, PRIORITY_LOW
+from debug_log import DebugLogBuffer, LEVEL_NAMES, level_value
+from key_export import export_public_keys, EXPORT_FORMATS
+from github_client import upload_public_keys, TOKEN_ENV_VAR
+from daemon import connect_service, DaemonError
+from key_preview import PublicKeyCache
+from key_record import KeyRecord
+from key_events import KEY_CREATED, KEY_DELETED, KEY_ROTATED
+from profile_capture import ProfileCapture, DEFAULT_OPERATIONS
+
+# Delay used to coalesce debug log writes into one insert per frame
+DEBUG_FLUSH_MS = 16
+
+# Delay after the last selection change before the key preview updates
+PREVIEW_DEBOUNCE_MS = 80
+
+# Delay used to coalesce key lifecycle events into one key list refresh
+KEY_REFRESH_MS = 100
+
+# Rows on each side of the selection whose public keys are prefetched
+PREFETCH_NEIGHBOURS = 5
+
+# Units of the debug panel's profiling limit
+PROFILE_UNITS = ("operations", "seconds")
 
 
 class SSHGitHubConfiguratorUI:
@@ -21,7 +48,26 @@ class SSHGitHubConfiguratorUI:
     def __init__(self, root):
         self.root = root
         self.ssh_manager = SSHManager()
+        # Background daemon when one is running, otherwise the same service in-process
+        self.service = connect_service(self.ssh_manager)
         self.error_handler = ErrorHandler()
+        self.scheduler = TaskScheduler(root)
+        self.generation_task = None
+        self.debug_log = DebugLogBuffer(max_lines=2000)
+        self._debug_flush_pending = False
+        self._tk_thread_id = threading.get_ident()
+        # Public key preview cache, kept in sync by inventory rescans
+        self.pubkey_cache = PublicKeyCache()
+        self.ssh_manager.inventory.listeners.append(self.pubkey_cache.sync_root)
+        self._preview_after_id = None
+        self._prefetching = set()
+        # Refresh the key list whenever keys change, however the change was made
+        self._key_refresh_pending = False
+        self.ssh_manager.events.subscribe(self._on_key_events, types=(KEY_CREATED, KEY_DELETED, KEY_ROTATED),
+                                          batched=True, name="ui_key_list")
+        # On-demand cProfile/tracemalloc capture started from the debug panel or the command line
+        self.profile_capture = None
+        self._profile_timer = None
         self.style = ttk.Style()
         self.style.theme_use("clam") # Use 'clam' theme as a base
 
@@ -39,15 +85,16 @@ class SSHGitHubConfiguratorUI:
         self.setup_styles()
         self.create_interface()
         self._display_found_ssh_keys()
+
+        # Stream output of external commands (e.g. ssh-keygen) into the debug panel
+        self.ssh_manager.output_callback = self._on_command_output
         
         # Initialize application state
         self.current_pubkey_content = ""
         
         # Try to get user's git email for default
         try:
-            import subprocess
-            result = subprocess.run(['git', 'config', '--global', 'user.email'], 
-                                  capture_output=True, text=True, timeout=5)
+            result = process_runner.run(['git', 'config', '--global', 'user.email'], timeout=PROBE_TIMEOUT)
             if result.returncode == 0 and result.stdout.strip():
                 self.email_entry.insert(0, result.stdout.strip())
         except Exception:
@@ -229,14 +276,16 @@ class SSHGitHubConfiguratorUI:
         keys_frame.grid(row=row, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
 
         # Treeview for displaying keys
-        self.keys_tree = ttk.Treeview(keys_frame, columns=("Type", "Private Path", "Public Path"), show="headings")
+        self.keys_tree = ttk.Treeview(keys_frame, columns=("Type", "Private Path", "Public Path", "Cert Expiry"), show="headings")
         self.keys_tree.heading("Type", text="Type")
         self.keys_tree.heading("Private Path", text="Private Path")
         self.keys_tree.heading("Public Path", text="Public Path")
+        self.keys_tree.heading("Cert Expiry", text="Cert Expiry")
 
         self.keys_tree.column("Type", width=100, stretch=tk.NO)
         self.keys_tree.column("Private Path", width=250, stretch=tk.YES)
         self.keys_tree.column("Public Path", width=250, stretch=tk.YES)
+        self.keys_tree.column("Cert Expiry", width=130, stretch=tk.NO)
 
         self.keys_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         self.keys_tree.bind("<<TreeviewSelect>>", self._on_key_select)
@@ -251,6 +300,28 @@ class SSHGitHubConfiguratorUI:
 
         delete_button = ttk.Button(keys_frame, text="Excluir Chave Selecionada", command=self._delete_selected_ssh_key, style="Danger.TButton")
         delete_button.grid(row=1, column=0, columnspan=2, pady=(10, 0), sticky=(tk.W, tk.E))
+
+        copy_selected_button = ttk.Button(keys_frame, text="Copiar Chaves Públicas Selecionadas", command=self.copy_selected_keys_safe)
+        copy_selected_button.grid(row=2, column=0, columnspan=2, pady=(5, 0), sticky=(tk.W, tk.E))
+
+        verify_button = ttk.Button(keys_frame, text="Verificar Pares de Chaves", command=self.verify_keys_safe)
+        verify_button.grid(row=4, column=0, columnspan=2, pady=(5, 0), sticky=(tk.W, tk.E))
+
+        upload_button = ttk.Button(keys_frame, text="Enviar Chaves Selecionadas ao GitHub...", command=self.upload_keys_safe)
+        upload_button.grid(row=5, column=0, columnspan=2, pady=(5, 0), sticky=(tk.W, tk.E))
+
+        passphrase_button = ttk.Button(keys_frame, text="Alterar Passphrase das Selecionadas...", command=self.change_passphrases_safe)
+        passphrase_button.grid(row=6, column=0, columnspan=2, pady=(5, 0), sticky=(tk.W, tk.E))
+
+        # Bulk export of all public keys
+        export_frame = ttk.Frame(keys_frame)
+        export_frame.grid(row=3, column=0, columnspan=2, pady=(5, 0), sticky=(tk.W, tk.E))
+        self.export_format_var = tk.StringVar(value="authorized_keys")
+        ttk.Combobox(export_frame, textvariable=self.export_format_var, values=list(EXPORT_FORMATS),
+                     state="readonly", width=16).grid(row=0, column=0, sticky=tk.W)
+        ttk.Button(export_frame, text="Exportar Chaves Públicas...", command=self.export_keys_safe).grid(
+            row=0, column=1, padx=(5, 0), sticky=(tk.W, tk.E))
+        export_frame.columnconfigure(1, weight=1)
         keys_frame.columnconfigure(1, weight=1)
 
         app_logger.info("SSH keys display frame created")
@@ -281,7 +352,7 @@ class SSHGitHubConfiguratorUI:
         passphrase_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=(0, 10))
 
         self.use_passphrase_var = tk.BooleanVar(value=False)
-        self.use_passphrase_checkbox = ttk.Checkbutton(passphrase_frame, text="Usar Passphrase (será solicitada no terminal)", variable=self.use_passphrase_var)
+        self.use_passphrase_checkbox = ttk.Checkbutton(passphrase_frame, text="Usar Passphrase", variable=self.use_passphrase_var)
         self.use_passphrase_checkbox.grid(row=0, column=0, sticky=tk.W, pady=(5, 0))
 
         # Generate button with progress indicator
@@ -297,6 +368,11 @@ class SSHGitHubConfiguratorUI:
         self.progress_bar.grid(row=0, column=1, padx=(10, 0), sticky=(tk.W, tk.E))
         self.progress_bar.grid_remove()  # Hide initially
         
+        # Cancel button (shown while generation runs)
+        self.cancel_button = ttk.Button(button_frame, text="Cancel", command=self.cancel_generation)
+        self.cancel_button.grid(row=0, column=2, padx=(10, 0), pady=(0, 10))
+        self.cancel_button.grid_remove()
+        
         email_frame.columnconfigure(0, weight=1)
         button_frame.columnconfigure(1, weight=1)
         button_frame.columnconfigure(0, weight=1)
@@ -341,10 +417,32 @@ class SSHGitHubConfiguratorUI:
                                             command=self.toggle_error_log)
         self.toggle_error_button.grid(row=row+1, column=0, pady=(5, 0), sticky=(tk.W, tk.E))
         
+        # Level filter
+        filter_frame = ttk.Frame(self.error_frame)
+        filter_frame.grid(row=0, column=0, sticky=tk.W, pady=(0, 5))
+        ttk.Label(filter_frame, text="Level:").grid(row=0, column=0, sticky=tk.W)
+        self.debug_level_var = tk.StringVar(value="INFO")
+        level_combo = ttk.Combobox(filter_frame, textvariable=self.debug_level_var, values=LEVEL_NAMES,
+                                   state="readonly", width=10)
+        level_combo.grid(row=0, column=1, padx=(5, 0))
+        level_combo.bind("<<ComboboxSelected>>", lambda e: self._render_debug_log())
+
+        # Profiling of the next operations or a time window
+        ttk.Label(filter_frame, text="Profile next:").grid(row=0, column=2, sticky=tk.W, padx=(15, 0))
+        self.profile_amount_var = tk.StringVar(value=str(DEFAULT_OPERATIONS))
+        ttk.Spinbox(filter_frame, from_=1, to=10000, textvariable=self.profile_amount_var,
+                    width=6).grid(row=0, column=3, padx=(5, 0))
+        self.profile_unit_var = tk.StringVar(value=PROFILE_UNITS[0])
+        ttk.Combobox(filter_frame, textvariable=self.profile_unit_var, values=PROFILE_UNITS,
+                     state="readonly", width=10).grid(row=0, column=4, padx=(5, 0))
+        self.profile_button = ttk.Button(filter_frame, text="Start Profiling",
+                                         command=self.toggle_profile_capture)
+        self.profile_button.grid(row=0, column=5, padx=(5, 0))
+        
         # Error text area
         self.error_text = scrolledtext.ScrolledText(self.error_frame, height=6, width=70,
                                                    font=("Courier", 8), state=tk.DISABLED)
-        self.error_text.grid(row=0, column=0, sticky=(tk.W, tk.E))
+        self.error_text.grid(row=1, column=0, sticky=(tk.W, tk.E))
         
         self.error_frame.columnconfigure(0, weight=1)
     
@@ -353,23 +451,41 @@ class SSHGitHubConfiguratorUI:
         try:
             self.keys_tree.delete(*self.keys_tree.get_children()) # Clear existing entries
             
-            found_keys = self.ssh_manager.find_all_ssh_keys()
+            try:
+                found_keys = [KeyRecord.from_dict(data) for data in self.service.call("list_keys")]
+            except (OSError, DaemonError) as e:
+                app_logger.warning(f"Daemon unavailable, scanning in-process: {e}")
+                self.service = connect_service(self.ssh_manager)
+                found_keys = [KeyRecord.from_dict(data) for data in self.service.call("list_keys")]
             
             if not found_keys:
-                self.keys_tree.insert("", tk.END, values=("Nenhuma chave SSH encontrada", "", ""))
+                self.keys_tree.insert("", tk.END, values=("Nenhuma chave SSH encontrada", "", "", ""))
                 return
             
-            for key_info in found_keys:
+            for record in found_keys:
                 self.keys_tree.insert("", tk.END, values=(
-                    key_info.get("type", "Unknown"),
-                    key_info.get("private_path", "N/A"),
-                    key_info.get("public_path", "N/A")
+                    record.type,
+                    str(record.private_path),
+                    str(record.public_path),
+                    self._format_cert_expiry(record)
                 ))
             app_logger.info("SSH keys displayed in UI")
         except Exception as e:
             app_logger.error(f"Failed to display SSH keys: {e}", exc_info=True)
             self.show_error_message("Display Keys Error", str(e))
 
+    @staticmethod
+    def _format_cert_expiry(record: KeyRecord) -> str:
+        """Expiry of the key's certificate for the keys list ("" without a certificate)"""
+        if record.cert_path is None:
+            return ""
+        expires = record.cert_expires
+        if expires is None:
+            return "inválido" if record.certificate is None else "sem expiração"
+        if expires <= time.time():
+            return "expirado"
+        return time.strftime("%Y-%m-%d %H:%M", time.localtime(expires))
+
     def _delete_selected_ssh_key(self):
         """
         Handles the deletion of a selected SSH key pair from the UI.
@@ -394,12 +510,37 @@ class SSHGitHubConfiguratorUI:
             try:
                 self.ssh_manager.delete_ssh_key(private_path, public_path)
                 messagebox.showinfo("Sucesso", "Chave SSH excluída com sucesso!")
-                self._display_found_ssh_keys() # Refresh the list
             except SSHKeyError as e:
                 messagebox.showerror("Erro de Exclusão", f"Falha ao excluir a chave SSH: {e}")
             except Exception as e:
                 messagebox.showerror("Erro", f"Ocorreu um erro inesperado: {e}")
 
+    def _on_key_events(self, events):
+        """Schedule one key list refresh for a batch of key events (called on an event bus thread)"""
+        if not self._key_refresh_pending:
+            self._key_refresh_pending = True
+            self.scheduler.call_soon(self._schedule_key_refresh)
+
+    def _schedule_key_refresh(self):
+        try:
+            self.root.after(KEY_REFRESH_MS, self._refresh_after_key_events)
+        except Exception:
+            # Let the next batch of events try again
+            self._key_refresh_pending = False
+            raise
+
+    def _refresh_after_key_events(self):
+        self._key_refresh_pending = False
+        self._invalidate_service()
+        self._display_found_ssh_keys()
+
+    def _invalidate_service(self, path: Path = None):
+        """Drop the daemon's cached inventory after keys change on disk"""
+        try:
+            self.service.call("invalidate", path=str(path) if path else None)
+        except (OSError, DaemonError) as e:
+            app_logger.debug(f"Could not invalidate daemon cache: {e}")
+
     def toggle_error_log(self):
         """Toggle error log visibility"""
         try:
@@ -409,24 +550,147 @@ class SSHGitHubConfiguratorUI:
             else:
                 self.error_frame.grid()
                 self.toggle_error_button.config(text="Hide Debug Info")
+                # Messages are not rendered while hidden, so rebuild from the buffer
+                self._render_debug_log()
         except Exception as e:
             app_logger.error(f"Error toggling debug info: {e}")
     
-    def add_debug_message(self, message: str):
-        """Add message to debug log"""
+    def toggle_profile_capture(self):
+        """Start a capture with the debug panel's limit, or stop the running one"""
+        if self.profile_capture is not None:
+            self.stop_profile_capture()
+            return
         try:
+            amount = float(self.profile_amount_var.get())
+            if amount <= 0:
+                raise ValueError(amount)
+        except ValueError:
+            self.show_error_message("Profiling", "Enter a positive number of operations or seconds.")
+            return
+        if self.profile_unit_var.get() == "seconds":
+            self.start_profile_capture(duration=amount)
+        else:
+            self.start_profile_capture(operations=max(1, int(amount)))
+
+    def start_profile_capture(self, operations: int = None, duration: float = None):
+        """
+        Profile the Tk thread and the next background operations (Tk thread only)
+
+        Args:
+            operations: Stop after this many scheduled tasks
+            duration: Stop after this many seconds
+        """
+        if self.profile_capture is not None:
+            return
+        capture = ProfileCapture(operations, duration, on_limit=self._on_profile_limit)
+        try:
+            capture.start()
+        except RuntimeError as e:
+            self.show_error_message("Profiling", str(e))
+            return
+        self.profile_capture = capture
+        self.scheduler.instrument = capture.run
+        if duration is not None:
+            self._profile_timer = self.root.after(int(duration * 1000), self.stop_profile_capture)
+        self.profile_button.config(text="Stop Profiling")
+        self.add_debug_message(f"Profiling the next {capture.describe()}")
+
+    def _on_profile_limit(self):
+        """Stop the capture once its operation limit is reached (called on a worker thread)"""
+        self.scheduler.call_soon(self.stop_profile_capture)
+
+    def stop_profile_capture(self, notify: bool = True):
+        """
+        End the running capture and write its reports next to the logs
+
+        Args:
+            notify: Show the report paths in a dialog (otherwise only in the debug log)
+
+        Returns:
+            The ProfileCapture.stop() result, or None if nothing was running or writing failed
+        """
+        capture = self.profile_capture
+        if capture is None:
+            return None
+        self.profile_capture = None
+        self.scheduler.instrument = None
+        if self._profile_timer is not None:
+            self.root.after_cancel(self._profile_timer)
+            self._profile_timer = None
+        self.profile_button.config(text="Start Profiling")
+
+        try:
+            result = capture.stop()
+        except Exception as e:
+            app_logger.error(f"Could not write profiling reports: {e}", exc_info=True)
+            self.show_error_message("Profiling", f"Could not write the profiling reports: {e}")
+            return None
+        message = (f"{result['operations']} operations in {result['seconds']:.1f}s\n"
+                   f"Profile: {result['report']}\nAllocations: {result['allocations']}")
+        if notify:
+            self.show_success_message("Profiling Finished", message)
+        else:
+            self.add_debug_message(f"Profiling finished: {message}")
+        return result
+
+    def add_debug_message(self, message: str, level: str = "INFO"):
+        """Add message to debug log; writes are coalesced into one widget update per frame"""
+        try:
+            if self.debug_log.append(message, level) and not self._debug_flush_pending:
+                self._debug_flush_pending = True
+                if threading.get_ident() == self._tk_thread_id:
+                    self.root.after(DEBUG_FLUSH_MS, self._flush_debug_log)
+                else:
+                    # Tk must not be called from worker threads; the scheduler's pump flushes instead
+                    self.scheduler.call_soon(self._flush_debug_log)
+        except Exception:
+            self._debug_flush_pending = False  # Fail silently for debug messages, but keep flushing later ones
+    
+    def _flush_debug_log(self):
+        """Write all pending debug messages to the widget in a single insert"""
+        self._debug_flush_pending = False
+        try:
+            lines = self.debug_log.drain_pending(level_value(self.debug_level_var.get()))
+            if not lines or not self.error_frame.winfo_viewable():
+                return
+            self.error_text.config(state=tk.NORMAL)
+            self.error_text.insert(tk.END, "\n".join(lines) + "\n")
+            self._trim_debug_text()
+            self.error_text.see(tk.END)
+            self.error_text.config(state=tk.DISABLED)
+        except Exception:
+            pass  # Fail silently for debug messages
+    
+    def _render_debug_log(self):
+        """Replace the widget contents with the buffered messages matching the level filter"""
+        try:
+            self.debug_log.drain_pending()
+            lines = self.debug_log.lines(level_value(self.debug_level_var.get()))
             self.error_text.config(state=tk.NORMAL)
-            self.error_text.insert(tk.END, f"{message}\n")
+            self.error_text.delete(1.0, tk.END)
+            if lines:
+                self.error_text.insert(tk.END, "\n".join(lines) + "\n")
             self.error_text.see(tk.END)
             self.error_text.config(state=tk.DISABLED)
         except Exception:
             pass  # Fail silently for debug messages
     
+    def _trim_debug_text(self):
+        """Drop the oldest widget lines beyond the buffer's line cap"""
+        line_count = int(self.error_text.index("end-1c").split(".")[0]) - 1
+        excess = line_count - self.debug_log.max_lines
+        if excess > 0:
+            self.error_text.delete(1.0, f"{excess + 1}.0")
+    
+    def _on_command_output(self, line: str):
+        """Forward a line of command output to the debug log (may be called from worker threads)"""
+        self.add_debug_message(f"  {line}", level="DEBUG")
+
     def show_error_message(self, title: str, message: str):
         """Show error message to user with logging"""
         try:
             app_logger.error(f"User error - {title}: {message}")
-            self.add_debug_message(f"ERROR: {title} - {message}")
+            self.add_debug_message(f"ERROR: {title} - {message}", level="ERROR")
             messagebox.showerror(title, message)
         except Exception as e:
             app_logger.critical(f"Failed to show error message: {e}", exc_info=True)
@@ -445,24 +709,39 @@ class SSHGitHubConfiguratorUI:
         self.generate_button.config(state=tk.DISABLED)
         self.progress_bar.grid()
         self.progress_bar.start()
+        self.cancel_button.grid()
         self.add_debug_message("UI updated: Key generation started.")
 
-    def generation_error(self, title: str, message: str):
-        """Handle key generation error and update UI"""
+    def stop_generation_ui(self):
+        """Restore UI after key generation finished, failed or was cancelled"""
         self.progress_bar.stop()
         self.progress_bar.grid_remove()
+        self.cancel_button.grid_remove()
         self.generate_button.config(state=tk.NORMAL)
+        self.generation_task = None
+
+    def cancel_generation(self):
+        """Cancel the running key generation task"""
+        if self.generation_task:
+            self.add_debug_message("Cancelling key generation...")
+            self.generation_task.cancel()
+
+    def generation_cancelled(self):
+        """Handle a cancelled key generation and update UI"""
+        self.stop_generation_ui()
+        self.add_debug_message("UI updated: Key generation cancelled.")
+
+    def generation_error(self, title: str, message: str):
+        """Handle key generation error and update UI"""
+        self.stop_generation_ui()
         self.show_error_message(title, message)
-        self.add_debug_message(f"UI updated: Key generation failed with error: {message}")
+        self.add_debug_message(f"UI updated: Key generation failed with error: {message}", level="ERROR")
 
     def generation_success(self, result):
         """Handle successful key generation and update UI"""
-        self.progress_bar.stop()
-        self.progress_bar.grid_remove()
-        self.generate_button.config(state=tk.NORMAL)
-        self.show_success_message("Key Generation Success", result)
+        self.stop_generation_ui()
+        self.show_success_message("Key Generation Success", result.get("message", str(result)) if isinstance(result, dict) else result)
         self.add_debug_message(f"UI updated: Key generation successful: {result}")
-        self._display_found_ssh_keys() # Refresh the key list
     
     @safe_execute(show_error=True)
     def check_existing_keys(self):
@@ -470,12 +749,11 @@ class SSHGitHubConfiguratorUI:
         try:
             self.add_debug_message("Checking for existing SSH keys...")
             
-            key_info = self.ssh_manager.check_existing_keys()
+            record = self.ssh_manager.check_existing_keys()
             
-            if key_info['found']:
-                key_type = key_info['type']
-                self.load_public_key(key_info['public_path'])
-                self.add_debug_message(f"Found existing {key_type} key")
+            if record is not None:
+                self.load_public_key(record.public_path)
+                self.add_debug_message(f"Found existing {record.type} key")
             else:
                 self.generate_button.config(state=tk.NORMAL)
                 self.add_debug_message("No existing SSH keys found")
@@ -530,7 +808,11 @@ class SSHGitHubConfiguratorUI:
             
             key_name = self.key_name_entry.get().strip()
             use_passphrase = self.use_passphrase_var.get() # Get state of checkbox
-            passphrase = None if use_passphrase else "" # Pass None if checkbox is checked, else empty string
+            passphrase = ""
+            if use_passphrase:
+                passphrase = self._ask_new_passphrase()
+                if passphrase is None:
+                    return
 
             # Determine the path of the key to be generated/checked
             ssh_dir = Path.home() / ".ssh"
@@ -581,52 +863,121 @@ class SSHGitHubConfiguratorUI:
             # Update UI to show progress
             self.start_generation_ui()
             
-            # Generate key in separate thread
-            def generation_worker():
-                try:
-                    result = self.ssh_manager.generate_ssh_key(
-                        email=email, 
-                        passphrase=passphrase,
-                        use_passphrase=use_passphrase,
-                        overwrite=overwrite,
-                        key_name=key_name
-                    )
-                    
-                    # Update UI in main thread
-                    self.root.after(0, lambda: self.generation_success(result))
+            # Generate key on the background scheduler
+            def generation_worker(token):
+                return self.ssh_manager.generate_ssh_key(
+                    email=email, 
+                    passphrase=passphrase,
+                    use_passphrase=use_passphrase,
+                    overwrite=overwrite,
+                    key_name=key_name
+                )
 
-                except SSHKeyError as e:
-                    error_msg = str(e)
-                    self.root.after(0, lambda msg=error_msg: self.generation_error("SSH Key Generation Error", msg))
-                except Exception as e:
-                    error_msg = f"Unexpected error: {e}"
-                    self.root.after(0, lambda msg=error_msg: self.generation_error("Unexpected Generation Error", msg))
-            
-            # Start generation in background thread
-            threading.Thread(target=generation_worker, daemon=True).start()
+            def on_error(e):
+                if isinstance(e, SSHKeyError):
+                    self.generation_error("SSH Key Generation Error", str(e))
+                else:
+                    self.generation_error("Unexpected Generation Error", f"Unexpected error: {e}")
+
+            self.generation_task = self.scheduler.submit(
+                generation_worker,
+                name="generate_ssh_key",
+                priority=PRIORITY_HIGH,
+                on_success=self.generation_success,
+                on_error=on_error,
+                on_cancel=self.generation_cancelled
+            )
             
         except Exception as e:
             self.generation_error("Generation Setup Error", f"Failed to start key generation: {e}")
 
+    def _ask_new_passphrase(self):
+        """Ask for a new passphrase twice in masked dialogs. Returns None if cancelled."""
+        while True:
+            first = simpledialog.askstring("Passphrase", "Digite a passphrase da nova chave:", show="*", parent=self.root)
+            if first is None:
+                return None
+            if not first:
+                messagebox.showwarning("Passphrase", "A passphrase não pode ser vazia.")
+                continue
+            second = simpledialog.askstring("Passphrase", "Confirme a passphrase:", show="*", parent=self.root)
+            if second is None:
+                return None
+            if first == second:
+                return first
+            messagebox.showwarning("Passphrase", "As passphrases não coincidem. Tente novamente.")
+
     def _on_key_select(self, event):
+        """Debounce selection changes so arrow-keying through the list only previews where it stops"""
+        if self._preview_after_id is not None:
+            self.root.after_cancel(self._preview_after_id)
+        self._preview_after_id = self.root.after(PREVIEW_DEBOUNCE_MS, self._preview_selected_key)
+
+    def _preview_selected_key(self):
+        """Show the focused row's public key from cache, loading and prefetching on worker threads"""
+        self._preview_after_id = None
         selected_item = self.keys_tree.focus()
-        if selected_item:
-            item_values = self.keys_tree.item(selected_item, 'values')
-            if item_values:
-                key_path = item_values[1]  # Assuming the path is the second column
+        if not selected_item:
+            return
+        item_values = self.keys_tree.item(selected_item, 'values')
+        if len(item_values) < 3 or not item_values[2]:
+            return
+        public_path = item_values[2]
+
+        cached = self.pubkey_cache.peek(public_path)
+        self._show_preview(cached if cached is not None else "Carregando...")
+
+        # Revalidate (or load) off the Tk thread; only the still-focused row is redrawn
+        def on_success(content, item=selected_item):
+            if self.keys_tree.focus() == item and content != cached:
+                self._show_preview(content)
+
+        def on_error(e, item=selected_item):
+            if self.keys_tree.focus() == item:
+                message = "Public key file not found." if isinstance(e, FileNotFoundError) else f"Error reading public key: {e}"
+                self._show_preview(message)
+
+        self.scheduler.submit(lambda token: self.pubkey_cache.load(public_path), name="preview_public_key",
+                              priority=PRIORITY_HIGH, on_success=on_success, on_error=on_error)
+        self._prefetch_neighbours(selected_item)
+
+    def _prefetch_neighbours(self, item):
+        """Warm the cache for rows around the selection in the background"""
+        children = self.keys_tree.get_children()
+        try:
+            index = children.index(item)
+        except ValueError:
+            return
+        neighbours = children[max(0, index - PREFETCH_NEIGHBOURS):index + PREFETCH_NEIGHBOURS + 1]
+        paths = []
+        for neighbour in neighbours:
+            values = self.keys_tree.item(neighbour, 'values')
+            if len(values) > 2 and values[2] and values[2] not in self.pubkey_cache \
+                    and values[2] not in self._prefetching:
+                paths.append(values[2])
+        if not paths:
+            return
+        self._prefetching.update(paths)
+
+        def prefetch(token):
+            for path in paths:
+                token.raise_if_cancelled()
                 try:
-                    with open(key_path + ".pub", 'r') as f:
-                        pubkey_content = f.read()
-                    self.pubkey_text.config(state=tk.NORMAL)
-                    self.pubkey_text.delete(1.0, tk.END)
-                    self.pubkey_text.insert(tk.END, pubkey_content)
-                    self.pubkey_text.config(state=tk.DISABLED)
-                except FileNotFoundError:
-                    self.pubkey_text.delete(1.0, tk.END)
-                    self.pubkey_text.insert(tk.END, "Public key file not found.")
-                except Exception as e:
-                    self.pubkey_text.delete(1.0, tk.END)
-                    self.pubkey_text.insert(tk.END, f"Error reading public key: {e}")    
+                    self.pubkey_cache.load(path)
+                except OSError:
+                    pass
+
+        self.scheduler.submit(prefetch, name="prefetch_public_keys", priority=PRIORITY_LOW,
+                              on_success=lambda result: self._prefetching.difference_update(paths),
+                              on_error=lambda e: self._prefetching.difference_update(paths),
+                              on_cancel=lambda: self._prefetching.difference_update(paths))
+
+    def _show_preview(self, content: str):
+        self.pubkey_text.config(state=tk.NORMAL)
+        self.pubkey_text.delete(1.0, tk.END)
+        self.pubkey_text.insert(tk.END, content)
+        self.pubkey_text.config(state=tk.DISABLED)
+
     @safe_execute(show_error=True)
     def copy_to_clipboard_safe(self):
         """Safely copy public key to clipboard"""
@@ -650,6 +1001,181 @@ class SSHGitHubConfiguratorUI:
                 
 
     
+    @safe_execute(show_error=True)
+    def copy_selected_keys_safe(self):
+        """Copy the public keys of all selected rows to the clipboard in one write"""
+        try:
+            selected_items = self.keys_tree.selection()
+            if not selected_items:
+                messagebox.showwarning("Nenhuma Chave Selecionada", "Por favor, selecione uma ou mais chaves SSH para copiar.")
+                return
+            
+            pubkeys = []
+            for item in selected_items:
+                values = self.keys_tree.item(item, "values")
+                if len(values) < 3 or not values[2]:
+                    continue
+                try:
+                    pubkeys.append(self.ssh_manager.load_public_key(Path(values[2])))
+                except SSHKeyError as e:
+                    self.add_debug_message(f"Skipping {values[2]}: {e}", level="WARNING")
+            
+            if ClipboardManager.copy_many_to_clipboard(pubkeys, self.root):
+                self.show_success_message("Success", f"{len(pubkeys)} public key(s) copied to clipboard!")
+            else:
+                self.show_error_message("Clipboard Error", "Failed to copy to clipboard. Please copy manually.")
+                
+        except Exception as e:
+            error_msg = self.error_handler.handle_exception(e, "copy_selected_keys")
+            self.show_error_message("Clipboard Error", error_msg)
+    
+    def export_keys_safe(self):
+        """Export all public keys in the selected format to a file chosen by the user"""
+        try:
+            fmt = self.export_format_var.get()
+            output_path = filedialog.asksaveasfilename(
+                title="Exportar Chaves Públicas",
+                initialfile=EXPORT_FORMATS[fmt]
+            )
+            if not output_path:
+                return
+            
+            self.add_debug_message(f"Exporting public keys as {fmt} to {output_path}...")
+            self.scheduler.submit(
+                lambda token: export_public_keys(self.ssh_manager, Path(output_path), fmt),
+                name="export_public_keys",
+                on_success=lambda result: self.show_success_message(
+                    "Export Success", f"{result['count']} public key(s) exported to {result['path']}"),
+                on_error=lambda e: self.show_error_message("Export Error", str(e))
+            )
+        except Exception as e:
+            error_msg = self.error_handler.handle_exception(e, "export_keys")
+            self.show_error_message("Export Error", error_msg)
+    
+    def verify_keys_safe(self):
+        """Verify in the background that every private key matches its public key file"""
+        def on_success(results):
+            problems = [r for r in results if r['status'] != "ok"]
+            for r in problems:
+                level = "ERROR" if r['status'] == "mismatch" else "WARNING"
+                self.add_debug_message(f"{r['status'].upper()}: {r['private_path']} / {r['public_path']}", level=level)
+            mismatches = [r for r in problems if r['status'] == "mismatch"]
+            if mismatches:
+                names = "\n".join(Path(r['private_path']).name for r in mismatches)
+                self.show_error_message("Verificação de Chaves",
+                                        f"{len(mismatches)} chave(s) pública(s) não correspondem à chave privada:\n{names}")
+            else:
+                self.show_success_message("Verificação de Chaves",
+                                          f"{len(results)} par(es) verificado(s), {len(problems)} não verificável(is).")
+
+        self.add_debug_message("Verifying SSH key pairs...")
+        self.scheduler.submit(
+            lambda token: self.ssh_manager.verify_key_pairs(),
+            name="verify_key_pairs",
+            on_success=on_success,
+            on_error=lambda e: self.show_error_message("Verification Error", str(e))
+        )
+    
+    def upload_keys_safe(self):
+        """Upload the selected public keys (or all keys) to GitHub in the background"""
+        try:
+            selected = {values[2] for values in (self.keys_tree.item(item, "values") for item in self.keys_tree.selection())
+                        if len(values) > 2 and values[2]}
+            token = os.environ.get(TOKEN_ENV_VAR) or simpledialog.askstring(
+                "GitHub Token", "Token do GitHub (escopo admin:public_key):", show="*", parent=self.root)
+            if not token:
+                return
+            repo = simpledialog.askstring(
+                "Deploy Key", "Repositório para deploy keys (owner/repo), ou vazio para a sua conta:",
+                parent=self.root)
+            repo = repo.strip() if repo else None
+
+            def upload_worker(cancel_token):
+                records = [record for record in self.ssh_manager.find_all_ssh_keys()
+                           if not selected or str(record.public_path) in selected]
+                return upload_public_keys(records, token, repo=repo, cancel_event=cancel_token.event)
+
+            def on_success(results):
+                for r in results:
+                    level = "INFO" if r['status'] in ("uploaded", "exists") else "ERROR"
+                    self.add_debug_message(f"GitHub {r['status']}: {r['title']} {r['error'] or ''}".rstrip(), level=level)
+                uploaded = sum(1 for r in results if r['status'] == "uploaded")
+                existing = sum(1 for r in results if r['status'] == "exists")
+                failed = len(results) - uploaded - existing
+                message = f"{uploaded} enviada(s), {existing} já registrada(s), {failed} com falha."
+                if failed:
+                    self.show_error_message("GitHub Upload", message)
+                else:
+                    self.show_success_message("GitHub Upload", message)
+
+            self.add_debug_message(f"Uploading public keys to GitHub{' deploy keys of ' + repo if repo else ''}...")
+            self.scheduler.submit(
+                upload_worker,
+                name="upload_github_keys",
+                on_success=on_success,
+                on_error=lambda e: self.show_error_message("GitHub Upload Error", str(e))
+            )
+        except Exception as e:
+            error_msg = self.error_handler.handle_exception(e, "upload_keys")
+            self.show_error_message("GitHub Upload Error", error_msg)
+    
+    def change_passphrases_safe(self):
+        """Add, change or remove the passphrase of the selected private keys in the background"""
+        try:
+            selected = {values[2] for values in (self.keys_tree.item(item, "values") for item in self.keys_tree.selection())
+                        if len(values) > 2 and values[2]}
+            if not selected:
+                self.show_error_message("Alterar Passphrase", "Selecione uma ou mais chaves na lista.")
+                return
+            old_passphrase = simpledialog.askstring(
+                "Passphrase Atual", "Passphrase atual (vazio se as chaves não têm passphrase):", show="*", parent=self.root)
+            if old_passphrase is None:
+                return
+            new_passphrase = simpledialog.askstring(
+                "Nova Passphrase", "Nova passphrase (vazio para remover a proteção):", show="*", parent=self.root)
+            if new_passphrase is None:
+                return
+            if new_passphrase:
+                confirm = simpledialog.askstring("Nova Passphrase", "Confirme a nova passphrase:", show="*", parent=self.root)
+                if confirm != new_passphrase:
+                    self.show_error_message("Alterar Passphrase", "As passphrases não coincidem.")
+                    return
+            kdf_rounds = None
+            if new_passphrase:
+                kdf_rounds = simpledialog.askinteger(
+                    "Rodadas do KDF", "Rodadas do KDF (mais = mais resistente e mais lento; padrão do ssh-keygen: 16):",
+                    initialvalue=64, minvalue=1, maxvalue=1000, parent=self.root)
+                if kdf_rounds is None:
+                    return
+
+            def change_worker(cancel_token):
+                records = [record for record in self.ssh_manager.find_all_ssh_keys()
+                           if str(record.public_path) in selected]
+                return self.ssh_manager.change_passphrases(records, old_passphrase, new_passphrase, kdf_rounds=kdf_rounds)
+
+            def on_success(results):
+                for r in results:
+                    level = "INFO" if r['status'] in ("uploaded", "exists") else "ERROR"
+                    self.add_debug_message(f"Passphrase {r['status']}: {r['private_path']} {r['error'] or ''}".rstrip(), level=level)
+                changed = sum(1 for r in results if r['status'] == "changed")
+                failed = sum(1 for r in results if r['status'] == "failed")
+                message = f"{changed} chave(s) alterada(s), {len(results) - changed - failed} ignorada(s), {failed} com falha."
+                if failed:
+                    self.show_error_message("Alterar Passphrase", message)
+                else:
+                    self.show_success_message("Alterar Passphrase", message)
+
+            self.add_debug_message(f"Changing passphrase of {len(selected)} key(s)...")
+            self.scheduler.submit(
+                change_worker,
+                name="change_passphrases",
+                on_success=on_success,
+                on_error=lambda e: self.show_error_message("Passphrase Error", str(e))
+            )
+        except Exception as e:
+            error_msg = self.error_handler.handle_exception(e, "change_passphrases")
+            self.show_error_message("Passphrase Error", error_msg)
+    
     def test_error(self, title: str, message: str):
         """Handle connection test error"""
         try:
@@ -8,6 +8,7 @@ import functools
 import traceback
 from typing import Callable, Any
 from logger import app_logger
+from process_runner import process_runner, PROBE_TIMEOUT
 
 
 def safe_execute(show_error: bool = True, default_return: Any = None):
@@ -114,6 +115,17 @@ class ErrorHandler:
 class ClipboardManager:
     """Cross-platform clipboard management"""
     
+    # Linux clipboard backends in order of preference: (name, command, needs Wayland)
+    LINUX_BACKENDS = [
+        ("wl-copy", ["wl-copy"], True),
+        ("xclip", ["xclip", "-selection", "clipboard"], False),
+        ("xsel", ["xsel", "--clipboard", "--input"], False),
+    ]
+    
+    # Probed Linux backend command, cached for the lifetime of the process
+    _linux_backend = None
+    _linux_probed = False
+    
     @staticmethod
     def copy_to_clipboard(text: str, root_widget=None) -> bool:
         """
@@ -130,9 +142,9 @@ class ClipboardManager:
             # Try tkinter clipboard first (if root widget available)
             if root_widget:
                 try:
+                    # Tk owns the selection while the app runs; no event loop flush needed
                     root_widget.clipboard_clear()
                     root_widget.clipboard_append(text)
-                    root_widget.update()  # Ensure clipboard is updated
                     app_logger.info("Text copied to clipboard using tkinter")
                     return True
                 except Exception as e:
@@ -156,15 +168,32 @@ class ClipboardManager:
             app_logger.error(f"Clipboard operation failed: {e}", exc_info=True)
             return False
     
+    @staticmethod
+    def copy_many_to_clipboard(texts, root_widget=None) -> bool:
+        """
+        Copy several texts (e.g. public keys) in one clipboard write
+        
+        Args:
+            texts: Iterable of texts; blank and duplicate entries are dropped
+            root_widget: Tkinter root widget (if available)
+            
+        Returns:
+            True if successful, False otherwise
+        """
+        unique = list(dict.fromkeys(text.strip() for text in texts if text and text.strip()))
+        if not unique:
+            app_logger.warning("Nothing to copy to clipboard")
+            return False
+        app_logger.info(f"Copying {len(unique)} entries to clipboard")
+        return ClipboardManager.copy_to_clipboard("\n".join(unique) + "\n", root_widget)
+    
     @staticmethod
     def _copy_windows(text: str) -> bool:
         """Copy to clipboard on Windows"""
         try:
-            import subprocess
-            process = subprocess.Popen(['clip'], stdin=subprocess.PIPE, text=True)
-            process.communicate(input=text)
+            result = process_runner.run(['clip'], input_text=text, timeout=PROBE_TIMEOUT)
             app_logger.info("Text copied to clipboard using Windows clip")
-            return process.returncode == 0
+            return result.returncode == 0
         except Exception as e:
             app_logger.error(f"Windows clipboard copy failed: {e}")
             return False
@@ -173,44 +202,82 @@ class ClipboardManager:
     def _copy_macos(text: str) -> bool:
         """Copy to clipboard on macOS"""
         try:
-            import subprocess
-            process = subprocess.Popen(['pbcopy'], stdin=subprocess.PIPE, text=True)
-            process.communicate(input=text)
+            result = process_runner.run(['pbcopy'], input_text=text, timeout=PROBE_TIMEOUT)
             app_logger.info("Text copied to clipboard using macOS pbcopy")
-            return process.returncode == 0
+            return result.returncode == 0
         except Exception as e:
             app_logger.error(f"macOS clipboard copy failed: {e}")
             return False
     
-    @staticmethod
-    def _copy_linux(text: str) -> bool:
-        """Copy to clipboard on Linux"""
-        try:
-            import subprocess
-            
-            # Try xclip first
-            try:
-                process = subprocess.Popen(['xclip', '-selection', 'clipboard'], 
-                                        stdin=subprocess.PIPE, text=True)
-                process.communicate(input=text)
-                if process.returncode == 0:
-                    app_logger.info("Text copied to clipboard using xclip")
-                    return True
-            except FileNotFoundError:
-                pass
+    @classmethod
+    def _probe_linux_backend(cls):
+        """Find the first available Linux clipboard backend, caching the result"""
+        if not cls._linux_probed:
+            import os
+            import shutil
             
-            # Try xsel as fallback
-            try:
-                process = subprocess.Popen(['xsel', '--clipboard', '--input'], 
-                                        stdin=subprocess.PIPE, text=True)
-                process.communicate(input=text)
-                if process.returncode == 0:
-                    app_logger.info("Text copied to clipboard using xsel")
+            on_wayland = bool(os.environ.get("WAYLAND_DISPLAY"))
+            cls._linux_backend = None
+            for name, command, needs_wayland in cls.LINUX_BACKENDS:
+                if needs_wayland and not on_wayland:
+                    continue
+                if shutil.which(command[0]):
+                    cls._linux_backend = (name, command)
+                    break
+            cls._linux_probed = True
+            app_logger.info(f"Linux clipboard backend: {cls._linux_backend[0] if cls._linux_backend else 'none'}")
+        return cls._linux_backend
+    
+    @classmethod
+    def reset_backend_cache(cls):
+        """Forget the probed Linux backend so the next copy probes again"""
+        cls._linux_backend = None
+        cls._linux_probed = False
+    
+    @classmethod
+    def _linux_candidates(cls):
+        """The cached backend first, then every other installed backend in LINUX_BACKENDS order"""
+        import os
+        import shutil
+        
+        cached = cls._probe_linux_backend()
+        if cached is not None:
+            yield cached
+        on_wayland = bool(os.environ.get("WAYLAND_DISPLAY"))
+        for name, command, needs_wayland in cls.LINUX_BACKENDS:
+            if (cached is None or name != cached[0]) and (on_wayland or not needs_wayland) and shutil.which(command[0]):
+                yield name, command
+    
+    @classmethod
+    def _copy_linux(cls, text: str) -> bool:
+        """Copy to clipboard on Linux, falling back to the next backend when one fails"""
+        try:
+            tried = False
+            for name, command in cls._linux_candidates():
+                tried = True
+                try:
+                    # The backend forks a process that keeps serving the selection,
+                    # so don't capture output (its inherited pipes would stay open)
+                    result = process_runner.run(command, input_text=text, timeout=PROBE_TIMEOUT,
+                                                capture_output=False)
+                except FileNotFoundError:
+                    app_logger.error(f"Clipboard utility {name} is no longer available")
+                    continue
+                
+                if result.returncode == 0:
+                    # Remember the backend that worked (e.g. xsel when xclip has no usable DISPLAY)
+                    cls._linux_backend = (name, command)
+                    cls._linux_probed = True
+                    app_logger.info(f"Text copied to clipboard using {name}")
                     return True
-            except FileNotFoundError:
-                pass
+                
+                app_logger.error(f"{name} failed with exit code {result.returncode}")
             
-            app_logger.error("No clipboard utility found (xclip or xsel)")
+            if not tried:
+                app_logger.error("No clipboard utility found (wl-copy, xclip or xsel)")
+            else:
+                # Nothing worked; probe again next time
+                cls.reset_backend_cache()
             return False
             
         except Exception as e: